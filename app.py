@@ -1,10 +1,17 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template as _render_template, request, redirect, url_for, flash, session, jsonify, Response, g, send_file
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
+from contextlib import ExitStack
 from functools import wraps
 import os
 import base64
+import json
+import random
+import shutil
 import sys
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 
 print("[INIT] Starting Flask app initialization...", file=sys.stderr)
 
@@ -17,13 +24,141 @@ app.config['ADMIN_PASSWORD'] = os.environ.get('ADMIN_PASSWORD', 'admin123')
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'doc', 'docx', 'txt', 'png', 'jpg', 'jpeg'}
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+app.config['SEARCH_INDEX_PATH'] = os.environ.get('SEARCH_INDEX_PATH', 'data/search_index.json')
+app.config['SEARCH_RESULTS_PER_PAGE'] = 10
+app.config['COMPRESS_RESPONSES'] = os.environ.get('COMPRESS_RESPONSES', 'true').lower() == 'true'
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+app.config['COMPRESS_CACHE_MAX_BYTES'] = int(os.environ.get('COMPRESS_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+app.config['MINIFY_HTML'] = os.environ.get('MINIFY_HTML', 'true').lower() == 'true'
+app.config['SESSIONLESS_PUBLIC'] = os.environ.get('SESSIONLESS_PUBLIC', 'true').lower() == 'true'
+app.config['PUBLIC_CACHE_MAX_AGE'] = int(os.environ.get('PUBLIC_CACHE_MAX_AGE', 60))
+app.config['SINGLE_FLIGHT_TIMEOUT'] = float(os.environ.get('SINGLE_FLIGHT_TIMEOUT', 10))
+# Firestore deadlines and circuit breaker (seconds / consecutive failures)
+app.config['FIRESTORE_GET_TIMEOUT'] = float(os.environ.get('FIRESTORE_GET_TIMEOUT', 5))
+app.config['FIRESTORE_QUERY_TIMEOUT'] = float(os.environ.get('FIRESTORE_QUERY_TIMEOUT', 10))
+app.config['FIRESTORE_BREAKER_FAILURES'] = int(os.environ.get('FIRESTORE_BREAKER_FAILURES', 5))
+app.config['FIRESTORE_BREAKER_SLOW_CALL'] = float(os.environ.get('FIRESTORE_BREAKER_SLOW_CALL', 5))
+app.config['FIRESTORE_BREAKER_RESET'] = float(os.environ.get('FIRESTORE_BREAKER_RESET', 30))
+# Worker processes sharing the cache (gunicorn.conf.py exports WEB_WORKERS); a
+# per-process cache is only safe for one, so several default to Redis
+app.config['WEB_WORKERS'] = int(os.environ.get('WEB_WORKERS', 1))
+app.config['CACHE_BACKEND'] = os.environ.get(
+    'CACHE_BACKEND', 'redis' if app.config['WEB_WORKERS'] > 1 else 'local')  # 'local' or 'redis'
+app.config['REDIS_URL'] = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+app.config['CACHE_TTL'] = int(os.environ.get('CACHE_TTL', 300))
+app.config['SITE_TIMEZONE'] = os.environ.get('SITE_TIMEZONE', 'Africa/Johannesburg')
+app.config['ICS_MAX_AGE'] = int(os.environ.get('ICS_MAX_AGE', 300))
+app.config['FIRESTORE_READ_BUDGETS'] = os.environ.get('FIRESTORE_READ_BUDGETS', '')  # e.g. "index:20,calendar:100"
+app.config['FIRESTORE_DEFAULT_READ_BUDGET'] = int(os.environ.get('FIRESTORE_DEFAULT_READ_BUDGET', 0))
+app.config['COST_SUMMARY_INTERVAL'] = int(os.environ.get('COST_SUMMARY_INTERVAL', 3600))
+# Serverless deployments have no persistent disk or background threads for the queue
+app.config['WRITE_QUEUE_ENABLED'] = os.environ.get(
+    'WRITE_QUEUE_ENABLED', 'false' if os.environ.get('VERCEL') else 'true').lower() == 'true'
+app.config['WRITE_QUEUE_PATH'] = os.environ.get('WRITE_QUEUE_PATH', 'data/write_queue.sqlite3')
+app.config['WRITE_QUEUE_BATCH_SIZE'] = int(os.environ.get('WRITE_QUEUE_BATCH_SIZE', 20))
+app.config['WRITE_QUEUE_MAX_ATTEMPTS'] = int(os.environ.get('WRITE_QUEUE_MAX_ATTEMPTS', 8))
+app.config['STATIC_EXPORT_ENABLED'] = os.environ.get('STATIC_EXPORT_ENABLED', 'false').lower() == 'true'
+app.config['STATIC_EXPORT_DIR'] = os.environ.get('STATIC_EXPORT_DIR', 'data/site')
+app.config['SITE_SNAPSHOT_ENABLED'] = os.environ.get('SITE_SNAPSHOT_ENABLED', 'true').lower() == 'true'
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'data/profiles')
+app.config['PROFILE_MAX_STORED'] = int(os.environ.get('PROFILE_MAX_STORED', 50))
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))  # fraction of all requests
+app.config['PROFILE_INTERVAL'] = float(os.environ.get('PROFILE_INTERVAL', 0.005))  # seconds between stack samples
+app.config['ADMIN_SECTION_PAGE_SIZE'] = int(os.environ.get('ADMIN_SECTION_PAGE_SIZE', 25))
+app.config['RESUMABLE_UPLOAD_FOLDER'] = os.environ.get('RESUMABLE_UPLOAD_FOLDER', 'data/partial_uploads')
+# Same limit as a one-request upload unless raised explicitly
+app.config['RESUMABLE_UPLOAD_MAX_SIZE'] = int(os.environ.get('RESUMABLE_UPLOAD_MAX_SIZE',
+                                                             app.config['MAX_CONTENT_LENGTH']))
+app.config['RESUMABLE_CHUNK_SIZE'] = int(os.environ.get('RESUMABLE_CHUNK_SIZE', 1024 * 1024))
+app.config['RESUMABLE_UPLOAD_TTL'] = int(os.environ.get('RESUMABLE_UPLOAD_TTL', 24 * 3600))
 
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 print("[INIT] Upload folder created", file=sys.stderr)
 
+# ============ SESSIONS ============
+from utils.sessions import AnonymousSession, PublicSessionInterface
+
+if app.config['SESSIONLESS_PUBLIC']:
+    app.session_interface = PublicSessionInterface()
+    print("[INIT] Anonymous public requests will not use sessions", file=sys.stderr)
+
+# ============ PROFILING ============
+# Registered first so the profile covers the other before_request hooks,
+# and its after_request hook runs last.
+from utils.profiling import ProfileStore, StackSampler
+
+profile_store = ProfileStore(app.config['PROFILE_DIR'], app.config['PROFILE_MAX_STORED'])
+
+def _profile_reason():
+    """Why this request should be profiled, or None."""
+    if request.endpoint in (None, 'static') or request.path.startswith('/admin/profiles'):
+        return None
+    requested = request.headers.get('X-Profile') == '1' or request.args.get('_profile') == '1'
+    if requested and session.get('logged_in'):
+        return 'requested'
+    if app.config['PROFILE_SAMPLE_RATE'] > 0 and random.random() < app.config['PROFILE_SAMPLE_RATE']:
+        return 'sampled'
+    return None
+
+@app.before_request
+def start_profiling():
+    reason = _profile_reason()
+    if reason:
+        g.profiler = StackSampler(threading.get_ident(), app.config['PROFILE_INTERVAL']).start()
+        g.profile_reason = reason
+
+@app.after_request
+def finish_profiling(response):
+    """Store the profile of a profiled request; admins get its id in X-Profile-Id."""
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    stacks = profiler.stop()
+    try:
+        profile_id = profile_store.save({
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round(profiler.duration * 1000, 1),
+            'samples': sum(stacks.values()),
+            'interval_ms': profiler.interval * 1000,
+            'reason': g.profile_reason,
+            'pid': os.getpid(),
+            'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }, stacks)
+    except OSError as e:
+        print(f"[WARNING] Could not store profile: {e}", file=sys.stderr)
+        return response
+    if g.profile_reason == 'requested':
+        response.headers['X-Profile-Id'] = profile_id
+    return response
+
+@app.teardown_request
+def abandon_profiling(exc):
+    """Stop the sampler of a request that ended without a response (unhandled error)."""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
 # ============ FIREBASE INITIALIZATION ============
+from utils.cache import MISS, LocalCache, make_cache
+
 firebase = None
 
+try:
+    cache = make_cache(app.config['CACHE_BACKEND'], app.config['REDIS_URL'], app.config['CACHE_TTL'],
+                       workers=app.config['WEB_WORKERS'])
+    print(f"[INIT] Using {app.config['CACHE_BACKEND']} read cache", file=sys.stderr)
+except Exception as e:
+    if app.config['WEB_WORKERS'] > 1:
+        # Falling back to per-process caches would serve stale pages; don't start
+        print(f"[ERROR] {app.config['CACHE_BACKEND']} cache unavailable for "
+              f"{app.config['WEB_WORKERS']} workers: {e}", file=sys.stderr)
+        raise
+    print(f"[WARNING] {app.config['CACHE_BACKEND']} cache unavailable ({e}); using local cache", file=sys.stderr)
+    cache = LocalCache(ttl=app.config['CACHE_TTL'])
+
 try:
     # Handle Firebase credentials from base64 environment variable
     creds_b64 = os.environ.get('FIREBASE_CREDENTIALS_BASE64')
@@ -41,7 +176,14 @@ try:
     # Try to import and initialize Firebase
     if os.path.exists(creds_path):
         from utils.firebase_utils import FirebaseManager
-        firebase = FirebaseManager(creds_path)
+        firebase = FirebaseManager(creds_path, cache=cache)
+        firebase.single_flight.default_timeout = app.config['SINGLE_FLIGHT_TIMEOUT']
+        firebase.use_snapshot = app.config['SITE_SNAPSHOT_ENABLED']
+        firebase.timeouts = {'get': app.config['FIRESTORE_GET_TIMEOUT'],
+                             'query': app.config['FIRESTORE_QUERY_TIMEOUT']}
+        firebase.breaker.failure_threshold = app.config['FIRESTORE_BREAKER_FAILURES']
+        firebase.breaker.slow_call_seconds = app.config['FIRESTORE_BREAKER_SLOW_CALL']
+        firebase.breaker.reset_timeout = app.config['FIRESTORE_BREAKER_RESET']
         print("[INIT] ✓ Firebase initialized successfully", file=sys.stderr)
     else:
         print(f"[WARNING] Firebase credentials file not found at {creds_path}", file=sys.stderr)
@@ -51,8 +193,266 @@ except Exception as e:
     print(f"[WARNING] Firebase initialization failed: {e}", file=sys.stderr)
     print("[WARNING] App will run WITHOUT database features", file=sys.stderr)
 
+@app.before_request
+def start_cache_subscriber():
+    """Relay other workers' writes to this worker's listeners; not in a preloading master."""
+    if firebase is not None:
+        firebase.cache.ensure_subscribed()
+
+@app.cli.command('rebuild-snapshot')
+def rebuild_snapshot_command():
+    """Rebuild the site snapshot document from the Firestore collections."""
+    if firebase is None:
+        print("Firebase is not configured")
+        return
+    snapshot = firebase.rebuild_snapshot()
+    if snapshot is None:
+        print("Snapshot too large; public pages read the collections directly")
+        return
+    for collection in ('announcements', 'classes', 'camps', 'materials'):
+        print(f"{collection}: {len(snapshot[collection])}")
+
+# ============ WRITE QUEUE ============
+from utils.write_queue import WriteQueue
+
+write_queue = None
+
+if firebase and app.config['WRITE_QUEUE_ENABLED']:
+    try:
+        write_queue = WriteQueue(app.config['WRITE_QUEUE_PATH'], firebase,
+                                 batch_size=app.config['WRITE_QUEUE_BATCH_SIZE'],
+                                 max_attempts=app.config['WRITE_QUEUE_MAX_ATTEMPTS'])
+        firebase.pending_writes = write_queue
+        print(f"[INIT] Admin writes queued in {app.config['WRITE_QUEUE_PATH']}", file=sys.stderr)
+    except Exception as e:
+        print(f"[WARNING] Write queue unavailable ({e}); admin writes go straight to Firestore", file=sys.stderr)
+
+@app.before_request
+def start_write_queue():
+    """Start this worker's queue drainer; not at import, where a preloading master would own it."""
+    if write_queue is not None:
+        write_queue.ensure_running()
+
+def queue_write(collection, action, data=None, doc_id=None):
+    """Queue an admin write, or apply it right away when the queue is off."""
+    if write_queue is not None:
+        write_queue.submit(collection, action, data, doc_id)
+        return
+    direct = {
+        ('classes', 'add'): lambda: firebase.add_class(data),
+        ('classes', 'delete'): lambda: firebase.delete_class(doc_id),
+        ('camps', 'add'): lambda: firebase.add_camp(data),
+        ('camps', 'delete'): lambda: firebase.delete_camp(doc_id),
+        ('announcements', 'add'): lambda: firebase.add_announcement(data),
+        ('announcements', 'delete'): lambda: firebase.delete_announcement(doc_id),
+        ('settings', 'update'): lambda: firebase.update_settings(data),
+    }
+    direct[(collection, action)]()
+
+# ============ COLLECTION VERSIONS ============
+from utils.versions import CollectionVersions
+
+collection_versions = CollectionVersions(firebase.cache if firebase else cache)
+
+# ============ SEARCH INDEX ============
+from utils.search_index import SearchIndex
+
+search_index = SearchIndex(app.config['SEARCH_INDEX_PATH'], app.config['UPLOAD_FOLDER'], firebase)
+
+try:
+    if firebase:
+        search_index.ensure_current()
+        firebase.add_listener(search_index.on_write)
+        print(f"[INIT] Search index ready ({len(search_index)} documents)", file=sys.stderr)
+    elif search_index.load():
+        print(f"[INIT] Search index loaded ({len(search_index)} documents)", file=sys.stderr)
+except Exception as e:
+    print(f"[WARNING] Search index unavailable: {e}", file=sys.stderr)
+
 print("[INIT] ✓ App initialization complete", file=sys.stderr)
 
+# ============ CALENDAR FEEDS ============
+from utils.ical import IcsFeeds
+
+ics_feeds = IcsFeeds(firebase, app.config['SITE_TIMEZONE'])
+
+# ============ CALENDAR INDEX ============
+from utils.calendar_index import CalendarIndex
+
+calendar_index = CalendarIndex(firebase, app.config['SITE_TIMEZONE'])
+if firebase:
+    firebase.add_listener(calendar_index.on_write)
+
+CALENDAR_VIEWS = ('all', 'week', 'month', 'upcoming')
+MAX_UPCOMING_SESSIONS = 100
+
+# ============ ASSET BUNDLES ============
+from utils.assets import AssetManifest, FAR_FUTURE_MAX_AGE, DIST_DIR
+
+assets = AssetManifest(app.static_folder)
+assets.load()
+
+@app.template_global()
+def asset_url(name):
+    """Fingerprinted URL for a bundle defined in utils.assets.BUNDLES"""
+    filename = assets.filename(name)
+    if assets.memory:
+        return url_for('asset_bundle', filename=filename)
+    return url_for('static', filename=f'{DIST_DIR}/{filename}')
+
+@app.route('/assets/<filename>')
+def asset_bundle(filename):
+    """Serve bundles built in memory when static/dist isn't writable"""
+    content = assets.memory.get(filename)
+    if content is None:
+        return 'Not found', 404
+    mimetype = 'text/css' if filename.endswith('.css') else 'application/javascript'
+    return Response(content, mimetype=mimetype)
+
+@app.after_request
+def cache_fingerprinted_assets(response):
+    """Hashed bundles never change, so let browsers and CDNs keep them for a year."""
+    filename = (request.view_args or {}).get('filename', '')
+    if response.status_code == 200 and (
+            request.endpoint == 'asset_bundle'
+            or (request.endpoint == 'static' and filename.startswith(f'{DIST_DIR}/'))):
+        response.cache_control.public = True
+        response.cache_control.max_age = FAR_FUTURE_MAX_AGE
+        response.cache_control.immutable = True
+        response.cache_control.no_cache = None
+    return response
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Rebuild the fingerprinted CSS/JS bundles in static/dist."""
+    for name, filename in sorted(assets.build().items()):
+        print(f"{name} -> {DIST_DIR}/{filename}")
+
+# ============ RESPONSE SIZE ============
+from utils.compression import StaticCompressionCache, compress_response
+from utils.html_minify import minify_html
+
+static_compression = StaticCompressionCache(app.config['COMPRESS_MIN_SIZE'], app.config['COMPRESS_CACHE_MAX_BYTES'])
+
+def render_template(template_name, **context):
+    """Render a template, minifying the HTML when MINIFY_HTML is on."""
+    html = _render_template(template_name, **context)
+    if app.config['MINIFY_HTML']:
+        html = minify_html(html)
+    return html
+
+@app.after_request
+def compress(response):
+    """gzip/brotli responses the client accepts; static files come from a precompressed cache."""
+    if not app.config['COMPRESS_RESPONSES']:
+        return response
+    if g.get('static_export_path'):
+        return static_compression.compress_static_response(response, g.static_export_path,
+                                                           request.accept_encodings)
+    if request.endpoint == 'static' and request.view_args:
+        path = safe_join(app.static_folder, request.view_args.get('filename', ''))
+        if path:
+            return static_compression.compress_static_response(response, path, request.accept_encodings)
+        return response
+    return compress_response(response, request.accept_encodings, app.config['COMPRESS_MIN_SIZE'])
+
+# ============ PUBLIC NOTICES & CACHING ============
+
+def public_notice(message, category='info'):
+    """Show a message on the page being rendered, without storing it in the session."""
+    g.setdefault('public_notices', []).append((category, message))
+
+def is_anonymous_request():
+    """True when this request is being served without a session."""
+    return app.config['SESSIONLESS_PUBLIC'] and isinstance(session._get_current_object(), AnonymousSession)
+
+# Pages a shared cache may keep for anonymous visitors; health checks, JSON
+# and the login form are never marked public
+PUBLIC_CACHED_PAGES = {'index', 'calendar', 'materials', 'camps', 'contact', 'about', 'search'}
+
+@app.before_request
+def watch_public_reads():
+    """Note whether a public page is rendered from fallback data (Firestore failing)."""
+    if firebase and request.endpoint in PUBLIC_CACHED_PAGES:
+        g.public_reads_stack = ExitStack()
+        g.public_reads = g.public_reads_stack.enter_context(firebase.breaker.watch())
+
+@app.teardown_request
+def close_public_reads(exc):
+    stack = g.pop('public_reads_stack', None)
+    if stack is not None:
+        stack.close()
+
+@app.after_request
+def public_cache_headers(response):
+    """Let shared caches keep anonymous public pages; keep admin pages private."""
+    if 'Cache-Control' in response.headers or request.endpoint in (None, 'static'):
+        return response
+    if is_anonymous_request():
+        reads = g.get('public_reads')
+        if reads is not None and reads.degraded:
+            # Rendered from fallback data; fetch the real page once Firestore recovers
+            response.cache_control.no_store = True
+        # Pages showing an error notice shouldn't be pinned in a shared cache
+        elif (request.endpoint in PUBLIC_CACHED_PAGES and response.status_code == 200
+                and app.config['PUBLIC_CACHE_MAX_AGE'] > 0 and not g.get('public_notices')):
+            response.cache_control.public = True
+            response.cache_control.max_age = app.config['PUBLIC_CACHE_MAX_AGE']
+    else:
+        response.cache_control.private = True
+    return response
+
+# ============ STATIC EXPORT ============
+from utils.static_export import PAGES as EXPORTED_PAGES, StaticExport, release_key
+
+static_export = StaticExport(app, app.config['STATIC_EXPORT_DIR'], breaker=firebase.breaker if firebase else None,
+                             release=release_key(app, assets.files))
+if firebase and app.config['STATIC_EXPORT_ENABLED']:
+    firebase.add_listener(static_export.on_write)
+    if write_queue is not None:
+        # Pages exported with a queued write showing must lose it again
+        write_queue.add_drop_listener(static_export.invalidate)
+
+@app.before_request
+def serve_static_export():
+    """Answer public pages from their pre-rendered files, skipping Firestore and Jinja."""
+    if (not app.config['STATIC_EXPORT_ENABLED'] or request.method != 'GET' or request.query_string
+            or request.endpoint not in EXPORTED_PAGES or g.get('rendering_static_export')):
+        return None
+    # Logged-in admins and pending flash messages need the live page
+    if session.get('logged_in') or session.get('_flashes'):
+        return None
+    path = static_export.path_for(request.endpoint)
+    if not os.path.exists(path):
+        return None
+    g.static_export_path = path
+    return send_file(os.path.abspath(path), mimetype='text/html', conditional=True,
+                     max_age=app.config['PUBLIC_CACHE_MAX_AGE'] or None)
+
+@app.cli.command('export-static')
+def export_static_command():
+    """Render every public page to STATIC_EXPORT_DIR."""
+    for endpoint in static_export.build():
+        print(f"{EXPORTED_PAGES[endpoint][0]} -> {static_export.path_for(endpoint)}")
+
+# ============ FIRESTORE COST ACCOUNTING ============
+from utils.cost_accounting import parse_budgets
+
+read_budgets = parse_budgets(app.config['FIRESTORE_READ_BUDGETS'])
+
+@app.after_request
+def account_firestore_costs(response):
+    """Attribute this request's Firestore usage to its route and check the read budget."""
+    if firebase is None or request.endpoint in (None, 'static') or g.get('rendering_static_export'):
+        # Export renders aren't visitor requests; their reads go to '(static export)'
+        return response
+    usage = firebase.costs.end_request(request.endpoint, read_budgets,
+                                       app.config['FIRESTORE_DEFAULT_READ_BUDGET'])
+    if usage and session.get('logged_in'):
+        response.headers['X-Firestore-Reads'] = str(usage['reads'])
+    firebase.costs.maybe_log_summary(app.config['COST_SUMMARY_INTERVAL'])
+    return response
+
 # ============ DECORATORS ============
 
 def login_required(f):
@@ -81,11 +481,17 @@ def allowed_file(filename):
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    return jsonify({
+    response = jsonify({
         "status": "ok",
         "firebase_connected": firebase is not None,
-        "templates_exist": os.path.exists(app.template_folder)
-    }), 200
+        "templates_exist": os.path.exists(app.template_folder),
+        "single_flight": firebase.single_flight.snapshot() if firebase else None,
+        "cache": firebase.cache.snapshot() if firebase else None,
+        "write_queue": write_queue.counts() if write_queue else None,
+        "firestore_breaker": firebase.breaker.snapshot() if firebase else None
+    })
+    response.cache_control.no_store = True
+    return response
 
 # ============ PUBLIC ROUTES ============
 
@@ -111,7 +517,7 @@ def index():
             print(f"[ERROR] Failed to fetch home page data: {e}", file=sys.stderr)
             import traceback
             traceback.print_exc()
-            flash('Unable to load some data. Please try again later.', 'warning')
+            public_notice('Unable to load some data. Please try again later.', 'warning')
     else:
         print("[WARNING] Firebase not available, using default settings", file=sys.stderr)
         # Default values when Firebase is not available
@@ -124,19 +530,37 @@ def index():
 
 @app.route('/calendar')
 def calendar():
-    """Classes calendar page"""
+    """Classes calendar page, in date order.
+
+    ?view=week|month (around ?start=YYYY-MM-DD, default today), ?view=upcoming&n=10
+    for the next n sessions, or everything by default.
+    """
+    view = request.args.get('view', 'all')
+    if view not in CALENDAR_VIEWS:
+        view = 'all'
+    count = min(max(request.args.get('n', 10, type=int), 1), MAX_UPCOMING_SESSIONS)
+    anchor = request.args.get('start')
     classes = []
     settings = {}
+    window_start = window_end = None
     
     if firebase:
         try:
-            classes = firebase.get_all_classes()
+            classes, window_start, window_end = calendar_index.window(view, anchor, count)
             settings = firebase.get_settings()
         except Exception as e:
             print(f"[ERROR] Failed to fetch calendar data: {e}", file=sys.stderr)
-            flash('Error loading calendar data.', 'danger')
+            public_notice('Error loading calendar data.', 'danger')
+    
+    window_last = previous_start = next_start = None
+    if window_start is not None:
+        window_last = window_end - timedelta(days=1)
+        previous_start = (window_start - timedelta(days=1)).isoformat()
+        next_start = window_end.isoformat()
     
-    return render_template('calendar.html', classes=classes, settings=settings)
+    return render_template('calendar.html', classes=classes, settings=settings, view=view, count=count,
+                           window_start=window_start, window_last=window_last,
+                           previous_start=previous_start, next_start=next_start)
 
 @app.route('/materials')
 def materials():
@@ -148,7 +572,7 @@ def materials():
             materials_list = firebase.get_all_materials()
         except Exception as e:
             print(f"[ERROR] Failed to fetch materials: {e}", file=sys.stderr)
-            flash('Error loading materials.', 'danger')
+            public_notice('Error loading materials.', 'danger')
     
     return render_template('materials.html', materials=materials_list)
 
@@ -160,11 +584,11 @@ def camps():
     
     if firebase:
         try:
-            camps_list = firebase.get_all_camps()
+            camps_list = calendar_index.all('camps')
             settings = firebase.get_settings()
         except Exception as e:
             print(f"[ERROR] Error fetching camps: {e}", file=sys.stderr)
-            flash('Error loading camps. Please try again later.', 'danger')
+            public_notice('Error loading camps. Please try again later.', 'danger')
     
     return render_template('camps.html', camps=camps_list, settings=settings)
 
@@ -186,6 +610,147 @@ def about():
     """About Us page"""
     return render_template('about.html')
 
+def _search_params():
+    """Read query, page and collection filter from the query string."""
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int) or 1
+    collection = request.args.get('type') or None
+    return query, max(page, 1), collection
+
+def _search_result_url(result):
+    """Where a search hit should link to."""
+    if result['collection'] == 'materials':
+        return result['file_url'] or url_for('materials')
+    if result['collection'] == 'classes':
+        return url_for('calendar')
+    return url_for('index')
+
+def _search(query, page, per_page, collection):
+    """Search the index after catching up with writes made by any worker."""
+    try:
+        search_index.ensure_current()
+    except Exception as e:
+        print(f"[WARNING] Search index refresh failed; searching the previous index: {e}", file=sys.stderr)
+    return search_index.search(query, page=page, per_page=per_page, collection=collection)
+
+@app.route('/search')
+def search():
+    """Search materials, classes and announcements"""
+    query, page, collection = _search_params()
+    per_page = app.config['SEARCH_RESULTS_PER_PAGE']
+    results, total = _search(query, page, per_page, collection)
+    for result in results:
+        result['url'] = _search_result_url(result)
+    pages = (total + per_page - 1) // per_page
+    return render_template('search.html', query=query, results=results, total=total,
+                           page=page, pages=pages, collection=collection)
+
+@app.route('/api/search')
+def api_search():
+    """JSON search endpoint"""
+    query, page, collection = _search_params()
+    per_page = request.args.get('per_page', app.config['SEARCH_RESULTS_PER_PAGE'], type=int)
+    per_page = max(1, min(per_page or 1, 50))
+    results, total = _search(query, page, per_page, collection)
+    for result in results:
+        result['url'] = _search_result_url(result)
+    return jsonify({'query': query, 'page': page, 'per_page': per_page,
+                    'total': total, 'results': results})
+
+def _ics_response(feed_name):
+    """Serve a precomputed .ics feed with its ETag."""
+    try:
+        feed = ics_feeds.get(feed_name)
+    except Exception as e:
+        print(f"[ERROR] Failed to build calendar feeds: {e}", file=sys.stderr)
+        return 'Calendar feed temporarily unavailable', 503
+    if feed is None:
+        return 'Calendar feed not found', 404
+    body, etag = feed
+    response = Response(body, mimetype='text/calendar')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['ICS_MAX_AGE']
+    response.headers['Content-Disposition'] = f'inline; filename="nie-{feed_name}.ics"'
+    return response.make_conditional(request)
+
+@app.route('/calendar.ics')
+def calendar_feed():
+    """Subscribable feed of all classes and camps"""
+    return _ics_response('all')
+
+@app.route('/calendar/<class_type>.ics')
+def class_type_feed(class_type):
+    """Feed of one class type (regular, weekend, crossnight), or all classes"""
+    return _ics_response('classes' if class_type == 'all' else f'classes-{class_type}')
+
+@app.route('/camps.ics')
+def camps_feed():
+    """Feed of camps"""
+    return _ics_response('camps')
+
+# ============ JSON API ============
+
+def _json_default(value):
+    """Serialize Firestore timestamps and anything else json can't handle."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _api_response(collection, loader, variant=''):
+    """Serve a collection as compact JSON with a version ETag.
+
+    A matching If-None-Match returns 304 before Firestore is touched. Fallback
+    data served while Firestore is failing gets no ETag and isn't stored, so
+    clients fetch the real data once it recovers.
+    """
+    if firebase is None:
+        return jsonify({'error': 'Database connection is not available.'}), 503
+
+    etag = collection_versions.etag(collection, variant)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        with firebase.breaker.watch() as reads:
+            data = loader()
+        body = json.dumps({'version': collection_versions.get(collection), 'data': data},
+                          separators=(',', ':'), default=_json_default)
+        response = Response(body, mimetype='application/json')
+        if reads.degraded:
+            response.cache_control.no_store = True
+            return response
+    response.set_etag(etag, weak=True)
+    response.cache_control.no_cache = True
+    return response
+
+@app.route('/api/v1/classes')
+def api_classes():
+    """All classes as JSON"""
+    return _api_response('classes', lambda: firebase.get_all_classes())
+
+@app.route('/api/v1/camps')
+def api_camps():
+    """All camps as JSON"""
+    return _api_response('camps', lambda: firebase.get_all_camps())
+
+@app.route('/api/v1/materials')
+def api_materials():
+    """All study materials as JSON"""
+    return _api_response('materials', lambda: firebase.get_all_materials())
+
+@app.route('/api/v1/announcements')
+def api_announcements():
+    """Recent announcements as JSON"""
+    limit = max(1, min(request.args.get('limit', 5, type=int) or 5, 50))
+    return _api_response('announcements',
+                         lambda: firebase.get_announcements(limit=limit),
+                         variant=f'limit{limit}')
+
+@app.route('/api/v1/settings')
+def api_settings():
+    """Website settings as JSON"""
+    return _api_response('settings', lambda: firebase.get_settings())
+
 # ============ ADMIN ROUTES ============
 
 @app.route('/admin/login', methods=['GET', 'POST'])
@@ -212,43 +777,102 @@ def admin_logout():
     flash('You have been logged out.', 'info')
     return redirect(url_for('index'))
 
+from utils.site_snapshot import RECENT_ANNOUNCEMENTS
+
+# Dashboard tab -> collection whose writes invalidate its cached fragments
+ADMIN_SECTIONS = {
+    'classes': 'classes',
+    'camps': 'camps',
+    'materials': 'materials',
+    'announcements': 'announcements',
+    'settings': 'settings',
+}
+
 @app.route('/admin/dashboard')
 @login_required
 def admin_dashboard():
-    """Admin dashboard"""
+    """Admin dashboard shell; each tab loads its own section from admin_section"""
     if firebase is None:
         flash('Database connection unavailable. Cannot access admin dashboard.', 'danger')
         return redirect(url_for('index'))
     
-    classes = []
-    camps = []
-    materials = []
-    announcements = []
-    settings = {}
+    # The queue is a local file, so listing it costs no Firestore reads
+    queued_writes = write_queue.list() if write_queue is not None else []
+    return render_template('admin/dashboard.html', queued_writes=queued_writes)
+
+def _load_section_page(section, page, per_page):
+    """(items, has_more) for one page of a dashboard section"""
+    if section == 'announcements':
+        # Only read as far as this page (plus one to know if there is another)
+        announcements = firebase.get_announcements(limit=page * per_page + 1)
+        return announcements[(page - 1) * per_page:page * per_page], len(announcements) > page * per_page
+    items = {
+        'classes': firebase.get_all_classes,
+        'camps': firebase.get_all_camps,
+        'materials': firebase.get_all_materials,
+    }[section]()
+    return items[(page - 1) * per_page:page * per_page], len(items) > page * per_page
+
+def _render_section(section, page):
+    per_page = app.config['ADMIN_SECTION_PAGE_SIZE']
+    if section == 'announcements':
+        # Keep the first page's read (page size + 1) within the snapshot's recent announcements
+        per_page = min(per_page, RECENT_ANNOUNCEMENTS - 1)
+    if section == 'settings':
+        return render_template('admin/sections/settings.html', settings=firebase.get_settings())
+    items, has_more = _load_section_page(section, page, per_page)
+    return render_template(f'admin/sections/{section}.html', section=section, items=items,
+                           page=page, has_more=has_more, per_page=per_page)
+
+@app.route('/admin/sections/<section>')
+@login_required
+@firebase_required
+def admin_section(section):
+    """One dashboard tab as an HTML fragment, cached per section and page"""
+    if section not in ADMIN_SECTIONS:
+        return 'Unknown section', 404
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
+    started = time.perf_counter()
+    collection = ADMIN_SECTIONS[section]
+    key = f'admin-section:{section}:{page}'
     
-    try:
-        classes = firebase.get_all_classes()
-        camps = firebase.get_all_camps()
-        materials = firebase.get_all_materials()
-        announcements = firebase.get_announcements(limit=10)
-        settings = firebase.get_settings()
-        
-        print(f"[DEBUG] Dashboard loaded with {len(announcements)} announcements", file=sys.stderr)
-    except Exception as e:
-        print(f"[ERROR] Failed to fetch dashboard data: {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc()
-        flash('Error loading dashboard data.', 'danger')
+    # Cached alongside the collection's reads, so any write to it drops the fragment too
+    html = firebase.cache.get(collection, key)
+    cache_status = 'hit'
+    if html is MISS:
+        cache_status = 'miss'
+        version = firebase.cache.get_version(collection)
+        try:
+            with firebase.breaker.watch() as reads:
+                html = _render_section(section, page)
+        except Exception as e:
+            print(f"[ERROR] Failed to load dashboard section {section}: {e}", file=sys.stderr)
+            return render_template('admin/sections/error.html', section=section), 503
+        if reads.degraded:
+            # Shown, but not kept: it may be last-good or empty data from the breaker
+            cache_status = 'fallback'
+        else:
+            firebase.cache.set(collection, key, html, version)
     
-    return render_template('admin/dashboard.html', 
-                         classes=classes, 
-                         camps=camps, 
-                         materials=materials,
-                         announcements=announcements,
-                         settings=settings)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"[DEBUG] Dashboard section {section} page {page}: {elapsed_ms:.1f}ms (cache {cache_status})",
+          file=sys.stderr)
+    response = Response(html, mimetype='text/html')
+    response.headers['Server-Timing'] = f'{section};desc="cache {cache_status}";dur={elapsed_ms:.1f}'
+    return response
 
 # ============ ADMIN API ROUTES ============
 
+@app.route('/admin/api/firestore_costs')
+@login_required
+@firebase_required
+def firestore_costs():
+    """Firestore reads/writes/deletes/bytes per route since startup"""
+    report = firebase.costs.report()
+    report['read_budgets'] = read_budgets
+    report['default_read_budget'] = app.config['FIRESTORE_DEFAULT_READ_BUDGET']
+    return jsonify(report)
+
 @app.route('/admin/api/add_class', methods=['POST'])
 @login_required
 @firebase_required
@@ -263,7 +887,7 @@ def add_class():
             'duration': request.form.get('duration'),
             'type': request.form.get('type', 'regular')
         }
-        firebase.add_class(class_data)
+        queue_write('classes', 'add', class_data)
         flash('Class added successfully!', 'success')
     except Exception as e:
         print(f"[ERROR] Failed to add class: {e}", file=sys.stderr)
@@ -280,7 +904,7 @@ def delete_class(class_id):
         return redirect(url_for('admin_dashboard'))
     
     try:
-        firebase.delete_class(class_id)
+        queue_write('classes', 'delete', doc_id=class_id)
         flash('Class deleted successfully!', 'success')
     except Exception as e:
         print(f"[ERROR] Error deleting class: {e}", file=sys.stderr)
@@ -301,7 +925,7 @@ def add_camp():
             'location': request.form.get('location'),
             'price': request.form.get('price')
         }
-        firebase.add_camp(camp_data)
+        queue_write('camps', 'add', camp_data)
         flash('Camp added successfully!', 'success')
     except Exception as e:
         print(f"[ERROR] Failed to add camp: {e}", file=sys.stderr)
@@ -318,7 +942,7 @@ def delete_camp(camp_id):
         return redirect(url_for('admin_dashboard'))
     
     try:
-        firebase.delete_camp(camp_id)
+        queue_write('camps', 'delete', doc_id=camp_id)
         flash('Camp deleted successfully!', 'success')
     except Exception as e:
         print(f"[ERROR] Error deleting camp: {e}", file=sys.stderr)
@@ -339,7 +963,7 @@ def add_announcement():
         }
         
         print(f"[DEBUG] Adding announcement: {announcement_data}", file=sys.stderr)
-        result = firebase.add_announcement(announcement_data)
+        queue_write('announcements', 'add', firebase.stamp_announcement(announcement_data))
         print(f"[DEBUG] Announcement added successfully", file=sys.stderr)
         
         flash('Announcement added successfully!', 'success')
@@ -361,7 +985,7 @@ def delete_announcement(announcement_id):
     
     try:
         print(f"[DEBUG] Deleting announcement ID: {announcement_id}", file=sys.stderr)
-        firebase.delete_announcement(announcement_id)
+        queue_write('announcements', 'delete', doc_id=announcement_id)
         flash('Announcement deleted successfully!', 'success')
     except Exception as e:
         print(f"[ERROR] Error deleting announcement: {e}", file=sys.stderr)
@@ -406,6 +1030,106 @@ def upload_material():
     
     return redirect(url_for('admin_dashboard'))
 
+# Resumable uploads: create, then PUT chunks at their offsets, then finalize.
+# A client that loses its connection asks for the status and resumes from its offset.
+from utils.uploads import ResumableUploads, UploadError
+
+resumable_uploads = ResumableUploads(app.config['RESUMABLE_UPLOAD_FOLDER'],
+                                     max_size=app.config['RESUMABLE_UPLOAD_MAX_SIZE'],
+                                     chunk_size=app.config['RESUMABLE_CHUNK_SIZE'],
+                                     ttl=app.config['RESUMABLE_UPLOAD_TTL'])
+
+def _upload_error(e):
+    body = {'error': str(e)}
+    if e.offset is not None:
+        body['offset'] = e.offset
+    return jsonify(body), e.status
+
+@app.route('/admin/api/uploads', methods=['POST'])
+@login_required
+@firebase_required
+def create_upload():
+    """Start a resumable material upload (form fields as for upload_material, plus size and sha256)"""
+    filename = request.form.get('filename', '')
+    if not allowed_file(filename):
+        return jsonify({'error': 'Invalid file type'}), 400
+    material_data = {
+        'title': request.form.get('title'),
+        'description': request.form.get('description'),
+        'category': request.form.get('category', 'general'),
+        'grade': request.form.get('grade')
+    }
+    try:
+        status = resumable_uploads.create(filename, request.form.get('size', 0, type=int),
+                                          request.form.get('sha256'), material_data)
+    except UploadError as e:
+        return _upload_error(e)
+    return jsonify(status), 201
+
+@app.route('/admin/api/uploads/<upload_id>', methods=['GET'])
+@login_required
+def upload_status(upload_id):
+    """Bytes received so far for a resumable upload"""
+    try:
+        return jsonify(resumable_uploads.status(upload_id))
+    except UploadError as e:
+        return _upload_error(e)
+
+@app.route('/admin/api/uploads/<upload_id>', methods=['PUT'])
+@login_required
+def upload_chunk(upload_id):
+    """Append one chunk; the Upload-Offset and X-Chunk-SHA256 headers must match"""
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'Missing Upload-Offset header'}), 400
+    try:
+        new_offset = resumable_uploads.write_chunk(upload_id, offset, request.get_data(),
+                                                   request.headers.get('X-Chunk-SHA256'))
+    except UploadError as e:
+        return _upload_error(e)
+    return jsonify({'upload_id': upload_id, 'offset': new_offset})
+
+@app.route('/admin/api/uploads/<upload_id>', methods=['DELETE'])
+@login_required
+def discard_upload(upload_id):
+    """Abandon a resumable upload"""
+    try:
+        resumable_uploads.discard(upload_id)
+    except UploadError as e:
+        return _upload_error(e)
+    return '', 204
+
+@app.route('/admin/api/uploads/<upload_id>/finalize', methods=['POST'])
+@login_required
+@firebase_required
+def finalize_upload(upload_id):
+    """Move a complete upload into the upload folder and create its material"""
+    try:
+        part_path, meta = resumable_uploads.complete(upload_id)
+    except UploadError as e:
+        return _upload_error(e)
+
+    filename = firebase.material_filename(meta['filename'])
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    try:
+        # The move also makes a concurrent finalize of the same upload fail
+        shutil.move(part_path, file_path)
+    except FileNotFoundError:
+        return jsonify({'error': 'Upload is already being finalized.'}), 409
+
+    material_data = meta['metadata']
+    try:
+        doc_ref = firebase.add_material_record(material_data, filename)
+    except Exception as e:
+        print(f"[ERROR] Failed to create material for upload {upload_id}: {e}", file=sys.stderr)
+        # Put the file back so finalize can be retried
+        shutil.move(file_path, part_path)
+        return jsonify({'error': f'Error saving material: {str(e)}'}), 502
+
+    resumable_uploads.discard(upload_id)
+    flash('Material uploaded successfully!', 'success')
+    return jsonify({'id': doc_ref.id, 'file_url': material_data['file_url']}), 201
+
 @app.route('/admin/delete_material/<material_id>', methods=['POST'])
 @login_required
 @firebase_required
@@ -434,13 +1158,51 @@ def update_settings():
             'teacher_name': request.form.get('teacher_name'),
             'about': request.form.get('about')
         }
-        firebase.update_settings(settings_data)
+        queue_write('settings', 'update', settings_data, doc_id='default')
         flash('Settings updated successfully!', 'success')
     except Exception as e:
         print(f"[ERROR] Failed to update settings: {e}", file=sys.stderr)
         flash(f'Error updating settings: {str(e)}', 'danger')
     return redirect(url_for('admin_dashboard'))
 
+@app.route('/admin/api/retry_write/<op_id>', methods=['POST'])
+@login_required
+@firebase_required
+def retry_write(op_id):
+    """Put a failed queued write back in the queue"""
+    if write_queue is not None:
+        write_queue.retry(op_id)
+        flash('Write queued for another attempt.', 'info')
+    return redirect(url_for('admin_dashboard'))
+
+@app.route('/admin/api/discard_write/<op_id>', methods=['POST'])
+@login_required
+@firebase_required
+def discard_write(op_id):
+    """Drop a failed queued write"""
+    if write_queue is not None:
+        write_queue.discard(op_id)
+        flash('Failed write discarded.', 'info')
+    return redirect(url_for('admin_dashboard'))
+
+@app.route('/admin/profiles')
+@login_required
+def admin_profiles():
+    """Stored request profiles, newest first"""
+    return render_template('admin/profiles.html', profiles=profile_store.list(),
+                           max_stored=app.config['PROFILE_MAX_STORED'],
+                           sample_rate=app.config['PROFILE_SAMPLE_RATE'])
+
+@app.route('/admin/profiles/<profile_id>.folded')
+@login_required
+def download_profile(profile_id):
+    """A profile as collapsed stacks, for flamegraph.pl, speedscope or inferno"""
+    collapsed = profile_store.collapsed(profile_id)
+    if collapsed is None:
+        return 'Not found', 404
+    return Response(collapsed, mimetype='text/plain',
+                    headers={'Content-Disposition': f'attachment; filename=profile-{profile_id}.folded'})
+
 # ============ ERROR HANDLERS ============
 
 @app.errorhandler(404)
@@ -452,6 +1214,44 @@ def server_error(error):
     print(f"[ERROR] 500 error: {error}", file=sys.stderr)
     return render_template('500.html'), 500
 
+# ============ WARMUP ============
+
+def warm_up():
+    """Prime a worker before it takes traffic: Firestore client, read caches, templates, static files.
+
+    Called by gunicorn.conf.py in each worker after fork; safe to call more than once.
+    """
+    started = datetime.now()
+    if write_queue is not None:
+        write_queue.ensure_running()
+    if firebase:
+        firebase.cache.ensure_subscribed()
+    if firebase:
+        try:
+            # Same reads the public pages make, so the first visitors hit a warm cache
+            firebase.get_settings()
+            firebase.get_announcements(limit=5)
+            firebase.get_all_classes()
+            firebase.get_all_camps()
+            firebase.get_all_materials()
+            ics_feeds.get('all')
+        except Exception as e:
+            print(f"[WARNING] Warmup could not prime Firestore: {e}", file=sys.stderr)
+
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(name)
+
+    if app.config['STATIC_EXPORT_ENABLED']:
+        static_export.refresh()
+
+    resumable_uploads.cleanup()
+
+    if app.config['COMPRESS_RESPONSES']:
+        static_compression.warm(app.static_folder)
+
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"[INIT] Worker {os.getpid()} warmed up in {elapsed:.2f}s", file=sys.stderr)
+
 # ============ MAIN ============
 
 if __name__ == '__main__':
@@ -0,0 +1,74 @@
+"""Gunicorn settings for production.
+
+Run with:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is imported once in the master (preload_app) so workers share its
+memory copy-on-write; each worker then reconnects Firestore/Redis and runs
+app.warm_up() before it accepts requests.
+
+Environment:
+    WEB_WORKLOAD      'threaded' (gthread, default) or 'async' (gevent)
+    WEB_CONCURRENCY   number of worker processes (default 2 x CPUs + 1); with more
+                      than one, CACHE_BACKEND defaults to redis and 'local' is refused,
+                      so the app won't start without a Redis server at REDIS_URL.
+                      Set WEB_CONCURRENCY=1 to run without Redis
+    WEB_THREADS       threads per gthread worker (default 4)
+    PORT              port to bind (default 8000)
+
+Zero-downtime reloads: with preload_app the code lives in the master, so a
+plain HUP only restarts workers on the same code. To deploy new code send
+USR2 to the master (it starts a new master + workers alongside the old one),
+then WINCH followed by TERM to the old master once the new one is up.
+Workers are also recycled gradually (max_requests + jitter) and get
+graceful_timeout seconds to finish in-flight requests when stopping.
+"""
+import multiprocessing
+import os
+import sys
+
+workload = os.environ.get('WEB_WORKLOAD', 'threaded')
+
+if workload == 'async':
+    try:
+        # Patch before the app (and its locks/sockets) is preloaded
+        from gevent import monkey
+        monkey.patch_all()
+        worker_class = 'gevent'
+        worker_connections = int(os.environ.get('WEB_CONNECTIONS', 1000))
+    except ImportError:
+        print("[WARNING] WEB_WORKLOAD=async needs gevent; falling back to threaded workers", file=sys.stderr)
+        workload = 'threaded'
+
+if workload != 'async':
+    worker_class = 'gthread'
+    threads = int(os.environ.get('WEB_THREADS', 4))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Read by the preloaded app: several workers need the shared (Redis) cache
+os.environ['WEB_WORKERS'] = str(workers)
+preload_app = True
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Give the new worker its own Firestore client and cache connections."""
+    from wsgi import firebase
+    if firebase is not None:
+        firebase.after_fork()
+
+
+def post_worker_init(worker):
+    """Warm caches and templates before the worker starts accepting connections."""
+    from wsgi import warm_up
+    warm_up()
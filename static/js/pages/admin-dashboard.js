@@ -0,0 +1,67 @@
+// Dashboard tabs are loaded on demand: the shell renders without touching the
+// database, and each section is fetched the first time its tab is shown.
+(function () {
+    const sections = document.querySelectorAll('.admin-section[data-url]');
+    if (!sections.length || !window.fetch) {
+        return;
+    }
+
+    function showError(container, message) {
+        container.innerHTML = '<div class="alert alert-danger">' + message +
+            ' <a href="#" class="alert-link" data-section-retry>Try again</a></div>';
+    }
+
+    async function load(container, url) {
+        container.dataset.loaded = 'loading';
+        container.setAttribute('aria-busy', 'true');
+        try {
+            const response = await fetch(url, {
+                credentials: 'same-origin',
+                headers: { 'X-Requested-With': 'fetch' }
+            });
+            if (response.redirected && response.url.indexOf('/admin/login') !== -1) {
+                window.location.href = response.url;
+                return;
+            }
+            container.innerHTML = await response.text();
+            container.dataset.url = url;
+            container.dataset.loaded = response.ok ? 'true' : '';
+        } catch (err) {
+            showError(container, 'Could not reach the server.');
+            container.dataset.loaded = '';
+        }
+        container.removeAttribute('aria-busy');
+    }
+
+    function loadTab(pane) {
+        const container = pane && pane.querySelector('.admin-section[data-url]');
+        if (container && !container.dataset.loaded) {
+            load(container, container.dataset.url);
+        }
+    }
+
+    // Open the tab named in the URL (e.g. after a form redirect to #materials)
+    const linked = location.hash && document.querySelector(`.nav-tabs a[href="${location.hash}"]`);
+    if (linked && window.bootstrap) {
+        bootstrap.Tab.getOrCreateInstance(linked).show();
+    }
+
+    document.querySelectorAll('.nav-tabs a[data-bs-toggle="tab"]').forEach(function (tab) {
+        tab.addEventListener('shown.bs.tab', function (e) {
+            history.replaceState(null, '', e.target.getAttribute('href'));
+            loadTab(document.querySelector(e.target.getAttribute('href')));
+        });
+    });
+    loadTab(document.querySelector('.tab-pane.active'));
+
+    // Pager links and retry buttons inside a section reload just that section
+    document.addEventListener('click', function (e) {
+        const link = e.target.closest('.admin-section [data-section-page], .admin-section [data-section-retry]');
+        if (!link) {
+            return;
+        }
+        e.preventDefault();
+        const container = link.closest('.admin-section');
+        load(container, link.hasAttribute('data-section-page') ? link.href : container.dataset.url);
+    });
+})();
@@ -0,0 +1,128 @@
+// Resumable material uploads: the file goes up in checksummed chunks, and a
+// dropped connection resumes from the last byte the server confirmed.
+// Browsers without fetch or crypto.subtle (plain http) submit the form as before.
+(function () {
+    const form = document.getElementById('uploadMaterialForm');
+    if (!form || !window.fetch || !window.crypto || !window.crypto.subtle) {
+        return;
+    }
+
+    const progress = document.getElementById('uploadProgress');
+    const progressBar = progress.querySelector('.progress-bar');
+    const statusText = document.getElementById('uploadStatus');
+    const submitButton = form.querySelector('button[type="submit"]');
+    const MAX_RETRIES = 8;
+    const STORAGE_KEY = 'resumableUpload';
+
+    function toHex(buffer) {
+        return Array.from(new Uint8Array(buffer))
+            .map(b => b.toString(16).padStart(2, '0'))
+            .join('');
+    }
+
+    async function sha256(blob) {
+        return toHex(await crypto.subtle.digest('SHA-256', await blob.arrayBuffer()));
+    }
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    function showProgress(offset, size) {
+        const percent = size ? Math.floor(offset * 100 / size) : 0;
+        progressBar.style.width = percent + '%';
+        progressBar.textContent = percent + '%';
+    }
+
+    async function request(url, options) {
+        const response = await fetch(url, Object.assign({ credentials: 'same-origin' }, options));
+        const body = response.status === 204 ? {} : await response.json();
+        return { status: response.status, body: body };
+    }
+
+    // Reuse an unfinished upload of the same file (e.g. after a page reload)
+    async function startOrResume(file, fileHash) {
+        const saved = JSON.parse(localStorage.getItem(STORAGE_KEY) || 'null');
+        if (saved && saved.hash === fileHash && saved.size === file.size) {
+            const status = await request(`/admin/api/uploads/${saved.id}`, { method: 'GET' });
+            if (status.status === 200) {
+                return status.body;
+            }
+        }
+        const data = new FormData(form);
+        data.delete('file');
+        data.append('filename', file.name);
+        data.append('size', file.size);
+        data.append('sha256', fileHash);
+        const created = await request('/admin/api/uploads', { method: 'POST', body: data });
+        if (created.status !== 201) {
+            throw new Error(created.body.error || 'Could not start upload');
+        }
+        localStorage.setItem(STORAGE_KEY, JSON.stringify({ id: created.body.upload_id, hash: fileHash, size: file.size }));
+        return created.body;
+    }
+
+    async function sendChunks(file, upload) {
+        let offset = upload.offset;
+        let retries = 0;
+        while (offset < file.size) {
+            const chunk = file.slice(offset, offset + upload.chunk_size);
+            try {
+                const result = await request(`/admin/api/uploads/${upload.upload_id}`, {
+                    method: 'PUT',
+                    headers: { 'Upload-Offset': String(offset), 'X-Chunk-SHA256': await sha256(chunk) },
+                    body: chunk
+                });
+                if (result.status === 200 || result.status === 409) {
+                    // 409: the server has a different offset (e.g. a lost response); continue from there
+                    offset = result.body.offset;
+                    retries = 0;
+                } else if (result.status !== 422 || ++retries > MAX_RETRIES) {
+                    // 422: the chunk was damaged on the way; send it again
+                    throw new Error(result.body.error || 'Upload failed');
+                }
+            } catch (err) {
+                if (!(err instanceof TypeError) || ++retries > MAX_RETRIES) {
+                    throw err;
+                }
+                // Network error: back off, then ask the server where to resume
+                statusText.textContent = 'Connection lost, retrying…';
+                await sleep(Math.min(1000 * 2 ** retries, 30000));
+                const status = await request(`/admin/api/uploads/${upload.upload_id}`, { method: 'GET' })
+                    .catch(() => null);
+                if (status && status.status === 200) {
+                    offset = status.body.offset;
+                }
+            }
+            statusText.textContent = 'Uploading…';
+            showProgress(offset, file.size);
+        }
+    }
+
+    form.addEventListener('submit', async function (e) {
+        const file = form.querySelector('input[name="file"]').files[0];
+        if (!file) {
+            return;
+        }
+        e.preventDefault();
+        submitButton.disabled = true;
+        progress.classList.remove('d-none');
+        statusText.textContent = 'Preparing…';
+        try {
+            const fileHash = await sha256(file);
+            const upload = await startOrResume(file, fileHash);
+            showProgress(upload.offset, file.size);
+            await sendChunks(file, upload);
+            statusText.textContent = 'Saving…';
+            const done = await request(`/admin/api/uploads/${upload.upload_id}/finalize`, { method: 'POST' });
+            if (done.status !== 201) {
+                throw new Error(done.body.error || 'Could not save material');
+            }
+            localStorage.removeItem(STORAGE_KEY);
+            window.location.reload();
+        } catch (err) {
+            statusText.textContent = 'Upload failed: ' + err.message + '. Submit again to resume.';
+            submitButton.disabled = false;
+        }
+    });
+})();
@@ -0,0 +1,56 @@
+// Find the next crossnight class
+function findNextCrossnight() {
+    const cards = document.querySelectorAll('.class-card');
+    let nextCrossnight = null;
+    let closestTime = Infinity;
+
+    cards.forEach(card => {
+        const type = card.getAttribute('data-type');
+        if (type === 'crossnight') {
+            const dateStr = card.getAttribute('data-date');
+            const timeStr = card.getAttribute('data-time');
+            
+            // Parse the date and time
+            const classDateTime = new Date(dateStr + ' ' + timeStr);
+            const now = new Date();
+            const timeDiff = classDateTime - now;
+
+            // Only consider future crossnights
+            if (timeDiff > 0 && timeDiff < closestTime) {
+                closestTime = timeDiff;
+                nextCrossnight = classDateTime;
+            }
+        }
+    });
+
+    return nextCrossnight;
+}
+
+// Update countdown timer
+function updateCountdown(targetDate) {
+    const now = new Date().getTime();
+    const distance = targetDate - now;
+
+    if (distance < 0) {
+        document.getElementById('countdownSection').style.display = 'none';
+        return;
+    }
+
+    const days = Math.floor(distance / (1000 * 60 * 60 * 24));
+    const hours = Math.floor((distance % (1000 * 60 * 60 * 24)) / (1000 * 60 * 60));
+    const minutes = Math.floor((distance % (1000 * 60 * 60)) / (1000 * 60));
+    const seconds = Math.floor((distance % (1000 * 60)) / 1000);
+
+    document.getElementById('days').textContent = String(days).padStart(2, '0');
+    document.getElementById('hours').textContent = String(hours).padStart(2, '0');
+    document.getElementById('minutes').textContent = String(minutes).padStart(2, '0');
+    document.getElementById('seconds').textContent = String(seconds).padStart(2, '0');
+}
+
+// Initialize countdown
+const nextCrossnight = findNextCrossnight();
+if (nextCrossnight) {
+    document.getElementById('countdownSection').style.display = 'block';
+    updateCountdown(nextCrossnight);
+    setInterval(() => updateCountdown(nextCrossnight), 1000);
+}
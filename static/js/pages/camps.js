@@ -0,0 +1,53 @@
+// Find the next upcoming camp
+function findNextCamp() {
+    const cards = document.querySelectorAll('.camp-card');
+    let nextCamp = null;
+    let closestTime = Infinity;
+
+    cards.forEach(card => {
+        const startDateStr = card.getAttribute('data-start-date');
+        const startTimeStr = card.getAttribute('data-start-time') || '09:00';
+        
+        // Parse the start date and time
+        const campStartDate = new Date(startDateStr + ' ' + startTimeStr);
+        const now = new Date();
+        const timeDiff = campStartDate - now;
+
+        // Only consider future camps
+        if (timeDiff > 0 && timeDiff < closestTime) {
+            closestTime = timeDiff;
+            nextCamp = campStartDate;
+        }
+    });
+
+    return nextCamp;
+}
+
+// Update countdown timer
+function updateCountdown(targetDate) {
+    const now = new Date().getTime();
+    const distance = targetDate - now;
+
+    if (distance < 0) {
+        document.getElementById('countdownSection').style.display = 'none';
+        return;
+    }
+
+    const days = Math.floor(distance / (1000 * 60 * 60 * 24));
+    const hours = Math.floor((distance % (1000 * 60 * 60 * 24)) / (1000 * 60 * 60));
+    const minutes = Math.floor((distance % (1000 * 60 * 60)) / (1000 * 60));
+    const seconds = Math.floor((distance % (1000 * 60)) / 1000);
+
+    document.getElementById('days').textContent = String(days).padStart(2, '0');
+    document.getElementById('hours').textContent = String(hours).padStart(2, '0');
+    document.getElementById('minutes').textContent = String(minutes).padStart(2, '0');
+    document.getElementById('seconds').textContent = String(seconds).padStart(2, '0');
+}
+
+// Initialize countdown
+const nextCamp = findNextCamp();
+if (nextCamp) {
+    document.getElementById('countdownSection').style.display = 'block';
+    updateCountdown(nextCamp);
+    setInterval(() => updateCountdown(nextCamp), 1000);
+}
@@ -0,0 +1,5 @@
+document.getElementById('contactForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+    alert('Thank you for your message! We will get back to you soon. For immediate assistance, please contact us via WhatsApp.');
+    this.reset();
+});
@@ -0,0 +1,62 @@
+let currentGrade = 'all';
+let currentCategory = 'all';
+
+function filterByGrade(grade) {
+    currentGrade = grade;
+    
+    // Update active grade button
+    const gradeButtons = document.querySelectorAll('.grade-button');
+    gradeButtons.forEach(btn => btn.classList.remove('active'));
+    event.target.classList.add('active');
+    
+    applyFilters();
+}
+
+function filterByCategory(category) {
+    currentCategory = category;
+    
+    // Update active category button
+    const categoryButtons = document.querySelectorAll('.tab-button');
+    categoryButtons.forEach(btn => btn.classList.remove('active'));
+    event.target.classList.add('active');
+    
+    applyFilters();
+}
+
+function applyFilters() {
+    const cards = document.querySelectorAll('.material-card');
+    const noResultsMessage = document.getElementById('noResultsMessage');
+    let visibleCount = 0;
+
+    cards.forEach(card => {
+        const cardCategory = card.getAttribute('data-category');
+        const cardGrade = card.getAttribute('data-grade');
+        
+        let showCard = true;
+
+        // Check category filter
+        if (currentCategory !== 'all' && cardCategory !== currentCategory) {
+            showCard = false;
+        }
+
+        // Check grade filter
+        if (currentGrade !== 'all' && cardGrade !== currentGrade) {
+            showCard = false;
+        }
+
+        // Show or hide card
+        if (showCard) {
+            card.classList.remove('hidden');
+            visibleCount++;
+        } else {
+            card.classList.add('hidden');
+        }
+    });
+
+    // Show/hide no results message
+    if (visibleCount === 0) {
+        noResultsMessage.style.display = 'block';
+    } else {
+        noResultsMessage.style.display = 'none';
+    }
+}
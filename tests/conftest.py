@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# app.py reads its configuration at import; point everything it writes at a scratch
+# directory and leave Firebase unconfigured (tests swap in tests/fakes.FakeFirebase)
+_scratch = tempfile.mkdtemp(prefix='nie-tests-')
+os.environ.pop('FIREBASE_CREDENTIALS_BASE64', None)
+os.environ['FIREBASE_CREDENTIALS'] = os.path.join(_scratch, 'missing-credentials.json')
+os.environ.setdefault('CACHE_BACKEND', 'local')
+os.environ['WEB_WORKERS'] = '1'
+for name, default in [('SEARCH_INDEX_PATH', 'search_index.json'), ('WRITE_QUEUE_PATH', 'write_queue.sqlite3'),
+                      ('STATIC_EXPORT_DIR', 'site'), ('PROFILE_DIR', 'profiles'),
+                      ('RESUMABLE_UPLOAD_FOLDER', 'partial_uploads')]:
+    os.environ[name] = os.path.join(_scratch, default)
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app
+    app.app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def fake_firebase(app_module, monkeypatch):
+    """A FakeFirebase installed as the app's Firestore connection."""
+    from fakes import FakeFirebase
+    from utils.calendar_index import CalendarIndex
+    from utils.ical import IcsFeeds
+    from utils.search_index import SearchIndex
+    from utils.versions import CollectionVersions
+
+    fake = FakeFirebase()
+    monkeypatch.setattr(app_module, 'firebase', fake)
+    monkeypatch.setattr(app_module, 'collection_versions', CollectionVersions(fake.cache))
+    monkeypatch.setattr(app_module, 'calendar_index', CalendarIndex(fake))
+    fake.add_listener(app_module.calendar_index.on_write)
+    monkeypatch.setattr(app_module, 'ics_feeds', IcsFeeds(fake))
+    monkeypatch.setattr(app_module, 'search_index', SearchIndex(
+        os.path.join(tempfile.mkdtemp(dir=_scratch), 'search_index.json'), firebase=fake))
+    fake.add_listener(app_module.search_index.on_write)
+    return fake
+
+
+@pytest.fixture
+def admin_client(app_module):
+    client = app_module.app.test_client()
+    with client.session_transaction('/admin/dashboard') as session:
+        session['logged_in'] = True
+        session['username'] = 'admin'
+    return client
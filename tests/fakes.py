@@ -0,0 +1,122 @@
+"""Stand-ins for FirebaseManager in tests: same read decorators and cache, data in dicts."""
+from utils.cache import LocalCache, cached
+from utils.circuit_breaker import CircuitBreaker, fails_fast_to
+from utils.cost_accounting import CostTracker
+from utils.single_flight import SingleFlight
+from utils.write_queue import with_pending_writes
+
+
+class FakeFirebase:
+    """The FirebaseManager surface the app's helpers use, backed by in-memory collections.
+
+    Reads go through the real write queue, circuit breaker and cache decorators;
+    set `down` to make every Firestore call fail.
+    """
+
+    def __init__(self, **collections):
+        self.data = {name: dict(docs) for name, docs in collections.items()}
+        self.settings = {}
+        self.cache = LocalCache()
+        self.breaker = CircuitBreaker('firestore', failure_threshold=1, reset_timeout=60)
+        self.last_good = {}
+        self.single_flight = SingleFlight()
+        self.costs = CostTracker()
+        self.pending_writes = None
+        self.down = False
+        self.reads = 0
+        self.applied = []
+        self.fail_apply = None
+        self.failing_docs = set()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def _call(self, fn):
+        with self.breaker.guard():
+            if self.down:
+                raise RuntimeError('Firestore unavailable')
+            self.reads += 1
+            self.costs.record('reads')
+            return fn()
+
+    def _documents(self, collection):
+        return [dict(data, id=doc_id) for doc_id, data in sorted(self.data.get(collection, {}).items())]
+
+    def trip(self):
+        """Open the breaker by failing one call."""
+        self.down = True
+        try:
+            self._call(lambda: None)
+        except RuntimeError:
+            pass
+
+    # ---------- reads ----------
+
+    @with_pending_writes('classes')
+    @fails_fast_to(list)
+    @cached('classes')
+    def get_all_classes(self):
+        return self._call(lambda: self._documents('classes'))
+
+    @with_pending_writes('camps')
+    @fails_fast_to(list)
+    @cached('camps')
+    def get_all_camps(self):
+        return self._call(lambda: self._documents('camps'))
+
+    @with_pending_writes('materials')
+    @fails_fast_to(list)
+    @cached('materials')
+    def get_all_materials(self):
+        return self._call(lambda: self._documents('materials'))
+
+    @with_pending_writes('announcements')
+    @fails_fast_to(list)
+    @cached('announcements')
+    def get_announcements(self, limit=5):
+        self.announcement_limits = getattr(self, 'announcement_limits', []) + [limit]
+        return self._call(lambda: sorted(self._documents('announcements'),
+                                         key=lambda a: a.get('timestamp') or 0, reverse=True)[:limit])
+
+    @with_pending_writes('settings')
+    @fails_fast_to(dict)
+    @cached('settings')
+    def get_settings(self):
+        return self._call(lambda: dict(self.settings))
+
+    # ---------- writes ----------
+
+    def write(self, collection, action, doc_id, data=None, notify=True):
+        """Apply a write the way FirebaseManager._commit does: store, invalidate, notify."""
+        docs = self.data.setdefault(collection, {})
+        if action == 'delete':
+            docs.pop(doc_id, None)
+        elif action == 'update':
+            docs.setdefault(doc_id, {}).update(data or {})
+        else:
+            docs[doc_id] = dict(data or {})
+        if notify:
+            self._notify(collection, action, doc_id, data)
+        else:
+            self.cache.invalidate(collection)
+
+    def _notify(self, collection, action, doc_id, data=None):
+        self.cache.invalidate(collection)
+        for callback in self._listeners:
+            callback(collection, action, doc_id, data)
+
+    notify_queued = _notify
+
+    def apply_writes(self, ops):
+        """WriteQueue entry point."""
+        if self.fail_apply is not None:
+            raise self.fail_apply
+        if any(op['doc_id'] in self.failing_docs for op in ops):
+            raise RuntimeError('write rejected')
+        with self.breaker.guard():
+            if self.down:
+                raise RuntimeError('Firestore unavailable')
+        for op in ops:
+            self.applied.append((op['collection'], op['action'], op['doc_id'], op['data']))
+            self.write(op['collection'], op['action'], op['doc_id'], op['data'])
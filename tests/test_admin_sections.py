@@ -0,0 +1,35 @@
+from utils.site_snapshot import RECENT_ANNOUNCEMENTS
+
+
+def add_announcements(firebase, count):
+    firebase.data['announcements'] = {
+        f'a{i:02d}': {'title': f'Notice {i}', 'content': '', 'timestamp': i} for i in range(count)
+    }
+
+
+def test_announcement_pages_fit_in_the_snapshot(fake_firebase, admin_client):
+    add_announcements(fake_firebase, 30)
+    first = admin_client.get('/admin/sections/announcements')
+    assert first.status_code == 200
+    assert max(fake_firebase.announcement_limits) <= RECENT_ANNOUNCEMENTS
+    body = first.get_data(as_text=True)
+    assert 'Notice 29' in body and 'Next' in body
+
+    second = admin_client.get('/admin/sections/announcements?page=2').get_data(as_text=True)
+    assert 'Notice 0' in second and 'Notice 29' not in second
+    assert 'Previous' in second and 'Next' not in second
+
+
+def test_sections_are_cached_until_their_collection_changes(fake_firebase, admin_client):
+    fake_firebase.data['materials'] = {'m1': {'title': 'Worksheet'}}
+    assert 'cache miss' in admin_client.get('/admin/sections/materials').headers['Server-Timing']
+    assert 'cache hit' in admin_client.get('/admin/sections/materials').headers['Server-Timing']
+    fake_firebase.write('materials', 'add', 'm2', {'title': 'Past paper'})
+    response = admin_client.get('/admin/sections/materials')
+    assert 'cache miss' in response.headers['Server-Timing']
+    assert b'Past paper' in response.data
+
+
+def test_unknown_sections_and_anonymous_visitors_are_refused(fake_firebase, admin_client, app_module):
+    assert admin_client.get('/admin/sections/users').status_code == 404
+    assert app_module.app.test_client().get('/admin/sections/classes').status_code == 302
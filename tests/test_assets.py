@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from utils import assets as assets_module
+from utils.assets import AssetManifest
+
+
+@pytest.fixture
+def static(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets_module, 'BUNDLES', {'site.css': ['css/a.css', 'css/b.css'], 'site.js': ['js/a.js']})
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'js').mkdir()
+    (tmp_path / 'css' / 'a.css').write_text('body {\n  color: red;\n}\n')
+    (tmp_path / 'css' / 'b.css').write_text('p { margin: 0; }\n')
+    (tmp_path / 'js' / 'a.js').write_text('var a = 1;\n')
+    return tmp_path
+
+
+def age(path, seconds):
+    stamp = os.path.getmtime(path) - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_bundles_are_fingerprinted_and_recorded(static):
+    manifest = AssetManifest(str(static))
+    files = manifest.build()
+    assert files['site.css'].startswith('site.') and files['site.css'].endswith('.css')
+    assert (static / 'dist' / files['site.css']).read_text() == 'body{color: red;}\np{margin: 0;}\n'
+    assert not manifest.is_stale()
+
+    reloaded = AssetManifest(str(static))
+    reloaded.load()
+    assert reloaded.files == files
+
+
+def test_retired_bundles_are_kept_for_a_while(static):
+    manifest = AssetManifest(str(static), keep_retired=3600)
+    old = manifest.build()['site.css']
+    # Served for ages before this deploy; retirement starts the clock, not creation
+    age(static / 'dist' / old, 7200)
+
+    (static / 'css' / 'b.css').write_text('p { margin: 1px; }\n')
+    new = manifest.build()['site.css']
+    assert new != old
+    assert (static / 'dist' / old).exists()
+
+    (static / 'css' / 'b.css').write_text('p { margin: 2px; }\n')
+    manifest.build()
+    assert (static / 'dist' / old).exists()
+    assert (static / 'dist' / new).exists()
+
+    age(static / 'dist' / old, 7200)
+    manifest.build()
+    assert not (static / 'dist' / old).exists()
+    assert (static / 'dist' / new).exists()
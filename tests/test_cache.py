@@ -0,0 +1,113 @@
+import time
+from datetime import date, datetime, timezone
+
+import pytest
+
+from utils import cache as cache_module
+from utils.cache import MISS, LocalCache, RedisCache, cached, make_cache
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+@pytest.fixture
+def redis_cache(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(cache_module.redis.Redis, 'from_url',
+                        lambda url: fakeredis.FakeRedis(server=server))
+    return RedisCache('redis://test', ttl=60)
+
+
+class Reader:
+    def __init__(self, cache):
+        self.cache = cache
+        self.reads = 0
+
+    @cached('classes')
+    def get_all_classes(self):
+        self.reads += 1
+        return [{'id': 'c1', 'title': 'Maths'}]
+
+
+@pytest.mark.parametrize('make', [lambda request: LocalCache(),
+                                  lambda request: request.getfixturevalue('redis_cache')])
+def test_cached_reads_until_the_collection_is_invalidated(make, request):
+    reader = Reader(make(request))
+    assert reader.get_all_classes() == reader.get_all_classes()
+    assert reader.reads == 1
+    reader.cache.invalidate('classes')
+    reader.get_all_classes()
+    assert reader.reads == 2
+
+
+@pytest.mark.parametrize('make', [lambda request: LocalCache(),
+                                  lambda request: request.getfixturevalue('redis_cache')])
+def test_a_read_that_raced_a_write_is_not_stored(make, request):
+    cache = make(request)
+    version = cache.get_version('classes')
+    cache.invalidate('classes')
+    cache.set('classes', (), ['stale'], version)
+    assert cache.get('classes', ()) is MISS
+
+
+def test_redis_values_are_json_and_keep_dates_and_bytes(redis_cache):
+    value = {'when': datetime(2026, 3, 2, 9, tzinfo=timezone.utc), 'day': date(2026, 3, 2), 'raw': b'\x00\xff'}
+    redis_cache.set('classes', ('k',), value, redis_cache.get_version('classes'))
+    stored = redis_cache.client.hget(redis_cache._hash('classes'), repr(('k',)))
+    assert stored.startswith(b'{')
+    assert redis_cache.get('classes', ('k',)) == value
+
+
+def test_redis_fields_expire_on_their_own(redis_cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'time', lambda: now[0])
+    redis_cache.set('classes', ('old',), 'old', 0)
+    now[0] += 45
+    # A newer field in the same hash must not keep the older one alive
+    redis_cache.set('classes', ('new',), 'new', 0)
+    now[0] += 30
+    assert redis_cache.get('classes', ('old',)) is MISS
+    assert redis_cache.get('classes', ('new',)) == 'new'
+    assert not redis_cache.client.hexists(redis_cache._hash('classes'), repr(('old',)))
+
+
+def test_redis_ignores_entries_it_cannot_decode(redis_cache):
+    redis_cache.client.hset(redis_cache._hash('classes'), repr(()), b'\x80\x05pickled')
+    assert redis_cache.get('classes', ()) is MISS
+
+
+def test_values_json_cannot_carry_are_not_cached(redis_cache):
+    redis_cache.set('classes', (), {'obj': object()}, 0)
+    assert redis_cache.get('classes', ()) is MISS
+
+
+def test_redis_listens_for_other_workers_only_once_started_in_this_process(redis_cache):
+    events = []
+    redis_cache.subscribe(events.append)
+    assert redis_cache._subscriber is None  # e.g. a gunicorn master preloading the app
+
+    redis_cache.ensure_subscribed()
+    subscriber = redis_cache._subscriber
+    redis_cache.ensure_subscribed()
+    assert redis_cache._subscriber is subscriber
+    try:
+        RedisCache('redis://test', ttl=60).publish({'collection': 'classes', 'action': 'delete', 'doc_id': 'c1'})
+        deadline = time.monotonic() + 5
+        while not events and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert events == [{'collection': 'classes', 'action': 'delete', 'doc_id': 'c1'}]
+
+        # A forked worker starts its own on first use
+        redis_cache._subscriber_pid = None
+        redis_cache.after_fork()
+        assert redis_cache._subscriber is subscriber
+        redis_cache.ensure_subscribed()
+        assert redis_cache._subscriber is not subscriber
+    finally:
+        subscriber.stop()
+        redis_cache._subscriber.stop()
+
+
+def test_local_cache_is_refused_for_several_workers():
+    assert isinstance(make_cache('local', workers=1), LocalCache)
+    with pytest.raises(RuntimeError):
+        make_cache('local', workers=3)
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+from fakes import FakeFirebase
+from utils.cache import LocalCache
+from utils.calendar_index import CalendarIndex
+from utils.circuit_breaker import CLOSED
+
+
+def titles(items):
+    return [item['title'] for item in items]
+
+
+def make_index(**collections):
+    firebase = FakeFirebase(**collections)
+    index = CalendarIndex(firebase)
+    firebase.add_listener(index.on_write)
+    return firebase, index
+
+
+def test_series_are_ordered_by_start_with_undated_last():
+    _, index = make_index(classes={
+        'b': {'title': 'Science', 'date': '2026-03-02', 'time': '10:00'},
+        'a': {'title': 'Maths', 'date': '2026-03-02', 'time': '09:00'},
+        'c': {'title': 'Someday'},
+    })
+    assert titles(index.all()) == ['Maths', 'Science', 'Someday']
+    assert titles(index.between(datetime(2026, 3, 2, 9, 30), datetime(2026, 3, 3))) == ['Science']
+
+
+def test_a_write_event_is_applied_without_rereading():
+    firebase, index = make_index(classes={'a': {'title': 'Maths', 'date': '2026-03-02'}})
+    index.all()
+    reads = firebase.reads
+    firebase.write('classes', 'add', 'b', {'title': 'Art', 'date': '2026-03-01'})
+    firebase.write('classes', 'update', 'a', {'title': 'Algebra'})
+    assert titles(index.all()) == ['Art', 'Algebra']
+    assert firebase.reads == reads
+
+
+def test_reloads_when_the_collection_version_moves_without_an_event():
+    # e.g. another worker wrote, or a queued write was applied elsewhere
+    firebase, index = make_index(classes={'a': {'title': 'Maths', 'date': '2026-03-02'}})
+    assert titles(index.all()) == ['Maths']
+    firebase.write('classes', 'add', 'b', {'title': 'Art', 'date': '2026-03-01'}, notify=False)
+    assert titles(index.all()) == ['Art', 'Maths']
+
+
+def test_a_missed_event_makes_the_next_event_reload():
+    firebase, index = make_index(classes={'a': {'title': 'Maths', 'date': '2026-03-02'}})
+    index.all()
+    firebase.write('classes', 'add', 'b', {'title': 'Art', 'date': '2026-03-01'}, notify=False)
+    firebase.write('classes', 'delete', 'a')
+    assert titles(index.all()) == ['Art']
+
+
+def test_series_loaded_from_fallback_data_is_not_kept():
+    firebase, index = make_index(camps={'k': {'title': 'Winter camp', 'start_date': '2026-07-01'}})
+    firebase.trip()
+    assert index.all('camps') == []
+    assert 'camps' not in index._series
+
+    firebase.down = False
+    firebase.breaker.state = CLOSED
+    assert titles(index.all('camps')) == ['Winter camp']
+    assert 'camps' in index._series
+
+
+def test_camps_page_reads_the_index(fake_firebase, app_module):
+    fake_firebase.data['camps'] = {
+        'late': {'title': 'Winter camp', 'start_date': '2026-07-01'},
+        'early': {'title': 'Autumn camp', 'start_date': '2026-04-01'},
+    }
+    body = app_module.app.test_client().get('/camps').get_data(as_text=True)
+    assert body.index('Autumn camp') < body.index('Winter camp')
+    reads = fake_firebase.reads
+    app_module.app.test_client().get('/camps')
+    assert fake_firebase.reads == reads
+
+
+def test_a_local_cache_reloads_writes_made_by_another_process_after_its_ttl():
+    # Two workers with per-process caches over one Firestore
+    writer, _ = make_index(classes={'a': {'title': 'Maths', 'date': '2026-03-02'}})
+    reader = FakeFirebase()
+    reader.data = writer.data
+    reader.cache = LocalCache(ttl=0)
+    index = CalendarIndex(reader)
+    reader.add_listener(index.on_write)
+    assert titles(index.all()) == ['Maths']
+
+    writer.write('classes', 'add', 'b', {'title': 'Art', 'date': '2026-03-01'})
+    assert sorted(titles(reader.get_all_classes())) == ['Art', 'Maths']
+    assert titles(index.all()) == ['Art', 'Maths']
@@ -0,0 +1,150 @@
+import pytest
+from flask import Flask
+
+from fakes import FakeFirebase
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from utils.static_export import PAGES, StaticExport
+
+
+def fail(breaker):
+    with pytest.raises(RuntimeError):
+        with breaker.guard():
+            raise RuntimeError('deadline exceeded')
+
+
+def test_opens_after_consecutive_failures_and_rejects_calls():
+    breaker = CircuitBreaker('firestore', failure_threshold=3, reset_timeout=60)
+    fail(breaker)
+    fail(breaker)
+    assert breaker.state == CLOSED
+    fail(breaker)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        with breaker.guard():
+            pytest.fail('an open breaker must not run the call')
+    assert breaker.snapshot()['rejected'] == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker('firestore', failure_threshold=2)
+    fail(breaker)
+    with breaker.guard():
+        pass
+    fail(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker('firestore', failure_threshold=1, slow_call_seconds=0)
+    with breaker.guard():
+        pass
+    assert breaker.state == OPEN
+    assert breaker.snapshot()['slow_calls'] == 1
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker('firestore', failure_threshold=1, reset_timeout=0)
+    fail(breaker)
+    assert breaker.state == OPEN
+
+    # The probe fails: straight back to open
+    fail(breaker)
+    assert breaker.state == OPEN
+
+    with breaker.guard():
+        assert breaker.state == HALF_OPEN
+    assert breaker.state == CLOSED
+
+
+def test_only_one_probe_at_a_time():
+    breaker = CircuitBreaker('firestore', failure_threshold=1, reset_timeout=0)
+    fail(breaker)
+    breaker._allow()  # another thread's probe is in flight
+    breaker._probe_thread = -1
+    with pytest.raises(CircuitOpenError):
+        with breaker.guard():
+            pass
+
+
+def test_nested_guards_are_one_call():
+    breaker = CircuitBreaker('firestore', failure_threshold=2)
+    with pytest.raises(RuntimeError):
+        with breaker.guard():
+            with breaker.guard():
+                raise RuntimeError('inner read failed')
+    assert breaker.failures == 1
+    assert breaker.snapshot()['calls'] == 1
+
+
+def test_fallback_serves_last_good_result_and_marks_the_watch():
+    firebase = FakeFirebase(classes={'c1': {'title': 'Maths'}})
+    assert firebase.get_all_classes() == [{'title': 'Maths', 'id': 'c1'}]
+    firebase.cache.invalidate('classes')
+    firebase.trip()
+
+    with firebase.breaker.watch() as reads:
+        assert firebase.get_all_classes() == [{'title': 'Maths', 'id': 'c1'}]
+        assert firebase.get_all_camps() == []  # never read: the empty default
+    assert reads.degraded
+
+    firebase.down = False
+    firebase.breaker.state = CLOSED
+    with firebase.breaker.watch() as reads:
+        firebase.get_all_classes()
+    assert not reads.degraded
+
+
+def test_fallback_results_are_not_cached():
+    firebase = FakeFirebase(classes={'c1': {'title': 'Maths'}})
+    firebase.trip()
+    assert firebase.get_all_classes() == []
+    firebase.down = False
+    firebase.breaker.state = CLOSED
+    assert firebase.get_all_classes() == [{'title': 'Maths', 'id': 'c1'}]
+
+
+def _export_app(firebase):
+    app = Flask(__name__)
+    for endpoint, (url, _) in PAGES.items():
+        app.add_url_rule(url, endpoint, lambda: ', '.join(c['title'] for c in firebase.get_all_classes()))
+    return app
+
+
+def test_static_export_skips_pages_rendered_from_fallback_data(tmp_path):
+    firebase = FakeFirebase(classes={'c1': {'title': 'Maths'}})
+    export = StaticExport(_export_app(firebase), str(tmp_path), delay=60, breaker=firebase.breaker)
+    assert export.render('calendar')
+    with open(export.path_for('calendar'), 'rb') as f:
+        assert f.read() == b'Maths'
+
+    firebase.data['classes'] = {}
+    firebase.cache.invalidate('classes')
+    firebase.trip()
+    assert not export.render('calendar')
+    # The last good copy stays, and a retry is scheduled for after the breaker's probe
+    with open(export.path_for('calendar'), 'rb') as f:
+        assert f.read() == b'Maths'
+    assert 'calendar' in export._dirty
+    export._timer.cancel()
+
+
+def test_admin_section_fallback_is_not_cached(fake_firebase, admin_client):
+    fake_firebase.data['classes'] = {'c1': {'title': 'Maths'}}
+    fake_firebase.trip()
+    response = admin_client.get('/admin/sections/classes')
+    assert response.status_code == 200
+    assert 'cache fallback' in response.headers['Server-Timing']
+
+    fake_firebase.down = False
+    fake_firebase.breaker.state = CLOSED
+    response = admin_client.get('/admin/sections/classes')
+    assert b'Maths' in response.data
+    assert 'cache miss' in response.headers['Server-Timing']
+    assert 'cache hit' in admin_client.get('/admin/sections/classes').headers['Server-Timing']
+
+
+def test_health_reports_the_breaker(fake_firebase, app_module):
+    fake_firebase.trip()
+    body = app_module.app.test_client().get('/health').get_json()
+    assert body['firestore_breaker']['state'] == OPEN
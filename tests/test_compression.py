@@ -0,0 +1,74 @@
+import gzip
+
+from flask import Response
+from werkzeug.http import parse_accept_header
+
+from utils.compression import StaticCompressionCache, compress_response
+from utils.html_minify import minify_html
+
+GZIP = parse_accept_header('gzip')
+NONE = parse_accept_header('')
+HTML = '<p>' + 'hello world ' * 100 + '</p>'
+
+
+def test_large_bodies_are_compressed_and_strong_tags_weakened():
+    response = Response(HTML, mimetype='text/html')
+    response.set_etag('abc')
+    compress_response(response, GZIP)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()).decode() == HTML
+    assert response.get_etag() == ('abc', True)
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_bodies_that_must_stay_as_they_are():
+    small = compress_response(Response('<p>hi</p>', mimetype='text/html'), GZIP)
+    unaccepted = compress_response(Response(HTML, mimetype='text/html'), NONE)
+    image = compress_response(Response(b'\x89PNG' * 200, mimetype='image/png'), GZIP)
+    partial = Response(HTML[:600], status=206, mimetype='text/html')
+    partial.headers['Content-Range'] = f'bytes 0-599/{len(HTML)}'
+    compress_response(partial, GZIP)
+    for response in (small, unaccepted, image, partial):
+        assert 'Content-Encoding' not in response.headers
+
+
+def test_static_copies_are_evicted_least_recently_used_first(tmp_path):
+    paths = []
+    for name in 'abc':
+        path = tmp_path / f'{name}.css'
+        path.write_bytes(name.encode() * 2000)  # compresses to a few dozen bytes
+        paths.append(str(path))
+    one_entry = len(gzip.compress(b'a' * 2000, compresslevel=9))
+    cache = StaticCompressionCache(min_size=10, max_bytes=one_entry * 2 + 5)
+
+    cache.get(paths[0], 'gzip')
+    cache.get(paths[1], 'gzip')
+    cache.get(paths[0], 'gzip')   # a is now the most recently used
+    cache.get(paths[2], 'gzip')
+    assert set(path for path, _ in cache._entries) == {paths[0], paths[2]}
+    assert cache._size <= cache.max_bytes
+
+
+def test_range_requests_for_static_files_are_not_compressed(app_module):
+    client = app_module.app.test_client()
+    response = client.get('/static/css/style.css', headers={'Accept-Encoding': 'gzip', 'Range': 'bytes=0-99'})
+    assert response.status_code == 206
+    assert 'Content-Encoding' not in response.headers
+    whole = client.get('/static/css/style.css', headers={'Accept-Encoding': 'gzip'})
+    assert whole.headers['Content-Encoding'] == 'gzip'
+    assert whole.headers['ETag'].startswith('W/')
+
+
+def test_html_minifying_leaves_whitespace_sensitive_blocks_alone():
+    html = ('<div>\n    <p>Hello   world</p>\n    <!-- note -->\n    <pre>  keep\n   this </pre>\n'
+            '<textarea>  a\n b</textarea>\n<script>\n  var a = 1;\n\n  var b = 2;\n</script>\n'
+            '<!--[if IE]>legacy<![endif]-->\n<style>\n  p { color: red; } /* c */\n</style></div>')
+    assert minify_html(html) == (
+        '<div>\n<p>Hello world</p>\n<pre>  keep\n   this </pre>\n<textarea>  a\n b</textarea>\n'
+        '<script>\nvar a = 1;\nvar b = 2;\n</script>\n<!--[if IE]>legacy<![endif]-->\n'
+        '<style>p{color: red;}</style></div>')
+
+
+def test_rendered_pages_are_minified(fake_firebase, app_module):
+    body = app_module.app.test_client().get('/about').get_data(as_text=True)
+    assert '<!-- ' not in body and '\n\n' not in body and '    <' not in body
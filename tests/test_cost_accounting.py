@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from flask import Flask
+
+from utils.cost_accounting import BACKGROUND, CostTracker, estimate_size, parse_budgets
+
+
+def test_sizes_follow_firestores_rules():
+    assert estimate_size(None) == 1
+    assert estimate_size(True) == 1
+    assert estimate_size(3) == 8
+    assert estimate_size(datetime(2026, 1, 1)) == 8
+    assert estimate_size('héllo') == 7
+    assert estimate_size({'title': 'ab', 'tags': ['x', 'y']}) == (6 + 3) + (5 + 2 + 2)
+
+
+def test_budgets_parse_and_ignore_junk():
+    assert parse_budgets('index:20, calendar:100,,nonsense') == {'index': 20, 'calendar': 100}
+    assert parse_budgets(None) == {}
+
+
+def test_reads_are_attributed_to_the_route_or_the_background():
+    app = Flask(__name__)
+    app.add_url_rule('/calendar', 'calendar', lambda: '')
+    costs = CostTracker()
+    costs.record_read({'title': 'Maths'})
+    with app.test_request_context('/calendar'):
+        costs.record('reads', 3, 10)
+        costs.record('writes')
+        usage = costs.end_request('calendar')
+    assert usage == {'reads': 3, 'writes': 1, 'deletes': 0, 'bytes': 10}
+    report = costs.report()
+    assert report['routes']['calendar']['reads_per_request'] == 3
+    assert report['routes'][BACKGROUND]['reads'] == 1
+    assert report['totals']['reads'] == 4
+    assert list(report['routes']) == ['calendar', BACKGROUND]
+
+
+def test_going_over_a_read_budget_is_logged(capsys):
+    app = Flask(__name__)
+    costs = CostTracker()
+    with app.test_request_context('/'):
+        costs.record('reads', 5)
+        costs.end_request('index', {'index': 4})
+    assert 'read budget exceeded on index: 5 reads (budget 4)' in capsys.readouterr().err
+
+
+def test_admins_see_a_requests_reads(fake_firebase, admin_client, app_module):
+    fake_firebase.data['classes'] = {'c1': {'title': 'Maths'}}
+    response = admin_client.get('/api/v1/classes')
+    assert response.headers['X-Firestore-Reads'] == '1'
+    assert 'X-Firestore-Reads' not in app_module.app.test_client().get('/api/v1/materials').headers
+
+    report = admin_client.get('/admin/api/firestore_costs').get_json()
+    assert report['routes']['api_classes'] == {'requests': 1, 'reads': 1, 'writes': 0, 'deletes': 0,
+                                               'bytes': 0, 'reads_per_request': 1.0}
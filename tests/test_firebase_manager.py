@@ -0,0 +1,199 @@
+"""FirebaseManager's snapshot maintenance, run against an in-memory stand-in for firebase_admin."""
+import copy
+import itertools
+import sys
+import types
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.site_snapshot import RECENT_ANNOUNCEMENTS, SNAPSHOT_COLLECTION, SNAPSHOT_DOCUMENT
+
+START = datetime(2026, 1, 1)
+
+
+class Store:
+    """Firestore's documents: collection -> {doc_id: data}."""
+
+    def __init__(self):
+        self.collections = {}
+        self.commits = 0
+        self.fail_commit = None
+        self._ids = itertools.count(1)
+
+    def docs(self, collection):
+        return self.collections.setdefault(collection, {})
+
+    def new_id(self):
+        return f'auto{next(self._ids)}'
+
+
+class Snapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self.exists = data is not None
+        self._data = copy.deepcopy(data)
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+
+class DocumentReference:
+    def __init__(self, store, collection, doc_id):
+        self.store, self.collection, self.id = store, collection, doc_id
+
+    def get(self, transaction=None, timeout=None):
+        return Snapshot(self.id, self.store.docs(self.collection).get(self.id))
+
+
+class Query:
+    DESCENDING = 'DESCENDING'
+
+    def __init__(self, store, collection, order=None, count=None):
+        self.store, self.collection, self.order, self.count = store, collection, order, count
+
+    def order_by(self, field, direction=None):
+        return Query(self.store, self.collection, (field, direction == Query.DESCENDING), self.count)
+
+    def limit(self, count):
+        return Query(self.store, self.collection, self.order, count)
+
+    def document(self, doc_id=None):
+        return DocumentReference(self.store, self.collection, doc_id or self.store.new_id())
+
+    def stream(self, transaction=None, timeout=None):
+        docs = sorted(self.store.docs(self.collection).items())
+        if self.order:
+            field, descending = self.order
+            # Like Firestore, ordering leaves out documents without the field
+            docs = sorted([d for d in docs if d[1].get(field) is not None],
+                          key=lambda d: d[1][field], reverse=descending)
+        return [Snapshot(doc_id, data) for doc_id, data in docs[:self.count]]
+
+
+class Transaction:
+    """Buffers writes and applies them all at once, or none if the commit fails."""
+
+    def __init__(self, store):
+        self.store = store
+        self.writes = []
+
+    def set(self, ref, data, merge=False):
+        self.writes.append((ref, copy.deepcopy(data), merge))
+
+    def delete(self, ref):
+        self.writes.append((ref, None, False))
+
+    def commit(self):
+        if self.store.fail_commit is not None:
+            raise self.store.fail_commit
+        for ref, data, merge in self.writes:
+            docs = self.store.docs(ref.collection)
+            if data is None:
+                docs.pop(ref.id, None)
+            elif merge:
+                docs.setdefault(ref.id, {}).update(data)
+            else:
+                docs[ref.id] = data
+        self.store.commits += 1
+
+
+class Client:
+    def __init__(self, store):
+        self.store = store
+
+    def collection(self, name):
+        return Query(self.store, name)
+
+    def transaction(self):
+        return Transaction(self.store)
+
+
+def transactional(fn):
+    def run(transaction):
+        result = fn(transaction)
+        transaction.commit()
+        return result
+    return run
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    """Install a stand-in firebase_admin and return its document store."""
+    store = Store()
+    firestore = types.SimpleNamespace(client=lambda: Client(store), transactional=transactional,
+                                      Query=Query, SERVER_TIMESTAMP=object())
+    credentials = types.SimpleNamespace(Certificate=lambda path: path)
+    firebase_admin = types.ModuleType('firebase_admin')
+    firebase_admin._apps = {}
+    firebase_admin.initialize_app = lambda cred: firebase_admin._apps.setdefault('[DEFAULT]', cred)
+    firebase_admin.firestore = firestore
+    firebase_admin.credentials = credentials
+    monkeypatch.setitem(sys.modules, 'firebase_admin', firebase_admin)
+    monkeypatch.setitem(sys.modules, 'firebase_admin.firestore', firestore)
+    monkeypatch.setitem(sys.modules, 'firebase_admin.credentials', credentials)
+    # Import it afresh so it binds to the stand-in
+    monkeypatch.delitem(sys.modules, 'utils.firebase_utils', raising=False)
+    monkeypatch.chdir(tmp_path)  # FirebaseManager creates static/uploads
+    return store
+
+
+@pytest.fixture
+def manager(store):
+    from utils.firebase_utils import FirebaseManager
+    return FirebaseManager('credentials.json')
+
+
+def snapshot_in(store):
+    return store.docs(SNAPSHOT_COLLECTION).get(SNAPSHOT_DOCUMENT)
+
+
+def add_announcements(store, count):
+    for i in range(count):
+        store.docs('announcements')[f'a{i:02d}'] = {'title': f'Notice {i}', 'timestamp': START + timedelta(days=i)}
+
+
+def test_writes_update_the_snapshot_in_the_same_transaction(store, manager):
+    store.docs('classes')['c1'] = {'title': 'Maths'}
+    assert [c['title'] for c in manager.get_all_classes()] == ['Maths']
+    assert snapshot_in(store)['classes'] == {'c1': {'title': 'Maths'}}
+
+    commits = store.commits
+    ref = manager.add_class({'title': 'Art'})
+    assert store.commits == commits + 1
+    assert store.docs('classes')[ref.id] == {'title': 'Art'}
+    assert snapshot_in(store)['classes'][ref.id] == {'title': 'Art'}
+    assert sorted(c['title'] for c in manager.get_all_classes()) == ['Art', 'Maths']
+
+    # A failed commit leaves both the collection and the snapshot as they were
+    store.fail_commit = RuntimeError('aborted')
+    with pytest.raises(RuntimeError):
+        manager.delete_class('c1')
+    assert 'c1' in store.docs('classes') and 'c1' in snapshot_in(store)['classes']
+
+
+def test_deleting_a_recent_announcement_refills_the_snapshot(store, manager):
+    add_announcements(store, RECENT_ANNOUNCEMENTS + 1)
+    manager.get_snapshot()
+    assert 'a00' not in snapshot_in(store)['announcements']
+
+    manager.delete_announcement(f'a{RECENT_ANNOUNCEMENTS:02d}')
+    recent = snapshot_in(store)['announcements']
+    assert len(recent) == RECENT_ANNOUNCEMENTS
+    assert 'a00' in recent and f'a{RECENT_ANNOUNCEMENTS:02d}' not in recent
+    assert manager.get_announcements(limit=1)[0]['id'] == f'a{RECENT_ANNOUNCEMENTS - 1:02d}'
+
+
+def test_a_snapshot_grown_too_large_is_dropped(store, manager, monkeypatch):
+    store.docs('materials')['m1'] = {'title': 'Notes'}
+    manager.get_snapshot()
+    assert snapshot_in(store) is not None
+
+    monkeypatch.setattr(sys.modules['utils.firebase_utils'], 'MAX_SNAPSHOT_BYTES', 1024)
+    ref = manager.add_class({'title': 'Maths', 'description': 'x' * 2048})
+    assert store.docs('classes')[ref.id]['title'] == 'Maths'
+    assert snapshot_in(store) is None
+    assert manager.use_snapshot is False
+    # Reads go back to the collections
+    assert [c['id'] for c in manager.get_all_classes()] == [ref.id]
+    assert manager.get_snapshot() is None
@@ -0,0 +1,61 @@
+import os
+import runpy
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_conf(monkeypatch, **env):
+    for name in ('WEB_WORKLOAD', 'WEB_CONCURRENCY', 'WEB_THREADS', 'PORT'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setenv('WEB_WORKERS', '1')
+    return runpy.run_path(os.path.join(ROOT, 'gunicorn.conf.py'))
+
+
+def test_worker_count_is_exported_for_the_app(monkeypatch):
+    conf = load_conf(monkeypatch, WEB_CONCURRENCY='3')
+    assert conf['workers'] == 3
+    assert os.environ['WEB_WORKERS'] == '3'
+
+
+def test_threaded_workers_by_default(monkeypatch):
+    conf = load_conf(monkeypatch, WEB_THREADS='8', PORT='9000')
+    assert conf['worker_class'] == 'gthread'
+    assert conf['threads'] == 8
+    assert conf['bind'] == '0.0.0.0:9000'
+    assert conf['preload_app'] is True
+
+
+def test_async_falls_back_to_threads_without_gevent(monkeypatch):
+    try:
+        import gevent  # noqa: F401
+        pytest.skip('gevent is installed; loading the config would monkey-patch the test run')
+    except ImportError:
+        pass
+    conf = load_conf(monkeypatch, WEB_WORKLOAD='async')
+    assert conf['worker_class'] == 'gthread'
+
+
+def test_hooks_reconnect_and_warm_each_worker(monkeypatch, app_module):
+    import wsgi
+
+    conf = load_conf(monkeypatch)
+    forked, warmed = [], []
+    monkeypatch.setattr(wsgi, 'firebase', type('Firebase', (), {'after_fork': lambda self: forked.append(1)})())
+    monkeypatch.setattr(wsgi, 'warm_up', lambda: warmed.append(1))
+    conf['post_fork'](None, None)
+    conf['post_worker_init'](None)
+    assert forked == [1] and warmed == [1]
+
+
+def test_warm_up_primes_the_reads_public_pages_make(fake_firebase, app_module):
+    fake_firebase.data['classes'] = {'c1': {'title': 'Maths', 'date': '2026-03-02'}}
+    app_module.warm_up()
+    reads = fake_firebase.reads
+    assert reads > 0
+    for url in ('/', '/calendar', '/camps', '/materials', '/calendar.ics'):
+        assert app_module.app.test_client().get(url).status_code == 200
+    assert fake_firebase.reads == reads
@@ -0,0 +1,71 @@
+from fakes import FakeFirebase
+from utils.cache import LocalCache
+from utils.circuit_breaker import CLOSED
+from utils.ical import IcsFeeds
+
+CLASSES = {
+    f'c{i}': {'title': f'Class {i}', 'date': f'2026-03-{i + 1:02d}', 'time': '09:00', 'type': 'regular'}
+    for i in range(5)
+}
+
+
+def test_feeds_are_rebuilt_only_when_the_collections_change():
+    firebase = FakeFirebase(classes=CLASSES)
+    feeds = IcsFeeds(firebase)
+    body, etag = feeds.get('all')
+    assert b'Class 0' in body
+    assert feeds.get('classes-regular') is not None
+    assert feeds.get('classes-weekend') is None
+    feeds.get('camps')
+    assert feeds.builds == 1
+
+    # Written by another worker: no event here, only the shared version moved
+    firebase.write('classes', 'delete', 'c0', notify=False)
+    body, new_etag = feeds.get('all')
+    assert feeds.builds == 2
+    assert b'Class 0' not in body and new_etag != etag
+
+
+def test_feeds_over_a_local_cache_pick_up_other_processes_writes_after_its_ttl():
+    writer = FakeFirebase(classes=CLASSES)
+    reader = FakeFirebase()
+    reader.data = writer.data
+    reader.cache = LocalCache(ttl=0)
+    feeds = IcsFeeds(reader)
+    assert b'Class 0' in feeds.get('all')[0]
+
+    writer.write('classes', 'delete', 'c0')
+    assert b'Class 0' not in feeds.get('all')[0]
+
+
+def test_feeds_built_from_fallback_data_are_not_kept():
+    firebase = FakeFirebase(classes=CLASSES)
+    feeds = IcsFeeds(firebase)
+    good = feeds.get('all')
+    firebase.cache.invalidate('classes')
+    firebase.trip()
+    assert feeds.get('all') == good
+    assert feeds.get('all') == good
+    assert feeds.builds == 3  # retried on every request while degraded
+
+    firebase.down = False
+    firebase.breaker.state = CLOSED
+    feeds.get('all')
+    feeds.get('all')
+    assert feeds.builds == 4
+
+
+def test_feed_revalidates_until_a_write(fake_firebase, app_module):
+    fake_firebase.data['classes'] = dict(CLASSES)
+    client = app_module.app.test_client()
+    first = client.get('/calendar.ics', headers={'Accept-Encoding': 'gzip'})
+    assert first.headers['Content-Encoding'] == 'gzip'
+    # Compressed bytes: the tag must be weak, and still match on revalidation
+    assert first.headers['ETag'].startswith('W/')
+    etag = first.headers['ETag']
+    assert client.get('/calendar.ics', headers={'If-None-Match': etag}).status_code == 304
+
+    fake_firebase.write('classes', 'add', 'c9', {'title': 'New class', 'date': '2026-04-01'}, notify=False)
+    response = client.get('/calendar.ics', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert b'New class' in response.data
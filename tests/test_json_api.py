@@ -0,0 +1,55 @@
+from datetime import datetime
+
+
+def test_collections_are_served_with_a_version_etag(fake_firebase, app_module):
+    fake_firebase.data['classes'] = {'c1': {'title': 'Maths', 'updated': datetime(2026, 3, 2, 9, 0)}}
+    response = app_module.app.test_client().get('/api/v1/classes')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['data'] == [{'id': 'c1', 'title': 'Maths', 'updated': '2026-03-02T09:00:00'}]
+    assert response.headers['ETag'].startswith('W/"classes-')
+    assert response.cache_control.no_cache
+
+
+def test_revalidation_is_answered_without_firestore_until_a_write(fake_firebase, app_module):
+    client = app_module.app.test_client()
+    etag = client.get('/api/v1/camps').headers['ETag']
+    reads = fake_firebase.reads
+    assert client.get('/api/v1/camps', headers={'If-None-Match': etag}).status_code == 304
+    assert fake_firebase.reads == reads
+
+    fake_firebase.write('camps', 'add', 'k1', {'title': 'Winter camp'})
+    response = client.get('/api/v1/camps', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['data'] == [{'id': 'k1', 'title': 'Winter camp'}]
+
+
+def test_fallback_data_is_not_tagged_or_stored(fake_firebase, app_module):
+    client = app_module.app.test_client()
+    fake_firebase.trip()
+    response = client.get('/api/v1/classes')
+    assert response.status_code == 200
+    assert response.get_json()['data'] == []
+    assert 'ETag' not in response.headers
+    assert response.cache_control.no_store
+
+
+def test_announcement_limits_get_their_own_etags(fake_firebase, app_module):
+    client = app_module.app.test_client()
+    five = client.get('/api/v1/announcements').headers['ETag']
+    ten = client.get('/api/v1/announcements?limit=10').headers['ETag']
+    assert five != ten
+    assert client.get('/api/v1/announcements?limit=10', headers={'If-None-Match': five}).status_code == 200
+    assert fake_firebase.announcement_limits == [5, 10]  # the third was a cache hit
+
+
+def test_unknown_versions_never_match(fake_firebase, app_module, monkeypatch):
+    client = app_module.app.test_client()
+    monkeypatch.setattr(fake_firebase.cache, 'get_version', lambda collection: None)
+    first = client.get('/api/v1/settings').headers['ETag']
+    assert client.get('/api/v1/settings', headers={'If-None-Match': first}).status_code == 200
+
+
+def test_api_needs_a_database(app_module):
+    assert app_module.app.test_client().get('/api/v1/materials').status_code == 503
@@ -0,0 +1,50 @@
+import threading
+import time
+
+import pytest
+
+from utils.profiling import ProfileStore, StackSampler
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampler_records_the_profiled_threads_stacks():
+    sampler = StackSampler(threading.get_ident(), interval=0.001).start()
+    busy_wait(0.05)
+    stacks = sampler.stop()
+    assert sum(stacks.values()) > 0
+    assert any('busy_wait' in stack for stack in stacks)
+    assert sampler.duration >= 0.05
+
+
+def test_store_keeps_only_the_newest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    ids = [store.save({'path': f'/{i}'}, {'main;handler': i + 1}) for i in range(3)]
+    assert [meta['path'] for meta in store.list()] == ['/2', '/1']
+    assert store.get(ids[0]) is None
+    assert store.collapsed(ids[2]) == 'main;handler 3\n'
+
+
+@pytest.mark.parametrize('profile_id', ['../secret', '1-2.json', '', 'abc'])
+def test_store_only_reads_profile_ids(tmp_path, profile_id):
+    assert ProfileStore(str(tmp_path)).get(profile_id) is None
+
+
+def test_admins_can_profile_a_request_and_download_it(fake_firebase, admin_client):
+    response = admin_client.get('/about?_profile=1')
+    profile_id = response.headers['X-Profile-Id']
+    download = admin_client.get(f'/admin/profiles/{profile_id}.folded')
+    assert download.status_code == 200
+    assert download.headers['Content-Disposition'] == f'attachment; filename=profile-{profile_id}.folded'
+    assert profile_id.encode() in admin_client.get('/admin/profiles').data
+    assert admin_client.get('/admin/profiles/1-1.folded').status_code == 404
+
+
+def test_visitors_cannot_ask_for_a_profile(fake_firebase, app_module):
+    client = app_module.app.test_client()
+    assert 'X-Profile-Id' not in client.get('/about?_profile=1', headers={'X-Profile': '1'}).headers
+    assert client.get('/admin/profiles').status_code == 302
@@ -0,0 +1,57 @@
+def test_anonymous_public_pages_are_shared_cacheable(fake_firebase, app_module):
+    response = app_module.app.test_client().get('/about')
+    assert response.status_code == 200
+    assert response.cache_control.public
+    assert response.cache_control.max_age == app_module.app.config['PUBLIC_CACHE_MAX_AGE']
+    assert 'Set-Cookie' not in response.headers
+
+
+def test_health_and_json_search_are_not_marked_public(fake_firebase, app_module):
+    client = app_module.app.test_client()
+    health = client.get('/health')
+    assert health.cache_control.no_store and not health.cache_control.public
+    search = client.get('/api/search?q=maths')
+    assert search.status_code == 200 and not search.cache_control.public
+    assert not client.get('/admin/login').cache_control.public
+
+
+def test_pages_with_an_error_notice_are_not_cached(fake_firebase, app_module):
+    fake_firebase.get_all_materials = lambda: 1 / 0
+    response = app_module.app.test_client().get('/materials')
+    assert b'Error loading materials' in response.data
+    assert not response.cache_control.public
+
+
+def test_pages_rendered_from_fallback_data_are_not_cached(fake_firebase, app_module):
+    fake_firebase.data['camps'] = {'k': {'title': 'Winter camp', 'start_date': '2026-07-01'}}
+    client = app_module.app.test_client()
+    assert client.get('/camps').cache_control.public
+
+    fake_firebase.cache.invalidate('camps')
+    fake_firebase.trip()
+    response = client.get('/camps')
+    assert response.status_code == 200
+    assert not response.cache_control.public and response.cache_control.no_store
+
+
+def test_logged_in_pages_are_private(fake_firebase, admin_client):
+    assert admin_client.get('/about').cache_control.private
+
+
+def test_anonymous_visitors_get_no_session_cookie_until_they_log_in(fake_firebase, app_module):
+    client = app_module.app.test_client()
+    about = client.get('/about')
+    assert 'Set-Cookie' not in about.headers and 'Cookie' not in about.vary
+
+    config = app_module.app.config
+    login = client.post('/admin/login', data={'username': config['ADMIN_USERNAME'],
+                                              'password': config['ADMIN_PASSWORD']})
+    assert login.status_code == 302 and 'Set-Cookie' in login.headers
+    # With the cookie, public pages see the admin's session
+    assert client.get('/about').cache_control.private
+
+
+def test_a_failed_login_keeps_its_flash_message(fake_firebase, app_module):
+    client = app_module.app.test_client()
+    response = client.post('/admin/login', data={'username': 'admin', 'password': 'wrong'})
+    assert b'Invalid username or password.' in response.data
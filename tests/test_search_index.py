@@ -0,0 +1,107 @@
+import json
+
+from fakes import FakeFirebase
+from utils.circuit_breaker import CLOSED
+from utils.search_index import SearchIndex
+
+
+def ids(index, query, **kwargs):
+    results, _ = index.search(query, **kwargs)
+    return [result['id'] for result in results]
+
+
+def make_firebase():
+    return FakeFirebase(
+        materials={'m1': {'title': 'Algebra worksheet', 'grade': '10', 'file_url': '/f/m1.pdf'}},
+        classes={'c1': {'title': 'Algebra revision', 'description': 'Grade 10 exam prep'}},
+        announcements={'a1': {'title': 'Exam timetable', 'content': 'Algebra on Monday', 'timestamp': 1}},
+    )
+
+
+def worker(firebase, tmp_path):
+    index = SearchIndex(str(tmp_path / 'index.json'), str(tmp_path), firebase)
+    firebase.add_listener(index.on_write)
+    return index
+
+
+def test_title_hits_rank_first_and_collections_filter(tmp_path):
+    index = worker(make_firebase(), tmp_path)
+    index.ensure_current()
+    assert ids(index, 'algebra') == ['m1', 'c1', 'a1']
+    assert ids(index, 'algebra', collection='classes') == ['c1']
+    assert ids(index, 'grade 10') == ['m1', 'c1']
+    assert index.search('the and', page=1) == ([], 0)
+
+
+def test_writes_by_another_worker_are_picked_up_before_the_next_search(tmp_path):
+    firebase = make_firebase()  # one shared cache, as with Redis
+    index = worker(firebase, tmp_path)
+    index.ensure_current()
+    # No event reaches this worker; only the collection version moves
+    firebase.write('classes', 'add', 'c2', {'title': 'Geometry'}, notify=False)
+    index.ensure_current()
+    assert ids(index, 'geometry') == ['c2']
+
+
+def test_a_worker_loads_the_file_saved_at_the_current_versions(tmp_path):
+    firebase = make_firebase()
+    worker(firebase, tmp_path).ensure_current()
+    reads = firebase.reads
+    other = worker(firebase, tmp_path)
+    other.ensure_current()
+    assert firebase.reads == reads
+    assert ids(other, 'timetable') == ['a1']
+
+
+def test_a_file_saved_at_other_versions_is_not_trusted(tmp_path):
+    firebase = make_firebase()
+    first = worker(firebase, tmp_path)
+    first.ensure_current()
+    firebase.data['classes']['c2'] = {'title': 'Geometry'}
+    firebase.cache.invalidate('classes')
+
+    late = worker(firebase, tmp_path)
+    late.ensure_current()
+    assert ids(late, 'geometry') == ['c2']
+    with open(tmp_path / 'index.json') as f:
+        assert json.load(f)['stamp'] == late._stamp
+
+    # An index file from before stamps existed
+    with open(tmp_path / 'index.json', 'w') as f:
+        json.dump([{'collection': 'classes', 'id': 'x', 'fields': {'title': 'Stale'}}], f)
+    assert not worker(firebase, tmp_path).load(late._stamp)
+
+
+def test_an_add_event_is_applied_without_rereading(tmp_path):
+    firebase = make_firebase()
+    index = worker(firebase, tmp_path)
+    index.ensure_current()
+    reads = firebase.reads
+    firebase.write('announcements', 'add', 'a2', {'title': 'Holiday notice', 'timestamp': 2})
+    firebase.write('announcements', 'delete', 'a1')
+    index.ensure_current()
+    assert firebase.reads == reads
+    assert ids(index, 'holiday') == ['a2'] and ids(index, 'timetable') == []
+
+
+def test_fallback_reads_are_not_saved_or_trusted(tmp_path):
+    firebase = make_firebase()
+    index = worker(firebase, tmp_path)
+    firebase.trip()
+    index.ensure_current()
+    assert index._stamp is None
+    assert not (tmp_path / 'index.json').exists()
+
+    firebase.down = False
+    firebase.breaker.state = CLOSED
+    index.ensure_current()
+    assert ids(index, 'algebra') == ['m1', 'c1', 'a1']
+    assert (tmp_path / 'index.json').exists()
+
+
+def test_search_page_sees_a_write_made_elsewhere(fake_firebase, app_module):
+    fake_firebase.data['materials'] = {'m1': {'title': 'Physics notes', 'file_url': '/f/m1.pdf'}}
+    client = app_module.app.test_client()
+    assert client.get('/api/search?q=physics').get_json()['total'] == 1
+    fake_firebase.write('materials', 'add', 'm2', {'title': 'Physics past paper'}, notify=False)
+    assert client.get('/api/search?q=physics').get_json()['total'] == 2
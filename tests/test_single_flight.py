@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from utils.single_flight import SingleFlight, call_key_builder, coalesced
+
+
+def run_concurrently(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def run(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_identical_calls_run_once():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def read():
+        calls.append(1)
+        release.wait(5)
+        return [{'id': 'c1'}]
+
+    threads, results, errors = run_concurrently(5, lambda: flight.do(('get_all_classes',), read))
+    while flight.snapshot()['calls'] < 5:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == [[{'id': 'c1'}]] * 5
+    # Waiters get copies, not the leader's list
+    assert len({id(result) for result in results}) == 5
+    assert flight.snapshot() == {'calls': 5, 'executed': 1, 'collapsed': 4, 'timeouts': 0, 'in_flight': 0}
+
+
+def test_waiters_share_the_leaders_error():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def read():
+        release.wait(5)
+        raise RuntimeError('deadline exceeded')
+
+    threads, results, errors = run_concurrently(3, lambda: flight.do(('k',), read))
+    while flight.snapshot()['calls'] < 3:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    # Nothing stays in flight after a failure
+    assert flight.do(('k',), lambda: 'ok') == 'ok'
+
+
+def test_a_waiter_gives_up_on_a_stuck_leader():
+    flight = SingleFlight(timeouts={'slow': 0.05})
+    stuck = threading.Event()
+    leader = threading.Thread(target=flight.do, args=(('slow',), lambda: stuck.wait(5)))
+    leader.start()
+    while flight.snapshot()['in_flight'] == 0:
+        pass
+    assert flight.do(('slow',), lambda: 'own result') == 'own result'
+    assert flight.snapshot()['timeouts'] == 1
+    stuck.set()
+    leader.join()
+
+
+class Manager:
+    def __init__(self):
+        self.single_flight = SingleFlight()
+
+    @coalesced
+    def get_announcements(self, limit=5):
+        return limit
+
+
+def test_keys_bind_positional_and_keyword_arguments_alike():
+    key_for = call_key_builder(Manager.get_announcements.__wrapped__)
+    manager = Manager()
+    assert key_for(manager, (5,), {}) == key_for(manager, (), {'limit': 5}) == key_for(manager, (), {})
+    assert key_for(manager, (10,), {}) != key_for(manager, (), {})
+    assert manager.get_announcements(limit=7) == 7
+    with pytest.raises(TypeError):
+        manager.get_announcements(unknown=1)
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from utils.site_snapshot import (RECENT_ANNOUNCEMENTS, apply_write, build_snapshot, items,
+                                 merge_announcements, recent_announcements)
+
+START = datetime(2026, 1, 1)
+
+
+def announcement(i):
+    return f'a{i:02d}', {'title': f'Notice {i}', 'timestamp': START + timedelta(days=i)}
+
+
+def test_snapshot_mirrors_the_collections():
+    snapshot = build_snapshot({'phone': '123'}, [announcement(1)], [('c1', {'title': 'Maths'})], [], [])
+    assert snapshot['settings'] == {'phone': '123'}
+    assert items(snapshot, 'classes') == [{'title': 'Maths', 'id': 'c1'}]
+    assert items(snapshot, 'camps') == []
+
+
+def test_only_the_newest_announcements_are_kept():
+    snapshot = build_snapshot({}, [announcement(i) for i in range(RECENT_ANNOUNCEMENTS + 5)], [], [], [])
+    recent = recent_announcements(snapshot, 100)
+    assert len(recent) == RECENT_ANNOUNCEMENTS
+    assert recent[0]['id'] == f'a{RECENT_ANNOUNCEMENTS + 4:02d}' and recent[-1]['id'] == 'a05'
+
+    doc_id, data = announcement(99)
+    apply_write(snapshot, 'announcements', 'add', doc_id, data)
+    assert recent_announcements(snapshot, 1)[0]['id'] == 'a99'
+    assert len(snapshot['announcements']) == RECENT_ANNOUNCEMENTS
+
+
+def test_writes_fold_into_the_snapshot():
+    snapshot = build_snapshot({'phone': '123'}, [], [('c1', {'title': 'Maths', 'time': '09:00'})], [], [])
+    apply_write(snapshot, 'classes', 'update', 'c1', {'title': 'Algebra'})
+    apply_write(snapshot, 'camps', 'add', 'k1', {'title': 'Winter'})
+    apply_write(snapshot, 'settings', 'update', 'default', {'email': 'a@b.c'})
+    apply_write(snapshot, 'users', 'add', 'u1', {'name': 'ignored'})
+    assert snapshot['classes']['c1'] == {'title': 'Algebra', 'time': '09:00'}
+    assert snapshot['camps']['k1'] == {'title': 'Winter'}
+    assert snapshot['settings'] == {'phone': '123', 'email': 'a@b.c'}
+    assert 'users' not in snapshot
+
+    apply_write(snapshot, 'classes', 'delete', 'c1')
+    apply_write(snapshot, 'settings', 'delete', 'default')
+    assert snapshot['classes'] == {} and snapshot['settings'] == {}
+
+
+def test_a_delete_can_be_refilled_from_the_collection():
+    snapshot = build_snapshot({}, [announcement(i) for i in range(3)], [], [], [])
+    apply_write(snapshot, 'announcements', 'delete', 'a02')
+    merge_announcements(snapshot, [announcement(1), announcement(0)])
+    assert [a['id'] for a in recent_announcements(snapshot, 5)] == ['a01', 'a00']
+    # Already present documents keep the snapshot's copy
+    assert snapshot['announcements']['a01']['title'] == 'Notice 1'
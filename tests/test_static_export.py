@@ -0,0 +1,61 @@
+from flask import Flask
+
+from utils.cost_accounting import STATIC_EXPORT
+from utils.static_export import PAGES, StaticExport
+
+
+def make_app(content):
+    app = Flask(__name__)
+    for endpoint, (url, _) in PAGES.items():
+        app.add_url_rule(url, endpoint, lambda: content[0])
+    return app
+
+
+def read(export, endpoint):
+    with open(export.path_for(endpoint), 'rb') as f:
+        return f.read()
+
+
+def test_pages_are_written_where_a_static_server_expects_them(tmp_path):
+    export = StaticExport(make_app(['hello']), str(tmp_path))
+    assert export.build() == list(PAGES)
+    assert (tmp_path / 'index.html').read_text() == 'hello'
+    assert (tmp_path / 'calendar' / 'index.html').read_text() == 'hello'
+
+
+def test_a_new_release_rebuilds_every_page(tmp_path):
+    content = ['v1']
+    StaticExport(make_app(content), str(tmp_path), release='r1').refresh()
+
+    content[0] = 'v2'
+    same = StaticExport(make_app(content), str(tmp_path), release='r1')
+    assert same.is_current()
+    assert same.refresh() == []
+    assert read(same, 'about') == b'v1'
+
+    deployed = StaticExport(make_app(content), str(tmp_path), release='r2')
+    assert not deployed.is_current()
+    assert deployed.refresh() == list(PAGES)
+    assert read(deployed, 'about') == b'v2'
+    assert deployed.is_current()
+
+
+def test_a_partial_rebuild_does_not_mark_the_release_current(tmp_path):
+    app = make_app(['v1'])
+    export = StaticExport(app, str(tmp_path), release='r1')
+    app.view_functions['camps'] = lambda: ('down', 500)
+    export.refresh()
+    assert export.exists('about') and not export.exists('camps')
+    assert not export.is_current()
+
+
+def test_export_renders_are_not_counted_as_visitor_requests(fake_firebase, app_module, tmp_path):
+    fake_firebase.data['classes'] = {'c1': {'title': 'Maths', 'date': '2026-03-02'}}
+    export = StaticExport(app_module.app, str(tmp_path), breaker=fake_firebase.breaker)
+    assert export.render('calendar')
+    routes = fake_firebase.costs.report()['routes']
+    assert routes[STATIC_EXPORT]['reads'] >= 1
+    assert 'calendar' not in routes
+
+    app_module.app.test_client().get('/calendar')
+    assert fake_firebase.costs.report()['routes']['calendar']['requests'] == 1
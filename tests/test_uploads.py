@@ -0,0 +1,117 @@
+import hashlib
+import os
+
+import pytest
+
+from utils.uploads import PART_NAME, ResumableUploads, UploadError
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+
+
+def sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def uploads(tmp_path):
+    return ResumableUploads(str(tmp_path), max_size=len(DATA) * 2, chunk_size=4096)
+
+
+def send(uploads, upload_id, offset, chunk):
+    return uploads.write_chunk(upload_id, offset, chunk, sha(chunk))
+
+
+def test_chunks_at_the_right_offsets_assemble_the_file(uploads):
+    upload_id = uploads.create('notes.pdf', len(DATA), sha(DATA))['upload_id']
+    offset = 0
+    while offset < len(DATA):
+        offset = send(uploads, upload_id, offset, DATA[offset:offset + 4096])
+    assert uploads.status(upload_id)['complete']
+    path, meta = uploads.complete(upload_id)
+    with open(path, 'rb') as f:
+        assert f.read() == DATA
+    assert meta['filename'] == 'notes.pdf'
+
+
+def test_a_replayed_chunk_is_refused_with_the_offset_to_resume_from(uploads):
+    upload_id = uploads.create('notes.pdf', len(DATA))['upload_id']
+    send(uploads, upload_id, 0, DATA[:4096])
+    # The client lost the response and sends the same chunk again
+    with pytest.raises(UploadError) as error:
+        send(uploads, upload_id, 0, DATA[:4096])
+    assert (error.value.status, error.value.offset) == (409, 4096)
+    with pytest.raises(UploadError) as error:
+        send(uploads, upload_id, 8192, DATA[8192:])
+    assert error.value.status == 409
+    assert uploads.status(upload_id)['offset'] == 4096
+
+
+def test_a_corrupted_chunk_is_not_written(uploads):
+    upload_id = uploads.create('notes.pdf', len(DATA))['upload_id']
+    with pytest.raises(UploadError) as error:
+        uploads.write_chunk(upload_id, 0, DATA[:4096], sha(b'something else'))
+    assert error.value.status == 422
+    with pytest.raises(UploadError):
+        uploads.write_chunk(upload_id, 0, DATA[:4096], None)
+    assert uploads.status(upload_id)['offset'] == 0
+
+
+def test_sizes_are_enforced(uploads):
+    with pytest.raises(UploadError) as error:
+        uploads.create('big.pdf', uploads.max_size + 1)
+    assert error.value.status == 413
+    with pytest.raises(UploadError):
+        uploads.create('empty.pdf', 0)
+
+    upload_id = uploads.create('notes.pdf', 100)['upload_id']
+    with pytest.raises(UploadError) as error:
+        send(uploads, upload_id, 0, DATA[:101])
+    assert error.value.status == 413
+
+
+def test_the_whole_file_checksum_is_checked_on_completion(uploads):
+    upload_id = uploads.create('notes.pdf', 4096, sha(b'not the file'))['upload_id']
+    with pytest.raises(UploadError) as error:
+        uploads.complete(upload_id)
+    assert (error.value.status, error.value.offset) == (409, 0)
+    send(uploads, upload_id, 0, DATA[:4096])
+    with pytest.raises(UploadError) as error:
+        uploads.complete(upload_id)
+    assert error.value.status == 422
+
+
+def test_ids_cannot_name_paths_outside_the_folder(uploads):
+    for bad in ('../etc', '', 'ABC', 'a/b'):
+        with pytest.raises(UploadError) as error:
+            uploads.status(bad)
+        assert error.value.status == 404
+
+
+def test_abandoned_uploads_are_cleaned_up(uploads):
+    upload_id = uploads.create('notes.pdf', len(DATA))['upload_id']
+    directory = os.path.join(uploads.folder, upload_id)
+    for path in (directory, os.path.join(directory, PART_NAME), os.path.join(directory, 'meta.json')):
+        os.utime(path, (0, 0))
+    assert uploads.cleanup() == 1
+    assert not os.path.exists(directory)
+
+
+def test_resumable_limit_defaults_to_the_request_limit(app_module):
+    config = app_module.app.config
+    assert config['RESUMABLE_UPLOAD_MAX_SIZE'] == config['MAX_CONTENT_LENGTH']
+    assert app_module.resumable_uploads.max_size == config['MAX_CONTENT_LENGTH']
+
+
+def test_upload_api_reports_offsets(fake_firebase, admin_client):
+    created = admin_client.post('/admin/api/uploads', data={'filename': 'notes.pdf', 'size': 8192})
+    assert created.status_code == 201
+    upload_id = created.get_json()['upload_id']
+    url = f'/admin/api/uploads/{upload_id}'
+    ok = admin_client.put(url, data=DATA[:4096], headers={'Upload-Offset': '0', 'X-Chunk-SHA256': sha(DATA[:4096])})
+    assert ok.get_json()['offset'] == 4096
+    stale = admin_client.put(url, data=DATA[:4096], headers={'Upload-Offset': '0', 'X-Chunk-SHA256': sha(DATA[:4096])})
+    assert stale.status_code == 409 and stale.get_json()['offset'] == 4096
+    assert admin_client.put(url, data=b'x').status_code == 400
+    assert admin_client.get(url).get_json()['offset'] == 4096
+    assert admin_client.delete(url).status_code == 204
+    assert admin_client.get(url).status_code == 404
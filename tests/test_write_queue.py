@@ -0,0 +1,135 @@
+import pytest
+
+from fakes import FakeFirebase
+from utils.calendar_index import CalendarIndex
+from utils.search_index import SearchIndex
+from utils.write_queue import DONE, FAILED, PENDING, WriteQueue
+
+
+@pytest.fixture
+def firebase():
+    return FakeFirebase()
+
+
+@pytest.fixture
+def queue(firebase, tmp_path, monkeypatch):
+    queue = WriteQueue(str(tmp_path / 'queue.sqlite3'), firebase, max_attempts=2)
+    monkeypatch.setattr(queue, 'ensure_running', lambda: None)  # drained by the tests
+    firebase.pending_writes = queue
+    return queue
+
+
+def statuses(queue):
+    return {op['id']: op['status'] for op in queue.list((PENDING, FAILED, DONE))}
+
+
+def make_due(queue):
+    with queue._connect() as conn:
+        conn.execute('UPDATE writes SET next_attempt_at = 0')
+
+
+def test_writes_apply_in_batches_and_show_until_then(queue, firebase):
+    queue.submit('classes', 'add', {'title': 'Maths'}, doc_id='c1')
+    queue.submit('camps', 'add', {'title': 'Winter'}, doc_id='k1')
+    assert [op['doc_id'] for op in queue.pending_ops('classes')] == ['c1']
+    assert queue.drain_once() == 2
+    assert firebase.data == {'classes': {'c1': {'title': 'Maths'}}, 'camps': {'k1': {'title': 'Winter'}}}
+    assert queue.pending_ops('classes') == []
+
+
+def test_a_write_waits_for_an_earlier_retried_write_to_its_document(queue, firebase):
+    first = queue.submit('settings', 'update', {'title': 'Old'}, doc_id='default')
+    firebase.fail_apply = RuntimeError('deadline exceeded')
+    assert queue.drain_once() == 0
+    assert statuses(queue)[first] == PENDING  # backing off
+
+    firebase.fail_apply = None
+    queue.submit('settings', 'update', {'title': 'New'}, doc_id='default')
+    queue.submit('classes', 'delete', doc_id='c1')
+    assert queue.drain_once() == 1
+    assert firebase.applied == [('classes', 'delete', 'c1', None)]
+
+    make_due(queue)
+    assert queue.drain_once() == 2
+    assert [data for _, _, _, data in firebase.applied[1:]] == [{'title': 'Old'}, {'title': 'New'}]
+    assert firebase.data['settings']['default'] == {'title': 'New'}
+
+
+def test_a_failed_write_in_a_batch_holds_back_later_writes_to_its_document(queue, firebase):
+    queue.submit('classes', 'add', {'title': 'Maths'}, doc_id='c1')
+    queue.submit('classes', 'update', {'title': 'Algebra'}, doc_id='c1')
+    queue.submit('classes', 'add', {'title': 'Art'}, doc_id='c2')
+    firebase.failing_docs = {'c1'}
+    assert queue.drain_once() == 1
+    assert [doc_id for _, _, doc_id, _ in firebase.applied] == ['c2']
+
+    # Given up on: the later write to c1 stays queued behind it until it is discarded
+    make_due(queue)
+    assert queue.drain_once() == 0
+    failed = [op for op in queue.list((FAILED,))]
+    assert [op['data'] for op in failed] == [{'title': 'Maths'}]
+
+    firebase.failing_docs = set()
+    make_due(queue)
+    assert queue.drain_once() == 0
+    queue.discard(failed[0]['id'])
+    assert queue.drain_once() == 1
+    assert firebase.applied[-1] == ('classes', 'update', 'c1', {'title': 'Algebra'})
+
+
+def test_indexes_apply_queued_writes_in_place(queue, firebase, tmp_path):
+    firebase.data['classes'] = {'c1': {'title': 'Maths', 'date': '2026-03-02'}}
+    calendar = CalendarIndex(firebase)
+    search = SearchIndex(str(tmp_path / 'index.json'), str(tmp_path), firebase)
+    firebase.add_listener(calendar.on_write)
+    firebase.add_listener(search.on_write)
+    calendar.all()
+    search.ensure_current()
+    reads = firebase.reads
+
+    queue.submit('classes', 'add', {'title': 'Art', 'date': '2026-03-01'}, doc_id='c2')
+    assert [c['title'] for c in calendar.all()] == ['Art', 'Maths']
+    search.ensure_current()
+    assert [r['id'] for r in search.search('art')[0]] == ['c2']
+
+    # Applying it is the next version step; nothing is reread
+    assert queue.drain_once() == 1
+    assert [c['title'] for c in calendar.all()] == ['Art', 'Maths']
+    search.ensure_current()
+    assert [r['id'] for r in search.search('art')[0]] == ['c2']
+    assert firebase.reads == reads
+
+
+def test_dropped_writes_invalidate_reads_and_tell_listeners(queue, firebase):
+    dropped = []
+    queue.add_drop_listener(dropped.append)
+    op_id = queue.submit('camps', 'add', {'title': 'Winter'}, doc_id='k1')
+    assert firebase.get_all_camps() == [{'title': 'Winter', 'id': 'k1', 'pending': True}]
+
+    firebase.fail_apply = RuntimeError('permission denied')
+    queue.drain_once()
+    make_due(queue)
+    queue.drain_once()
+    assert statuses(queue)[op_id] == FAILED
+    assert dropped == ['camps']
+    assert firebase.get_all_camps() == []
+
+    queue.discard(op_id)
+    assert dropped == ['camps', 'camps']
+    assert queue.list() == []
+
+
+def test_an_open_breaker_postpones_without_using_attempts(queue, firebase):
+    op_id = queue.submit('classes', 'delete', doc_id='c1')
+    firebase.trip()
+    assert queue.drain_once() == 0
+    op = queue.list()[0]
+    assert op['id'] == op_id and op['status'] == PENDING and op['attempts'] == 0
+
+
+def test_a_crashed_workers_claim_is_retried(queue, firebase):
+    queue.submit('classes', 'delete', doc_id='c1')
+    assert len(queue._claim()) == 1  # claimed, then the worker died
+    assert queue.drain_once() == 0
+    queue.claim_timeout = -1
+    assert queue.drain_once() == 1
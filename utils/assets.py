@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import time
+
+from utils.html_minify import minify_css, minify_js
+
+# Bundle name -> source files (relative to the static folder), concatenated in order
+BUNDLES = {
+    'site.css': ['css/style.css', 'css/base.css'],
+    'site.js': ['js/main.js'],
+    'index.css': ['css/pages/index.css'],
+    'calendar.css': ['css/pages/calendar.css'],
+    'calendar.js': ['js/pages/calendar.js'],
+    'camps.css': ['css/pages/camps.css'],
+    'camps.js': ['js/pages/camps.js'],
+    'materials.css': ['css/pages/materials.css'],
+    'materials.js': ['js/pages/materials.js'],
+    'contact.js': ['js/pages/contact.js'],
+    'admin-dashboard.js': ['js/pages/admin-dashboard.js'],
+    'admin-upload.js': ['js/pages/admin-upload.js'],
+    'about.css': ['css/pages/about.css'],
+    'login.css': ['css/pages/login.css'],
+    'search.css': ['css/pages/search.css'],
+}
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+FAR_FUTURE_MAX_AGE = 365 * 24 * 3600
+# Cached and exported pages still name the bundles they were rendered with
+RETIRED_MAX_AGE = 7 * 24 * 3600
+
+
+def build_bundle(static_folder, name):
+    """Concatenate and minify one bundle's sources, returning its text."""
+    minify = minify_css if name.endswith('.css') else minify_js
+    parts = []
+    for source in BUNDLES[name]:
+        with open(os.path.join(static_folder, source), 'r', encoding='utf-8') as f:
+            parts.append(minify(f.read()))
+    # A newline (and ';' for scripts) keeps one file's last statement from running into the next
+    separator = '\n' if name.endswith('.css') else ';\n'
+    return separator.join(parts) + '\n'
+
+
+def fingerprinted_name(name, content):
+    """site.css + content -> site.<hash>.css"""
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{digest}{ext}'
+
+
+class AssetManifest:
+    """Maps bundle names to their content-hashed files under static/dist.
+
+    Files a new build no longer uses are kept for keep_retired seconds after
+    they left the manifest, so pages rendered before the deploy still load.
+    """
+
+    def __init__(self, static_folder, keep_retired=RETIRED_MAX_AGE):
+        self.static_folder = static_folder
+        self.keep_retired = keep_retired
+        self.dist_folder = os.path.join(static_folder, DIST_DIR)
+        self.manifest_path = os.path.join(self.dist_folder, MANIFEST_NAME)
+        self.files = {}      # bundle name -> fingerprinted file name
+        self.memory = {}     # fingerprinted file name -> content, when dist isn't writable
+
+    def build(self):
+        """Write every bundle to static/dist and record them in manifest.json."""
+        os.makedirs(self.dist_folder, exist_ok=True)
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                previous = set(json.load(f).values())
+        except (OSError, ValueError):
+            previous = set()
+        files = {}
+        for name in BUNDLES:
+            content = build_bundle(self.static_folder, name)
+            filename = fingerprinted_name(name, content)
+            path = os.path.join(self.dist_folder, filename)
+            if not os.path.exists(path):
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+            files[name] = filename
+
+        # Retired bundles: stamp the ones leaving now, drop those retired long enough ago
+        now = time.time()
+        for filename in os.listdir(self.dist_folder):
+            if filename == MANIFEST_NAME or filename in files.values():
+                continue
+            path = os.path.join(self.dist_folder, filename)
+            if filename in previous:
+                os.utime(path, (now, now))
+            elif now - os.path.getmtime(path) > self.keep_retired:
+                os.remove(path)
+
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(files, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+        self.files = files
+        self.memory = {}
+        return files
+
+    def build_in_memory(self):
+        """Build bundles without touching disk (read-only deployments)."""
+        self.files = {}
+        self.memory = {}
+        for name in BUNDLES:
+            content = build_bundle(self.static_folder, name)
+            filename = fingerprinted_name(name, content)
+            self.files[name] = filename
+            self.memory[filename] = content
+
+    def is_stale(self):
+        """True if the manifest is missing or older than any bundle source."""
+        try:
+            built_at = os.path.getmtime(self.manifest_path)
+        except OSError:
+            return True
+        for sources in BUNDLES.values():
+            for source in sources:
+                if os.path.getmtime(os.path.join(self.static_folder, source)) > built_at:
+                    return True
+        return False
+
+    def load(self):
+        """Use the manifest on disk, rebuilding it first if the sources changed."""
+        if self.is_stale():
+            try:
+                self.build()
+                print(f"[INIT] Asset bundles built in {self.dist_folder}")
+            except OSError as e:
+                print(f"[WARNING] Could not write asset bundles ({e}); serving them from memory")
+                self.build_in_memory()
+            return
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            self.files = json.load(f)
+
+    def filename(self, name):
+        """Fingerprinted file name for a bundle."""
+        return self.files[name]
@@ -0,0 +1,291 @@
+import base64
+import json
+import os
+import pickle
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from functools import wraps
+
+from utils.single_flight import call_key_builder
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+MISS = object()
+
+
+def _encode(value):
+    # Firestore timestamps are datetime subclasses; file contents may be bytes
+    if isinstance(value, datetime):
+        return {'__type__': 'datetime', 'value': value.isoformat()}
+    if isinstance(value, date):
+        return {'__type__': 'date', 'value': value.isoformat()}
+    if isinstance(value, bytes):
+        return {'__type__': 'bytes', 'value': base64.b64encode(value).decode('ascii')}
+    raise TypeError(f'{type(value).__name__} values are not cached in Redis')
+
+
+def _decode(obj):
+    kind = obj.get('__type__')
+    if kind == 'datetime':
+        return datetime.fromisoformat(obj['value'])
+    if kind == 'date':
+        return date.fromisoformat(obj['value'])
+    if kind == 'bytes':
+        return base64.b64decode(obj['value'])
+    return obj
+
+
+def dumps(value):
+    """JSON for what goes into Redis; raises TypeError for values JSON can't carry."""
+    return json.dumps(value, default=_encode, separators=(',', ':'))
+
+
+def loads(data):
+    return json.loads(data, object_hook=_decode)
+
+
+class LocalCache:
+    """Per-process read cache. Each gunicorn worker holds its own copy.
+
+    Values are stored pickled so every reader gets a fresh object it may mutate.
+    """
+
+    shared = False
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.token = f'{int(time.time()):x}{os.getpid():x}'
+        self._lock = threading.Lock()
+        self._entries = {}   # collection -> {key: (expires_at, pickled value)}
+        self._versions = {}
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def get(self, collection, key):
+        with self._lock:
+            entry = self._entries.get(collection, {}).get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.stats['misses'] += 1
+                return MISS
+            self.stats['hits'] += 1
+        return pickle.loads(entry[1])
+
+    def set(self, collection, key, value, version):
+        """Store a value read at `version`; dropped if the collection changed meanwhile."""
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if self._versions.get(collection, 0) == version:
+                self._entries.setdefault(collection, {})[key] = (time.monotonic() + self.ttl, data)
+
+    def get_version(self, collection):
+        with self._lock:
+            return self._versions.get(collection, 0)
+
+    def invalidate(self, collection):
+        """Drop every cached read of a collection and bump its version."""
+        with self._lock:
+            self._entries.pop(collection, None)
+            self._versions[collection] = self._versions.get(collection, 0) + 1
+            self.stats['invalidations'] += 1
+
+    def publish(self, event):
+        """Nothing to broadcast: listeners in this process are called directly."""
+
+    def subscribe(self, callback):
+        """No other processes share this cache."""
+
+    def ensure_subscribed(self):
+        """Nothing to listen to."""
+
+    def after_fork(self):
+        """Nothing to reconnect."""
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, backend='local',
+                        entries=sum(len(e) for e in self._entries.values()))
+
+
+class RedisCache:
+    """Read cache shared by all workers through Redis.
+
+    Each collection's cached reads live in one hash, so invalidating a
+    collection is a single DEL. Redis can't expire single hash fields, so each
+    field carries its own expiry time and is treated as a miss after it.
+    Values are JSON, never pickles: whoever can write to Redis must not be able
+    to run code in the workers. Versions are Redis counters, so every worker
+    builds the same ETags. Write events go out on a pub/sub channel, so the
+    other workers' listeners (search index, feeds, ...) also run.
+    """
+
+    shared = True
+
+    def __init__(self, url, ttl=300, prefix='nie'):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis needs the 'redis' package")
+        self.ttl = ttl
+        self.prefix = prefix
+        self.channel = f'{prefix}:events'
+        self.node_id = uuid.uuid4().hex
+        self.client = redis.Redis.from_url(url)
+        # Changes when Redis loses its data, so old ETags can't match reset counters
+        self.client.set(f'{prefix}:epoch', uuid.uuid4().hex[:8], nx=True)
+        self.token = self.client.get(f'{prefix}:epoch').decode()
+        self._subscriber = None
+        self._subscriber_pid = None
+        self._subscribe_lock = threading.Lock()
+        self._callback = None
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'remote_events': 0}
+
+    def _hash(self, collection):
+        return f'{self.prefix}:cache:{collection}'
+
+    def _version_key(self, collection):
+        return f'{self.prefix}:version:{collection}'
+
+    def get(self, collection, key):
+        try:
+            data = self.client.hget(self._hash(collection), repr(key))
+        except redis.RedisError as e:
+            print(f"[WARNING] Redis cache read failed: {e}")
+            return MISS
+        try:
+            entry = loads(data) if data is not None else None
+        except ValueError:
+            entry = {'expires_at': 0}  # e.g. written by an older release; drop it
+        if entry is None or entry['expires_at'] < time.time():
+            if entry is not None:
+                try:
+                    self.client.hdel(self._hash(collection), repr(key))
+                except redis.RedisError:
+                    pass
+            self.stats['misses'] += 1
+            return MISS
+        self.stats['hits'] += 1
+        return entry['value']
+
+    def set(self, collection, key, value, version):
+        # Check-then-set: a write landing between the two calls leaves at most
+        # one stale entry, which the next invalidation or its expiry removes
+        try:
+            data = dumps({'expires_at': time.time() + self.ttl, 'value': value})
+        except (TypeError, ValueError) as e:
+            print(f"[WARNING] Not caching {collection} read: {e}")
+            return
+        try:
+            if version is None or self.get_version(collection) != version:
+                return
+            pipe = self.client.pipeline()
+            pipe.hset(self._hash(collection), repr(key), data)
+            # Only cleans up: the hash goes once nothing was stored in it for a TTL
+            pipe.expire(self._hash(collection), self.ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"[WARNING] Redis cache write failed: {e}")
+
+    def get_version(self, collection):
+        """Current version, or None if Redis can't be reached (callers must not cache then)."""
+        try:
+            return int(self.client.get(self._version_key(collection)) or 0)
+        except redis.RedisError as e:
+            print(f"[WARNING] Redis version read failed: {e}")
+            return None
+
+    def invalidate(self, collection):
+        try:
+            pipe = self.client.pipeline()
+            pipe.delete(self._hash(collection))
+            pipe.incr(self._version_key(collection))
+            pipe.execute()
+            self.stats['invalidations'] += 1
+        except redis.RedisError as e:
+            # Entries still expire after the TTL
+            print(f"[ERROR] Redis cache invalidation failed for {collection}: {e}")
+
+    def publish(self, event):
+        """Broadcast a write event to the other workers."""
+        message = dict(event, origin=self.node_id)
+        try:
+            self.client.publish(self.channel, json.dumps(message, default=str))
+        except redis.RedisError as e:
+            print(f"[ERROR] Failed to publish cache event: {e}")
+
+    def subscribe(self, callback):
+        """Call callback(event) for write events published by other workers.
+
+        Listening starts with the first ensure_subscribed() in each process, so a
+        master that preloads the app never runs write listeners itself.
+        """
+        self._callback = callback
+
+    def ensure_subscribed(self):
+        """Start this process's subscriber thread (again after a fork)."""
+        if self._callback is None:
+            return
+        with self._subscribe_lock:
+            if (self._subscriber is not None and self._subscriber_pid == os.getpid()
+                    and self._subscriber.is_alive()):
+                return
+            callback = self._callback
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+
+            def handle(message):
+                try:
+                    event = json.loads(message['data'])
+                    if event.pop('origin', None) == self.node_id:
+                        return
+                    self.stats['remote_events'] += 1
+                    callback(event)
+                except Exception as e:
+                    print(f"[ERROR] Failed to handle cache event: {e}")
+
+            pubsub.subscribe(**{self.channel: handle})
+            self._subscriber_pid = os.getpid()
+            self._subscriber = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def after_fork(self):
+        """Tell a forked worker's events apart from its siblings'.
+
+        redis-py already replaces pooled connections when it sees a new pid; the
+        subscriber thread starts on the worker's first ensure_subscribed().
+        """
+        self.node_id = uuid.uuid4().hex
+
+    def snapshot(self):
+        return dict(self.stats, backend='redis')
+
+
+def make_cache(backend='local', url=None, ttl=300, workers=1):
+    """Build the cache named by CACHE_BACKEND.
+
+    Several worker processes each holding a local cache would keep serving
+    reads another worker's write made stale, so that combination is refused.
+    """
+    if backend == 'redis':
+        return RedisCache(url or 'redis://localhost:6379/0', ttl=ttl)
+    if workers > 1:
+        raise RuntimeError(f"CACHE_BACKEND={backend} can't be shared by {workers} workers; use redis")
+    return LocalCache(ttl=ttl)
+
+
+def cached(collection):
+    """Serve a FirebaseManager read from self.cache, filling it on a miss."""
+    def decorator(method):
+        key_for = call_key_builder(method)
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = key_for(self, args, kwargs)
+            value = self.cache.get(collection, key)
+            if value is not MISS:
+                return value
+            version = self.cache.get_version(collection)
+            value = method(self, *args, **kwargs)
+            self.cache.set(collection, key, value, version)
+            return value
+        return wrapper
+    return decorator
@@ -0,0 +1,216 @@
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, time, timedelta
+from time import monotonic
+
+from utils.schedule import camp_dates, class_start, parse_date
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+
+def _camp_start(camp_data):
+    start, _ = camp_dates(camp_data)
+    return datetime.combine(start, time()) if start else None
+
+
+# Collection -> function giving a document's start as a naive local datetime
+START_OF = {
+    'classes': class_start,
+    'camps': _camp_start,
+}
+
+
+class SortedSeries:
+    """Documents of one collection kept ordered by start time.
+
+    Keys are (start, doc_id) tuples in a sorted list, so a range lookup is two
+    bisections plus the slice it returns. Documents without a parseable date are
+    kept apart and listed after the dated ones.
+    """
+
+    def __init__(self, start_of):
+        self.start_of = start_of
+        self._keys = []       # sorted (start, doc_id)
+        self._docs = {}       # doc_id -> (start or None, data)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def put(self, doc_id, data):
+        self.remove(doc_id)
+        data = dict(data, id=doc_id)
+        start = self.start_of(data)
+        self._docs[doc_id] = (start, data)
+        if start is not None:
+            insort(self._keys, (start, doc_id))
+
+    def get(self, doc_id):
+        entry = self._docs.get(doc_id)
+        return entry[1] if entry is not None else None
+
+    def remove(self, doc_id):
+        entry = self._docs.pop(doc_id, None)
+        if entry is None or entry[0] is None:
+            return
+        i = bisect_left(self._keys, (entry[0], doc_id))
+        if i < len(self._keys) and self._keys[i] == (entry[0], doc_id):
+            del self._keys[i]
+
+    def between(self, start, end):
+        """Documents starting in [start, end), in order."""
+        lo = bisect_left(self._keys, (start,))
+        hi = bisect_left(self._keys, (end,))
+        return [self._docs[doc_id][1] for _, doc_id in self._keys[lo:hi]]
+
+    def next(self, after, count):
+        """The first `count` documents starting at or after `after`."""
+        lo = bisect_left(self._keys, (after,))
+        return [self._docs[doc_id][1] for _, doc_id in self._keys[lo:lo + count]]
+
+    def all(self):
+        """Every document: dated ones in order, then undated ones."""
+        dated = [self._docs[doc_id][1] for _, doc_id in self._keys]
+        undated = [data for start, data in self._docs.values() if start is None]
+        return dated + undated
+
+
+class CalendarIndex:
+    """Classes and camps ordered by their parsed start, for the calendar and camps pages.
+
+    Each series is loaded from the (cached) Firestore read and remembers the
+    collection's cache version. A lookup reloads it once the version moves
+    on, so writes made by other workers (or queued, or while this one was
+    down) show up. A write event that is the only change since the load is
+    applied in place. A series read while the circuit breaker served
+    fallback data is used for that lookup but not kept.
+
+    A per-process cache never sees other processes' writes move its version,
+    so with one a series is also reloaded once it is older than the cache TTL.
+    """
+
+    def __init__(self, firebase, tz_name='Africa/Johannesburg'):
+        self.firebase = firebase
+        self.tz = None
+        if ZoneInfo is not None:
+            try:
+                self.tz = ZoneInfo(tz_name)
+            except Exception:
+                self.tz = None
+        self._lock = threading.Lock()
+        self._series = {}     # collection -> SortedSeries
+        self._versions = {}   # collection -> cache version the series reflects
+        self._loaded_at = {}  # collection -> monotonic time the series was read
+
+    def now(self):
+        """Current wall-clock time in the site's timezone, naive like the indexed starts."""
+        return datetime.now(self.tz).replace(tzinfo=None)
+
+    def _version(self, collection):
+        return self.firebase.cache.get_version(collection) if self.firebase else 0
+
+    def _expired(self, collection):
+        cache = self.firebase.cache if self.firebase else None
+        if cache is None or cache.shared:
+            return False
+        return monotonic() - self._loaded_at.get(collection, 0) >= cache.ttl
+
+    def _load(self, collection):
+        """(series, trustworthy) read from Firestore."""
+        series = SortedSeries(START_OF[collection])
+        if not self.firebase:
+            return series, True
+        read = {'classes': self.firebase.get_all_classes, 'camps': self.firebase.get_all_camps}[collection]
+        with self.firebase.breaker.watch() as reads:
+            documents = read()
+        for data in documents:
+            series.put(data.get('id'), data)
+        return series, not reads.degraded
+
+    def _get_series(self, collection):
+        # Caller holds the lock
+        version = self._version(collection)
+        series = self._series.get(collection)
+        # A version of None means the cache can't tell; don't trust what we hold
+        if (series is not None and version is not None and self._versions.get(collection) == version
+                and not self._expired(collection)):
+            return series
+        loaded_at = monotonic()
+        series, trustworthy = self._load(collection)
+        if trustworthy and version is not None:
+            self._series[collection] = series
+            self._versions[collection] = version
+            self._loaded_at[collection] = loaded_at
+        else:
+            self._series.pop(collection, None)
+            self._versions.pop(collection, None)
+            self._loaded_at.pop(collection, None)
+        return series
+
+    def reset(self):
+        """Forget everything; the next lookup reloads from Firestore."""
+        with self._lock:
+            self._series = {}
+            self._versions = {}
+            self._loaded_at = {}
+
+    def on_write(self, collection, action, doc_id, data=None):
+        """FirebaseManager listener: move one document within its series.
+
+        Only when this write is the single version change since the series
+        was loaded; otherwise the next lookup reloads it.
+        """
+        if collection not in START_OF:
+            return
+        with self._lock:
+            series = self._series.get(collection)
+            if series is None:
+                return
+            version = self._version(collection)
+            if version is None or self._versions.get(collection) != version - 1:
+                return
+            if action == 'delete':
+                series.remove(doc_id)
+            elif action == 'update':
+                series.put(doc_id, dict(series.get(doc_id) or {}, **(data or {})))
+            else:
+                series.put(doc_id, data or {})
+            self._versions[collection] = version
+
+    # ---------- lookups ----------
+
+    def all(self, collection='classes'):
+        with self._lock:
+            return self._get_series(collection).all()
+
+    def between(self, start, end, collection='classes'):
+        with self._lock:
+            return self._get_series(collection).between(start, end)
+
+    def upcoming(self, count, collection='classes'):
+        now = self.now()
+        with self._lock:
+            return self._get_series(collection).next(now, count)
+
+    def window(self, view, anchor=None, count=10, collection='classes'):
+        """(items, start, end) for a calendar view: 'week', 'month', 'upcoming' or 'all'.
+
+        Weeks run Monday to Sunday and months from the 1st, around `anchor`
+        (a date, default today). start/end are None for 'upcoming' and 'all'.
+        """
+        if view == 'upcoming':
+            return self.upcoming(count, collection), None, None
+        if view not in ('week', 'month'):
+            return self.all(collection), None, None
+
+        day = parse_date(anchor) or self.now().date()
+        if view == 'week':
+            start = day - timedelta(days=day.weekday())
+            end = start + timedelta(days=7)
+        else:
+            start = day.replace(day=1)
+            end = (start + timedelta(days=32)).replace(day=1)
+        items = self.between(datetime.combine(start, time()), datetime.combine(end, time()), collection)
+        return items, start, end
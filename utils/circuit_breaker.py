@@ -0,0 +1,190 @@
+import pickle
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from utils.single_flight import call_key_builder
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend the circuit breaker has given up on for now."""
+
+
+class FallbackWatch:
+    """Whether the reads made inside CircuitBreaker.watch() can be trusted.
+
+    degraded is True once any of them was answered by a fallback, or while the
+    breaker isn't closed. Results built from degraded reads may be shown, but
+    must not be cached, indexed or exported.
+    """
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+        self.fell_back = False
+
+    @property
+    def degraded(self):
+        return self.fell_back or self.breaker.state != CLOSED
+
+
+class CircuitBreaker:
+    """Stop calling a backend that keeps failing or slowing down, and probe for its recovery.
+
+    Closed: calls go through. `failure_threshold` consecutive failures, or
+    calls slower than `slow_call_seconds` (counted as failures), open it.
+    Open: calls raise CircuitOpenError at once. After `reset_timeout` seconds
+    it half-opens and lets a single probe call through; the probe's success
+    closes it again, its failure reopens it.
+
+    Guards nest: inside a guarded call (e.g. a transaction), the reads it makes
+    are part of that one call rather than separate ones.
+    """
+
+    def __init__(self, name, failure_threshold=5, slow_call_seconds=5.0, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self._probe_thread = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {'calls': 0, 'failures': 0, 'slow_calls': 0, 'rejected': 0, 'trips': 0}
+
+    def _allow(self):
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probe_thread = None
+                print(f"[BREAKER] {self.name} half-open; probing", file=sys.stderr)
+            if self.state == HALF_OPEN and self._probe_thread is None:
+                self._probe_thread = threading.get_ident()
+                self.stats['calls'] += 1
+                return
+            if self.state != CLOSED:
+                self.stats['rejected'] += 1
+                raise CircuitOpenError(f'{self.name} is unavailable (circuit {self.state})')
+            self.stats['calls'] += 1
+
+    def _record(self, duration, error):
+        with self._lock:
+            if self._probe_thread == threading.get_ident():
+                self._probe_thread = None
+            slow = error is None and duration > self.slow_call_seconds
+            if slow:
+                self.stats['slow_calls'] += 1
+                error = f'slow call ({duration:.1f}s)'
+            if error is None:
+                if self.state != CLOSED:
+                    print(f"[BREAKER] {self.name} closed; calls succeed again", file=sys.stderr)
+                self.state = CLOSED
+                self.failures = 0
+                return
+            self.stats['failures'] += 1
+            self.failures += 1
+            self.last_error = str(error)[:200]
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.stats['trips'] += 1
+                    print(f"[BREAKER] {self.name} open for {self.reset_timeout:g}s after "
+                          f"{self.failures} failure(s): {self.last_error}", file=sys.stderr)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def _release_probe(self):
+        with self._lock:
+            if self._probe_thread == threading.get_ident():
+                self._probe_thread = None
+
+    @contextmanager
+    def guard(self):
+        """Run the with-block as one call through the breaker."""
+        depth = getattr(self._local, 'depth', 0)
+        if depth:
+            self._local.depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.depth = depth
+            return
+
+        self._allow()
+        self._local.depth = 1
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self._record(time.monotonic() - started, e)
+            raise
+        except BaseException:
+            # e.g. GeneratorExit from a stream the caller stopped reading: no verdict
+            self._release_probe()
+            raise
+        else:
+            self._record(time.monotonic() - started, None)
+        finally:
+            self._local.depth = 0
+
+    @contextmanager
+    def watch(self):
+        """Yield a FallbackWatch for the reads this thread makes in the with-block."""
+        watches = self._local.__dict__.setdefault('watches', [])
+        current = FallbackWatch(self)
+        watches.append(current)
+        try:
+            yield current
+        finally:
+            watches.remove(current)
+
+    def note_fallback(self):
+        """Tell this thread's open watches that a read was answered by a fallback."""
+        for current in getattr(self._local, 'watches', ()):
+            current.fell_back = True
+
+    def retry_in(self):
+        """Seconds until an open breaker lets a probe through (0 unless open)."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+    def snapshot(self):
+        retry_in = self.retry_in()
+        with self._lock:
+            return dict(self.stats, state=self.state, consecutive_failures=self.failures,
+                        last_error=self.last_error, retry_in=round(retry_in, 1))
+
+
+def fails_fast_to(default_factory):
+    """Answer a FirebaseManager read from its last good result (or default_factory())
+    while self.breaker is open, instead of raising CircuitOpenError.
+
+    Fallback answers are reported to the thread's breaker watches, so callers
+    can tell them apart from real results.
+    """
+    def decorator(method):
+        key_for = call_key_builder(method)
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = key_for(self, args, kwargs)
+            try:
+                value = method(self, *args, **kwargs)
+            except CircuitOpenError:
+                self.breaker.note_fallback()
+                stored = self.last_good.get(key)
+                return pickle.loads(stored) if stored is not None else default_factory()
+            # Pickled, like the cache, so callers can't mutate the fallback copy
+            self.last_good[key] = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            return value
+        return wrapper
+    return decorator
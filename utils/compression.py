@@ -0,0 +1,144 @@
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_SIZE = 500
+STATIC_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/javascript',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+    'text/calendar',
+}
+
+
+def choose_encoding(accept_encodings):
+    """Pick the best encoding the client accepts: brotli if available, then gzip."""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, quality=None):
+    """Compress bytes with the given content-coding."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=5 if quality is None else quality)
+    return gzip.compress(data, compresslevel=6 if quality is None else min(quality, 9))
+
+
+def compress_response(response, accept_encodings, min_size=MIN_COMPRESS_SIZE):
+    """Compress a buffered response body in place if the client accepts it."""
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers or 'Content-Range' in response.headers):
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    encoding = choose_encoding(accept_encodings)
+    if encoding is None:
+        return response
+    etag, weak = response.get_etag()
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    if etag and not weak:
+        # The compressed bytes differ from what a strong tag promised; keep it as a weak one
+        response.set_etag(etag, weak=True)
+    return response
+
+
+class StaticCompressionCache:
+    """Compressed copies of static files, built once per file version.
+
+    Entries are keyed by path and mtime, so editing a file on disk replaces its
+    cached copy on the next request. Static files are compressed at maximum level
+    since the cost is paid only once. At most max_bytes of compressed data are
+    kept; the least recently used entries go first.
+    """
+
+    def __init__(self, min_size=MIN_COMPRESS_SIZE, max_bytes=STATIC_CACHE_MAX_BYTES):
+        self.min_size = min_size
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (path, encoding) -> (mtime, bytes), oldest use first
+        self._size = 0
+
+    def get(self, path, encoding):
+        """Return the compressed bytes of a file, or None if it isn't worth compressing."""
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        key = (path, encoding)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == mtime:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < self.min_size:
+            return None
+        compressed = compress(data, encoding, quality=11 if encoding == 'br' else 9)
+        if len(compressed) > self.max_bytes:
+            return compressed
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[1])
+            self._entries[key] = (mtime, compressed)
+            self._size += len(compressed)
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return compressed
+
+    def compress_static_response(self, response, path, accept_encodings):
+        """Swap a send_file response body for its cached compressed copy."""
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        if response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return response
+        encoding = choose_encoding(accept_encodings)
+        if encoding is None:
+            return response
+        compressed = self.get(path, encoding)
+        if compressed is None:
+            return response
+        etag, _ = response.get_etag()
+        response.close()
+        response.direct_passthrough = False
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        response.headers.pop('Accept-Ranges', None)
+        if etag:
+            # A different byte representation of the same file: keep the tag but mark it weak
+            response.set_etag(etag, weak=True)
+        return response
+
+    def warm(self, folder, encodings=('gzip',)):
+        """Precompress every compressible file under a folder."""
+        import mimetypes
+        count = 0
+        for root, _, files in os.walk(folder):
+            for name in files:
+                mimetype, _ = mimetypes.guess_type(name)
+                if mimetype not in COMPRESSIBLE_MIMETYPES:
+                    continue
+                for encoding in encodings:
+                    if self.get(os.path.join(root, name), encoding) is not None:
+                        count += 1
+        return count
@@ -0,0 +1,117 @@
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+from flask import g, has_request_context, request
+
+BACKGROUND = '(background)'
+STATIC_EXPORT = '(static export)'
+
+
+def estimate_size(value):
+    """Approximate Firestore storage size of a value, per Firestore's size rules."""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 8
+    if isinstance(value, (datetime, date)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode('utf-8')) + 1
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(k).encode('utf-8')) + 1 + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in value)
+    return 8
+
+
+def parse_budgets(spec):
+    """'index:20,calendar:100' -> {'index': 20, 'calendar': 100}"""
+    budgets = {}
+    for item in (spec or '').split(','):
+        if ':' in item:
+            route, limit = item.split(':', 1)
+            budgets[route.strip()] = int(limit)
+    return budgets
+
+
+class CostTracker:
+    """Counts Firestore document reads, writes, deletes and bytes, per Flask endpoint.
+
+    FirebaseManager records every billable operation; anything outside a request
+    (warmup, background threads) is attributed to '(background)', and pages
+    rendered for the static export to '(static export)'.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._last_summary = time.monotonic()
+        self.started_at = datetime.now()
+
+    @staticmethod
+    def current_route():
+        if has_request_context():
+            if g.get('rendering_static_export'):
+                return STATIC_EXPORT
+            return request.endpoint or request.path
+        return BACKGROUND
+
+    def record(self, kind, count=1, nbytes=0):
+        """Add `count` billable operations of `kind` ('reads', 'writes', 'deletes')."""
+        route = self.current_route()
+        with self._lock:
+            stats = self._routes.setdefault(route, {'requests': 0, 'reads': 0, 'writes': 0,
+                                                    'deletes': 0, 'bytes': 0})
+            stats[kind] += count
+            stats['bytes'] += nbytes
+        if route not in (BACKGROUND, STATIC_EXPORT):
+            usage = g.setdefault('firestore_usage', {'reads': 0, 'writes': 0, 'deletes': 0, 'bytes': 0})
+            usage[kind] += count
+            usage['bytes'] += nbytes
+
+    def record_read(self, data):
+        self.record('reads', 1, estimate_size(data))
+
+    def end_request(self, route, budgets=None, default_budget=0):
+        """Count a finished request and warn if its reads went over the route's budget."""
+        with self._lock:
+            stats = self._routes.setdefault(route, {'requests': 0, 'reads': 0, 'writes': 0,
+                                                    'deletes': 0, 'bytes': 0})
+            stats['requests'] += 1
+        usage = g.get('firestore_usage')
+        if not usage:
+            return None
+        budget = (budgets or {}).get(route, default_budget)
+        if budget and usage['reads'] > budget:
+            print(f"[WARNING] Firestore read budget exceeded on {route}: "
+                  f"{usage['reads']} reads (budget {budget})", file=sys.stderr)
+        return usage
+
+    def report(self):
+        """Totals per route, most reads first."""
+        with self._lock:
+            routes = {route: dict(stats) for route, stats in self._routes.items()}
+        for stats in routes.values():
+            stats['reads_per_request'] = round(stats['reads'] / stats['requests'], 2) if stats['requests'] else None
+        totals = {kind: sum(s[kind] for s in routes.values())
+                  for kind in ('requests', 'reads', 'writes', 'deletes', 'bytes')}
+        ordered = dict(sorted(routes.items(), key=lambda item: item[1]['reads'], reverse=True))
+        return {'since': self.started_at.isoformat(), 'totals': totals, 'routes': ordered}
+
+    def maybe_log_summary(self, interval):
+        """Print the top routes by reads at most once every `interval` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            if interval <= 0 or now - self._last_summary < interval:
+                return
+            self._last_summary = now
+        report = self.report()
+        totals = report['totals']
+        top = ', '.join(f"{route}={stats['reads']}" for route, stats in list(report['routes'].items())[:5])
+        print(f"[COSTS] Firestore since {report['since']}: {totals['reads']} reads, "
+              f"{totals['writes']} writes, {totals['deletes']} deletes, {totals['bytes']} bytes; "
+              f"top routes by reads: {top}", file=sys.stderr)
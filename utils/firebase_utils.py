@@ -5,25 +5,198 @@ from flask import url_for
 from datetime import datetime
 import os
 
+from utils.cache import LocalCache, cached
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, fails_fast_to
+from utils.cost_accounting import CostTracker, estimate_size
+from utils.single_flight import SingleFlight, coalesced
+from utils.site_snapshot import (MAX_SNAPSHOT_BYTES, RECENT_ANNOUNCEMENTS, SNAPSHOT_COLLECTION,
+                                 SNAPSHOT_COLLECTIONS, SNAPSHOT_DOCUMENT, apply_write, build_snapshot,
+                                 items, merge_announcements, recent_announcements)
+from utils.write_queue import with_pending_writes
+
 class FirebaseManager:
-    def __init__(self, credentials_path):
+    def __init__(self, credentials_path, cache=None):
         # Initialize Firebase app if not already initialized
         if not firebase_admin._apps:
             cred = credentials.Certificate(credentials_path)
             firebase_admin.initialize_app(cred)
+        self.credentials_path = credentials_path
         
         # Set up local upload folder
         self.upload_folder = 'static/uploads'
         os.makedirs(self.upload_folder, exist_ok=True)
 
+        # Callbacks run after every successful write (search index, caches, ...)
+        self._listeners = []
+
+        # Concurrent identical reads share one Firestore call
+        self.single_flight = SingleFlight()
+
+        # Read cache; a shared backend also relays other workers' writes to our listeners
+        self.cache = cache or LocalCache()
+        self.cache.subscribe(self._on_remote_write)
+
+        # Billable Firestore operations, attributed to the calling route
+        self.costs = CostTracker()
+
+        # Write-behind queue whose not-yet-applied writes are overlaid on reads (set by app.py)
+        self.pending_writes = None
+
+        # Serve public reads from the site snapshot document (one read per page)
+        self.use_snapshot = True
+
+        # Deadlines (seconds) for document gets and queries, so a degraded
+        # Firestore can't hold a worker until gRPC gives up
+        self.timeouts = {'get': 5.0, 'query': 10.0}
+
+        # Fails fast while Firestore is down; reads then fall back to their last good result
+        self.breaker = CircuitBreaker('firestore')
+        self.last_good = {}
+
+    def after_fork(self):
+        """Give a forked worker its own Firestore client and cache connections.
+
+        gRPC channels opened in the gunicorn master are not usable after fork, so
+        the default Firebase app is recreated (its Firestore client goes with it).
+        """
+        if firebase_admin._apps:
+            firebase_admin.delete_app(firebase_admin.get_app())
+        firebase_admin.initialize_app(credentials.Certificate(self.credentials_path))
+        self.cache.after_fork()
+
+    def add_listener(self, callback):
+        """Register callback(collection, action, doc_id, data) to run after every write."""
+        self._listeners.append(callback)
+
+    def _notify(self, collection, action, doc_id, data=None):
+        """Invalidate cached reads and tell listeners (here and in other workers) about a write."""
+        self.cache.invalidate(collection)
+        if collection in SNAPSHOT_COLLECTIONS:
+            self.cache.invalidate(SNAPSHOT_COLLECTION)
+        self.cache.publish({'collection': collection, 'action': action, 'doc_id': doc_id, 'data': data})
+        self._run_listeners(collection, action, doc_id, data)
+
+    def notify_queued(self, collection, action, doc_id, data=None):
+        """Announce a write the write queue accepted; reads overlay it from now on.
+
+        Listeners hear about it again when it is committed, so what they do
+        with an event must be safe to repeat.
+        """
+        self._notify(collection, action, doc_id, data)
+
+    def _on_remote_write(self, event):
+        """A write made by another worker; the shared cache is already invalidated."""
+        self._run_listeners(event['collection'], event['action'], event['doc_id'], event.get('data'))
+
+    def _run_listeners(self, collection, action, doc_id, data):
+        for callback in self._listeners:
+            try:
+                callback(collection, action, doc_id, data)
+            except Exception as e:
+                print(f"[ERROR] Write listener failed for {collection}/{doc_id}: {e}")
+
+    def _stream(self, query, transaction=None):
+        """Run a query, counting each document read (a query matching nothing bills one read)."""
+        # Read it all inside the guard so the whole query counts as one call
+        with self.breaker.guard():
+            docs = list(query.stream(transaction=transaction, timeout=self.timeouts['query']))
+        for doc in docs:
+            self.costs.record_read(doc.to_dict())
+        if not docs:
+            self.costs.record('reads')
+        return docs
+
+    def _get(self, doc_ref, transaction=None):
+        """Get one document, counting the read."""
+        with self.breaker.guard():
+            doc = doc_ref.get(transaction=transaction, timeout=self.timeouts['get'])
+        self.costs.record_read(doc.to_dict() if doc.exists else None)
+        return doc
+
+    def _record_write(self, data):
+        self.costs.record('writes', 1, estimate_size(data))
+
+    # ---------- site snapshot ----------
+
+    @cached(SNAPSHOT_COLLECTION)
+    @coalesced
+    def get_snapshot(self):
+        """The site snapshot document, built on first use. None when reads must use the collections."""
+        if not self.use_snapshot:
+            return None
+        db = firestore.client()
+        snapshot_doc = self._get(db.collection(SNAPSHOT_COLLECTION).document(SNAPSHOT_DOCUMENT))
+        if snapshot_doc.exists:
+            return snapshot_doc.to_dict()
+        return self.rebuild_snapshot()
+
+    def rebuild_snapshot(self):
+        """Rebuild the site snapshot from the collections in one transaction, and return it."""
+        db = firestore.client()
+        snapshot_ref = db.collection(SNAPSHOT_COLLECTION).document(SNAPSHOT_DOCUMENT)
+
+        @firestore.transactional
+        def run(transaction):
+            def documents(query):
+                return [(doc.id, doc.to_dict()) for doc in self._stream(query, transaction)]
+
+            settings_doc = self._get(db.collection('settings').document('default'), transaction)
+            snapshot = build_snapshot(
+                settings_doc.to_dict() if settings_doc.exists else {},
+                documents(db.collection('announcements').order_by(
+                    'timestamp', direction=firestore.Query.DESCENDING).limit(RECENT_ANNOUNCEMENTS)),
+                documents(db.collection('classes')),
+                documents(db.collection('camps')),
+                documents(db.collection('materials')))
+            if estimate_size(snapshot) > MAX_SNAPSHOT_BYTES:
+                return None
+            transaction.set(snapshot_ref, snapshot)
+            return snapshot
+
+        with self.breaker.guard():
+            snapshot = run(db.transaction())
+        if snapshot is None:
+            self._snapshot_too_large()
+            return None
+        self._record_write(snapshot)
+        self.cache.invalidate(SNAPSHOT_COLLECTION)
+        print(f"[INIT] Site snapshot rebuilt ({estimate_size(snapshot)} bytes)")
+        return snapshot
+
+    def _snapshot_too_large(self):
+        print(f"[WARNING] Site snapshot would exceed {MAX_SNAPSHOT_BYTES} bytes; "
+              f"public pages will read the collections instead")
+        self.use_snapshot = False
+        self.cache.invalidate(SNAPSHOT_COLLECTION)
+
+    def _read_snapshot(self):
+        """The snapshot, or None to fall back to querying the collections."""
+        try:
+            return self.get_snapshot()
+        except CircuitOpenError:
+            return None  # Already logged when the breaker opened
+        except Exception as e:
+            print(f"[ERROR] Failed to read site snapshot: {e}")
+            return None
+
+    # ---------- reads ----------
+
+    @with_pending_writes('announcements')
+    @fails_fast_to(list)
+    @cached('announcements')
+    @coalesced
     def get_announcements(self, limit=5):
         """Fetch recent announcements from Firestore."""
+        if limit <= RECENT_ANNOUNCEMENTS:
+            snapshot = self._read_snapshot()
+            if snapshot is not None:
+                return recent_announcements(snapshot, limit)
         db = firestore.client()
         try:
             # Try to order by timestamp
             announcements_ref = db.collection('announcements').order_by('timestamp', direction=firestore.Query.DESCENDING).limit(limit)
             announcements = []
-            for doc in announcements_ref.stream():
+            for doc in self._stream(announcements_ref):
                 announcement_data = doc.to_dict()
                 announcement_data['id'] = doc.id
                 # Only include if timestamp exists and is not None
@@ -35,79 +208,173 @@ class FirebaseManager:
             # Fallback: get all announcements without ordering
             announcements_ref = db.collection('announcements').limit(limit)
             announcements = []
-            for doc in announcements_ref.stream():
+            for doc in self._stream(announcements_ref):
                 announcement_data = doc.to_dict()
                 announcement_data['id'] = doc.id
                 announcements.append(announcement_data)
             return announcements
 
+    @with_pending_writes('settings')
+    @fails_fast_to(dict)
+    @cached('settings')
+    @coalesced
     def get_settings(self):
         """Fetch website settings from Firestore."""
+        snapshot = self._read_snapshot()
+        if snapshot is not None:
+            return dict(snapshot.get('settings') or {})
         db = firestore.client()
         settings_ref = db.collection('settings').document('default')
-        settings_doc = settings_ref.get()
+        settings_doc = self._get(settings_ref)
         return settings_doc.to_dict() if settings_doc.exists else {}
 
+    @with_pending_writes('classes')
+    @fails_fast_to(list)
+    @cached('classes')
+    @coalesced
     def get_all_classes(self):
         """Fetch all classes from Firestore."""
+        snapshot = self._read_snapshot()
+        if snapshot is not None:
+            return items(snapshot, 'classes')
         db = firestore.client()
         classes_ref = db.collection('classes')
         classes = []
-        for doc in classes_ref.stream():
+        for doc in self._stream(classes_ref):
             class_data = doc.to_dict()
             class_data['id'] = doc.id
             classes.append(class_data)
         return classes
 
+    @with_pending_writes('materials')
+    @fails_fast_to(list)
+    @cached('materials')
+    @coalesced
     def get_all_materials(self):
         """Fetch all study materials from Firestore."""
+        snapshot = self._read_snapshot()
+        if snapshot is not None:
+            return items(snapshot, 'materials')
         db = firestore.client()
         materials_ref = db.collection('materials')
         materials = []
-        for doc in materials_ref.stream():
+        for doc in self._stream(materials_ref):
             material_data = doc.to_dict()
             material_data['id'] = doc.id
             materials.append(material_data)
         return materials
 
+    @with_pending_writes('camps')
+    @fails_fast_to(list)
+    @cached('camps')
+    @coalesced
     def get_all_camps(self):
         """Fetch all camps from Firestore."""
+        snapshot = self._read_snapshot()
+        if snapshot is not None:
+            return items(snapshot, 'camps')
         db = firestore.client()
         camps_ref = db.collection('camps')
         camps = []
-        for doc in camps_ref.stream():
+        for doc in self._stream(camps_ref):
             camp_data = doc.to_dict()
             camp_data['id'] = doc.id
             camps.append(camp_data)
         return camps
 
+    # ---------- writes ----------
+
+    def _commit(self, ops):
+        """Apply writes and fold them into the site snapshot in one Firestore transaction.
+
+        ops is a list of (collection, action, doc_ref, data), action being 'add',
+        'update' (merged) or 'delete'. Listeners are notified once it commits.
+        """
+        db = firestore.client()
+        snapshot_ref = db.collection(SNAPSHOT_COLLECTION).document(SNAPSHOT_DOCUMENT)
+        use_snapshot = self.use_snapshot
+
+        @firestore.transactional
+        def run(transaction):
+            # Transactions must do all their reads before any write
+            snapshot = None
+            if use_snapshot:
+                snapshot_doc = self._get(snapshot_ref, transaction)
+                snapshot = snapshot_doc.to_dict() if snapshot_doc.exists else None
+            if snapshot is not None and any(
+                    collection == 'announcements' and action == 'delete'
+                    and doc_ref.id in snapshot.get('announcements', {})
+                    for collection, action, doc_ref, _ in ops):
+                # Refill the recent announcements a delete is about to shrink
+                query = db.collection('announcements').order_by(
+                    'timestamp', direction=firestore.Query.DESCENDING).limit(RECENT_ANNOUNCEMENTS + len(ops))
+                merge_announcements(snapshot, [(doc.id, doc.to_dict()) for doc in self._stream(query, transaction)])
+
+            for collection, action, doc_ref, data in ops:
+                if action == 'delete':
+                    transaction.delete(doc_ref)
+                else:
+                    transaction.set(doc_ref, data, merge=action == 'update')
+                if snapshot is not None:
+                    apply_write(snapshot, collection, action, doc_ref.id, data)
+            if snapshot is None:
+                return None
+            if estimate_size(snapshot) > MAX_SNAPSHOT_BYTES:
+                # Drop it rather than fail the write; reads go back to the collections
+                transaction.delete(snapshot_ref)
+                return False
+            transaction.set(snapshot_ref, snapshot)
+            return snapshot
+
+        with self.breaker.guard():
+            snapshot = run(db.transaction())
+
+        for collection, action, doc_ref, data in ops:
+            if action == 'delete':
+                self.costs.record('deletes')
+            else:
+                self._record_write(data)
+        if snapshot is False:
+            self._snapshot_too_large()
+        elif snapshot is not None:
+            self._record_write(snapshot)
+        for collection, action, doc_ref, data in ops:
+            self._notify(collection, action, doc_ref.id, data)
+
     def add_class(self, class_data):
         """Add a new class to Firestore."""
         db = firestore.client()
-        classes_ref = db.collection('classes')
-        classes_ref.add(class_data)
+        doc_ref = db.collection('classes').document()
+        self._commit([('classes', 'add', doc_ref, class_data)])
+        return doc_ref
 
     def add_camp(self, camp_data):
         """Add a new camp to Firestore."""
         db = firestore.client()
-        camps_ref = db.collection('camps')
-        camps_ref.add(camp_data)
-
-    def add_material(self, material_data, file):
-        """Add a new study material to Firestore and save file locally."""
-        db = firestore.client()
+        doc_ref = db.collection('camps').document()
+        self._commit([('camps', 'add', doc_ref, camp_data)])
+        return doc_ref
 
-        # Secure the filename
-        filename = secure_filename(file.filename)
-        
+    @staticmethod
+    def material_filename(original_name):
+        """Secure, timestamped name under which an uploaded material file is stored."""
         # Add timestamp to avoid duplicate names
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-        filename = timestamp + filename
+        return timestamp + secure_filename(original_name)
+
+    def add_material(self, material_data, file):
+        """Add a new study material to Firestore and save file locally."""
+        filename = self.material_filename(file.filename)
         
         # Save file locally
         filepath = os.path.join(self.upload_folder, filename)
         file.save(filepath)
-        
+        return self.add_material_record(material_data, filename)
+
+    def add_material_record(self, material_data, filename):
+        """Add the Firestore document for a material file already in the upload folder."""
+        db = firestore.client()
+
         # Create URL for the file
         file_url = url_for('static', filename=f'uploads/{filename}', _external=True)
 
@@ -115,39 +382,58 @@ class FirebaseManager:
         material_data['file_name'] = filename
         material_data['file_url'] = file_url
         material_data['uploaded_at'] = firestore.SERVER_TIMESTAMP
-        materials_ref = db.collection('materials')
-        materials_ref.add(material_data)
+        doc_ref = db.collection('materials').document()
+        self._commit([('materials', 'add', doc_ref, material_data)])
+        return doc_ref
 
-    def add_announcement(self, announcement_data):
-        """Add a new announcement to Firestore."""
-        db = firestore.client()
+    @staticmethod
+    def stamp_announcement(announcement_data):
+        """Set the timestamp fields announcements are ordered and displayed by."""
         # Use Python datetime for immediate availability
         announcement_data['timestamp'] = datetime.now()
         announcement_data['created_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        announcements_ref = db.collection('announcements')
-        doc_ref = announcements_ref.add(announcement_data)
-        print(f"[DEBUG] Announcement added with ID: {doc_ref[1].id}")
+        return announcement_data
+
+    def add_announcement(self, announcement_data):
+        """Add a new announcement to Firestore."""
+        db = firestore.client()
+        self.stamp_announcement(announcement_data)
+        doc_ref = db.collection('announcements').document()
+        self._commit([('announcements', 'add', doc_ref, announcement_data)])
+        print(f"[DEBUG] Announcement added with ID: {doc_ref.id}")
         return doc_ref
 
+    def apply_writes(self, ops):
+        """Commit queued writes in one Firestore transaction, then notify listeners.
+
+        Each op is a dict with collection, action ('add', 'update' or 'delete'),
+        doc_id and data. Adds use the doc_id chosen when the write was queued, so
+        replaying a batch after a failure can't create duplicates.
+        """
+        db = firestore.client()
+        self._commit([(op['collection'], op['action'],
+                       db.collection(op['collection']).document(op['doc_id']), op['data'])
+                      for op in ops])
+
     def update_settings(self, settings_data):
         """Update website settings in Firestore."""
         db = firestore.client()
         settings_ref = db.collection('settings').document('default')
-        settings_ref.set(settings_data, merge=True)
+        self._commit([('settings', 'update', settings_ref, settings_data)])
 
     def delete_class(self, class_id):
         """Delete a class from Firestore."""
         db = firestore.client()
         class_ref = db.collection('classes').document(class_id)
         print(f"Deleting class document with ID: {class_id}")
-        class_ref.delete()
+        self._commit([('classes', 'delete', class_ref, None)])
 
     def delete_camp(self, camp_id):
         """Delete a camp from Firestore."""
         db = firestore.client()
         camp_ref = db.collection('camps').document(camp_id)
         print(f"Deleting camp document with ID: {camp_id}")
-        camp_ref.delete()
+        self._commit([('camps', 'delete', camp_ref, None)])
 
     def delete_material(self, material_id):
         """Delete a study material from Firestore and remove file."""
@@ -155,7 +441,7 @@ class FirebaseManager:
         
         # Get material data first
         material_ref = db.collection('materials').document(material_id)
-        material_doc = material_ref.get()
+        material_doc = self._get(material_ref)
         
         if material_doc.exists:
             material_data = material_doc.to_dict()
@@ -169,11 +455,11 @@ class FirebaseManager:
             
             # Delete from Firestore
             print(f"Deleting material document with ID: {material_id}")
-            material_ref.delete()
+            self._commit([('materials', 'delete', material_ref, None)])
 
     def delete_announcement(self, announcement_id):
         """Delete an announcement from Firestore."""
         db = firestore.client()
         announcement_ref = db.collection('announcements').document(announcement_id)
         print(f"Deleting announcement document with ID: {announcement_id}")
-        announcement_ref.delete()
\ No newline at end of file
+        self._commit([('announcements', 'delete', announcement_ref, None)])
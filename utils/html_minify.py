@@ -0,0 +1,50 @@
+import re
+
+# Content of these elements is whitespace-sensitive or not HTML
+_RAW_BLOCK_RE = re.compile(r'(<(pre|textarea|script|style)\b[^>]*>.*?</\2\s*>)', re.IGNORECASE | re.DOTALL)
+_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+_WHITESPACE_RE = re.compile(r'\s+')
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_CSS_SPACE_RE = re.compile(r'\s*([{};,>])\s*')
+
+
+def _minify_markup(markup):
+    markup = _COMMENT_RE.sub('', markup)
+    # Collapsing a run of whitespace to one character never changes how HTML renders
+    return _WHITESPACE_RE.sub(lambda m: '\n' if '\n' in m.group(0) else ' ', markup)
+
+
+def minify_css(css):
+    """Drop comments and collapse whitespace in a stylesheet."""
+    css = _CSS_COMMENT_RE.sub('', css)
+    return _CSS_SPACE_RE.sub(r'\1', _WHITESPACE_RE.sub(' ', css)).strip()
+
+
+def minify_js(js):
+    """Strip indentation and blank lines; keeping newlines keeps ASI intact."""
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def _minify_style(block):
+    open_end = block.index('>') + 1
+    close_start = block.lower().rindex('</style')
+    return block[:open_end] + minify_css(block[open_end:close_start]) + block[close_start:]
+
+
+def minify_html(html):
+    """Strip redundant whitespace and comments from rendered HTML."""
+    parts = []
+    position = 0
+    for match in _RAW_BLOCK_RE.finditer(html):
+        parts.append(_minify_markup(html[position:match.start()]))
+        block = match.group(1)
+        tag = match.group(2).lower()
+        if tag == 'style':
+            block = _minify_style(block)
+        elif tag == 'script':
+            block = minify_js(block)
+        parts.append(block)
+        position = match.end()
+    parts.append(_minify_markup(html[position:]))
+    return ''.join(parts).strip()
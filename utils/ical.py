@@ -0,0 +1,173 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from utils.schedule import camp_dates, class_end, class_start
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+PRODID = '-//Ntshofo Institution of Excellence//Classes and Camps//EN'
+
+
+def _escape(text):
+    return (str(text or '').replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Fold a content line at 75 octets as RFC 5545 requires."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        # Don't split a multi-byte UTF-8 character
+        while cut > 0 and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    parts.append(encoded.decode('utf-8'))
+    return '\r\n '.join(parts)
+
+
+def _utc(local_dt, tz):
+    if tz is not None:
+        local_dt = local_dt.replace(tzinfo=tz)
+        return local_dt.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    # No timezone database: emit floating local time
+    return local_dt.strftime('%Y%m%dT%H%M%S')
+
+
+def build_calendar(name, classes=(), camps=(), tz_name='Africa/Johannesburg', now=None):
+    """Render classes (timed events) and camps (all-day events) as an iCalendar document."""
+    tz = None
+    if ZoneInfo is not None:
+        try:
+            tz = ZoneInfo(tz_name)
+        except Exception:
+            tz = None
+    stamp = (now or datetime.now(timezone.utc)).strftime('%Y%m%dT%H%M%SZ')
+
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN',
+             'METHOD:PUBLISH', f'X-WR-CALNAME:{_escape(name)}', f'X-WR-TIMEZONE:{tz_name}']
+
+    for class_data in classes:
+        start = class_start(class_data)
+        if start is None:
+            continue
+        lines += ['BEGIN:VEVENT',
+                  f"UID:class-{class_data.get('id')}@nie",
+                  f'DTSTAMP:{stamp}',
+                  f'DTSTART:{_utc(start, tz)}',
+                  f'DTEND:{_utc(class_end(class_data), tz)}',
+                  f"SUMMARY:{_escape(class_data.get('title'))}",
+                  f"DESCRIPTION:{_escape(class_data.get('description'))}",
+                  f"CATEGORIES:{_escape(class_data.get('type') or 'regular')}",
+                  'END:VEVENT']
+
+    for camp in camps:
+        first_day, last_day = camp_dates(camp)
+        if first_day is None:
+            continue
+        lines += ['BEGIN:VEVENT',
+                  f"UID:camp-{camp.get('id')}@nie",
+                  f'DTSTAMP:{stamp}',
+                  f"DTSTART;VALUE=DATE:{first_day.strftime('%Y%m%d')}",
+                  # DTEND is exclusive for all-day events
+                  f"DTEND;VALUE=DATE:{(last_day + timedelta(days=1)).strftime('%Y%m%d')}",
+                  f"SUMMARY:{_escape(camp.get('title'))}",
+                  f"DESCRIPTION:{_escape(camp.get('description'))}",
+                  'CATEGORIES:camp']
+        if camp.get('location'):
+            lines.append(f"LOCATION:{_escape(camp.get('location'))}")
+        lines.append('END:VEVENT')
+
+    lines.append('END:VCALENDAR')
+    return ('\r\n'.join(_fold(line) for line in lines) + '\r\n').encode('utf-8')
+
+
+class IcsFeeds:
+    """Precomputed .ics feeds, rebuilt only after classes or camps change.
+
+    Feeds: 'all' (classes + camps), 'classes', 'camps' and 'classes-<type>'
+    for each class type. The feeds remember the classes and camps cache
+    versions they were built from; the first request after either moves on
+    (a write in any worker) rebuilds all of them from the (cached) collections.
+    A per-process cache doesn't see other processes' writes, so with one the
+    feeds are also rebuilt once they are older than the cache TTL.
+    """
+
+    COLLECTIONS = ('classes', 'camps')
+
+    def __init__(self, firebase, tz_name='Africa/Johannesburg'):
+        self.firebase = firebase
+        self.tz_name = tz_name
+        self._lock = threading.Lock()
+        self._feeds = {}       # name -> (body, etag)
+        self._versions = None  # cache versions the feeds were built from
+        self._built_at = 0     # monotonic time of that build
+        self.builds = 0
+
+    def _current_versions(self):
+        if not self.firebase:
+            return (0,) * len(self.COLLECTIONS)
+        return tuple(self.firebase.cache.get_version(c) for c in self.COLLECTIONS)
+
+    def _expired(self):
+        cache = self.firebase.cache if self.firebase else None
+        if cache is None or cache.shared:
+            return False
+        return time.monotonic() - self._built_at >= cache.ttl
+
+    def get(self, name):
+        """(body, etag) for a feed, or None if there is no such feed."""
+        with self._lock:
+            # Read before building, so a write during the build triggers another one
+            versions = self._current_versions()
+            if None in versions or versions != self._versions or self._expired():
+                built_at = time.monotonic()
+                try:
+                    feeds, trustworthy = self._build()
+                except Exception:
+                    # Keep serving the previous feeds; retry on the next request
+                    if not self._feeds:
+                        raise
+                    print("[WARNING] Calendar feed rebuild failed; serving previous feeds")
+                    return self._feeds.get(name)
+                if trustworthy and None not in versions:
+                    self._feeds, self._versions, self._built_at = feeds, versions, built_at
+                elif self._feeds:
+                    # Built from fallback data: the previous feeds are at least as good
+                    return self._feeds.get(name)
+                else:
+                    return feeds.get(name)
+            return self._feeds.get(name)
+
+    def _build(self):
+        """(feeds, trustworthy): trustworthy is False if fallback data went into them."""
+        if self.firebase:
+            with self.firebase.breaker.watch() as reads:
+                classes = self.firebase.get_all_classes()
+                camps = self.firebase.get_all_camps()
+            trustworthy = not reads.degraded
+        else:
+            classes, camps, trustworthy = [], [], True
+        now = datetime.now(timezone.utc)
+
+        feeds = {
+            'all': build_calendar('NIE Classes & Camps', classes, camps, self.tz_name, now),
+            'classes': build_calendar('NIE Classes', classes, (), self.tz_name, now),
+            'camps': build_calendar('NIE Camps', (), camps, self.tz_name, now),
+        }
+        for class_type in sorted({c.get('type') or 'regular' for c in classes}):
+            typed = [c for c in classes if (c.get('type') or 'regular') == class_type]
+            feeds[f'classes-{class_type}'] = build_calendar(
+                f'NIE {class_type.title()} Classes', typed, (), self.tz_name, now)
+
+        self.builds += 1
+        return {name: (body, hashlib.sha1(body).hexdigest()) for name, body in feeds.items()}, trustworthy
@@ -0,0 +1,138 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+_PROFILE_ID_RE = re.compile(r'^[0-9]+-[0-9]+$')
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    # Keep project paths readable; library frames only need their module file
+    cwd = os.getcwd()
+    if filename.startswith(cwd):
+        filename = os.path.relpath(filename, cwd)
+    elif 'site-packages' in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[1]
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ',')
+
+
+def _stack_key(frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Statistical profiler for one thread: records its call stack every `interval` seconds.
+
+    Sampling from a separate thread keeps the profiled request running at full
+    speed (no per-call hooks), and the stacks it collects are exactly what a
+    flamegraph needs.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self.started_at = None
+        self.duration = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_stack_key(frame)] += 1
+
+
+class ProfileStore:
+    """The most recent request profiles, as JSON files in a fixed-size on-disk ring.
+
+    Saving a profile beyond `max_profiles` deletes the oldest, so the folder
+    never grows past that many files whatever the sample rate.
+    """
+
+    def __init__(self, folder, max_profiles=50):
+        self.folder = folder
+        self.max_profiles = max_profiles
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, profile_id):
+        if not _PROFILE_ID_RE.match(profile_id or ''):
+            return None
+        return os.path.join(self.folder, f'{profile_id}.json')
+
+    def _ids(self):
+        """Stored profile ids, oldest first (ids start with a nanosecond timestamp)."""
+        try:
+            names = os.listdir(self.folder)
+        except OSError:
+            return []
+        ids = [name[:-5] for name in names if name.endswith('.json') and _PROFILE_ID_RE.match(name[:-5])]
+        return sorted(ids, key=lambda profile_id: int(profile_id.split('-')[0]))
+
+    def save(self, meta, stacks):
+        """Store one profile and return its id."""
+        profile_id = f'{time.time_ns()}-{os.getpid()}'
+        path = self._path(profile_id)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'meta': dict(meta, id=profile_id), 'stacks': dict(stacks)}, f)
+        os.replace(tmp_path, path)
+
+        ids = self._ids()
+        for old_id in ids[:max(len(ids) - self.max_profiles, 0)]:
+            try:
+                os.remove(self._path(old_id))
+            except OSError:
+                pass  # Another worker got there first
+        return profile_id
+
+    def get(self, profile_id):
+        path = self._path(profile_id)
+        if path is None:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list(self):
+        """Metadata of every stored profile, newest first."""
+        profiles = []
+        for profile_id in reversed(self._ids()):
+            profile = self.get(profile_id)
+            if profile is not None:
+                profiles.append(profile['meta'])
+        return profiles
+
+    def collapsed(self, profile_id):
+        """A profile in collapsed-stack format ('a;b;c count' per line), as read by
+        flamegraph.pl, speedscope and inferno. None if there is no such profile."""
+        profile = self.get(profile_id)
+        if profile is None:
+            return None
+        lines = [f'{stack} {count}' for stack, count in sorted(profile['stacks'].items())]
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,69 @@
+import re
+from datetime import date, datetime, timedelta
+
+DEFAULT_CLASS_DURATION = timedelta(hours=2)
+
+_DURATION_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*(h|hr|hrs|hour|hours|m|min|mins|minute|minutes)?\b', re.IGNORECASE)
+
+
+def parse_date(value):
+    """'2025-03-14' (as sent by <input type=date>) -> date, or None."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_time(value):
+    """'09:30' or '09:30:00' -> (hour, minute), or None."""
+    for fmt in ('%H:%M', '%H:%M:%S'):
+        try:
+            parsed = datetime.strptime(str(value).strip(), fmt)
+            return parsed.hour, parsed.minute
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def parse_duration(value):
+    """Free-text duration from the admin form ('2 hours', '90 min', '1.5') -> timedelta.
+
+    A bare number means hours, matching the form's "Duration (hours)" label.
+    """
+    match = _DURATION_RE.search(str(value or ''))
+    if not match:
+        return DEFAULT_CLASS_DURATION
+    amount = float(match.group(1).replace(',', '.'))
+    unit = (match.group(2) or 'h').lower()
+    if unit.startswith('m'):
+        return timedelta(minutes=amount)
+    return timedelta(hours=amount)
+
+
+def class_start(class_data):
+    """Start of a class as a naive local datetime, or None if its date can't be parsed."""
+    day = parse_date(class_data.get('date'))
+    if day is None:
+        return None
+    hour, minute = parse_time(class_data.get('time')) or (0, 0)
+    return datetime(day.year, day.month, day.day, hour, minute)
+
+
+def class_end(class_data):
+    start = class_start(class_data)
+    if start is None:
+        return None
+    return start + parse_duration(class_data.get('duration'))
+
+
+def camp_dates(camp_data):
+    """(first day, last day) of a camp; a missing end date means a one-day camp."""
+    start = parse_date(camp_data.get('start_date'))
+    if start is None:
+        return None, None
+    end = parse_date(camp_data.get('end_date')) or start
+    return start, max(start, end)
@@ -0,0 +1,327 @@
+import heapq
+import json
+import math
+import os
+import re
+import threading
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = {'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+             'is', 'it', 'of', 'on', 'or', 'the', 'to', 'with'}
+
+# Which fields get indexed per collection, and how much a hit in each is worth
+FIELD_WEIGHTS = {
+    'materials': {'title': 3.0, 'category': 2.0, 'grade': 2.0, 'description': 1.0, 'body': 0.5},
+    'classes': {'title': 3.0, 'type': 2.0, 'description': 1.0},
+    'announcements': {'title': 3.0, 'content': 1.0},
+}
+
+MAX_BODY_CHARS = 20000
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    """Split text into lowercase search terms."""
+    if not text:
+        return []
+    return [t for t in TOKEN_RE.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def extract_pdf_text(path):
+    """Return the text of a PDF, or '' when pypdf is missing or the file can't be read."""
+    if PdfReader is None or not path.lower().endswith('.pdf') or not os.path.exists(path):
+        return ''
+    try:
+        reader = PdfReader(path)
+        parts = []
+        size = 0
+        for page in reader.pages:
+            text = page.extract_text() or ''
+            parts.append(text)
+            size += len(text)
+            if size >= MAX_BODY_CHARS:
+                break
+        return ' '.join(parts)[:MAX_BODY_CHARS]
+    except Exception as e:
+        print(f"[WARNING] Could not extract text from {path}: {e}")
+        return ''
+
+
+class SearchIndex:
+    """In-process inverted index over materials, classes and announcements.
+
+    Documents are kept as their indexed fields; postings are rebuilt from them.
+    The index is stamped with the read cache's token and the versions of the
+    indexed collections it reflects. Before a search, ensure_current() compares
+    that stamp with the current versions: if another worker (or the write
+    queue) changed a collection, the index is reloaded from the JSON file, if
+    some worker saved one at exactly those versions, or else rebuilt from
+    Firestore. A file is only ever saved with the stamp of what it contains, so
+    whichever worker writes it last, it is never trusted for the wrong data.
+
+    Without pypdf installed, PDF materials are indexed by their metadata only.
+    """
+
+    def __init__(self, path, upload_folder='static/uploads', firebase=None):
+        self.path = path
+        self.upload_folder = upload_folder
+        self.firebase = firebase
+        self._stamp = None     # {'token', 'versions'} the documents reflect; None = unknown
+        self._refresh_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._docs = {}        # key -> {'collection', 'id', 'fields'}
+        self._postings = {}    # term -> {key: weighted term frequency}
+        self._lengths = {}     # key -> total weighted terms
+        self._total_length = 0.0
+        self._norms = None     # key -> BM25 length normalisation, reset on every write
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._docs)
+
+    # ---------- persistence ----------
+
+    def load(self, stamp=None):
+        """Load documents from disk. Returns False if there is no index file, or
+        (when a stamp is given) if the file wasn't saved at that stamp."""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Search index at {self.path} unreadable: {e}")
+            return False
+        if not isinstance(saved, dict) or (stamp is not None and saved.get('stamp') != stamp):
+            return False
+        with self._lock:
+            self._clear()
+            for doc in saved['docs']:
+                self._index(doc['collection'], doc['id'], doc['fields'])
+            self._stamp = saved.get('stamp')
+        return True
+
+    def save(self):
+        """Write all documents and their stamp to disk atomically."""
+        with self._lock:
+            saved = {'stamp': self._stamp, 'docs': list(self._docs.values())}
+        # Per-process temp file: several workers may save the same index at once
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(saved, f, separators=(',', ':'), default=str)
+        os.replace(tmp_path, self.path)
+
+    def current_stamp(self):
+        """Stamp for the collections as they are now, or None if the cache can't tell."""
+        cache = self.firebase.cache
+        versions = {collection: cache.get_version(collection) for collection in FIELD_WEIGHTS}
+        if None in versions.values():
+            return None
+        return {'token': cache.token, 'versions': versions}
+
+    def ensure_current(self):
+        """Catch up with writes made anywhere since the index was built."""
+        if self.firebase is None:
+            return
+        stamp = self.current_stamp()
+        if stamp is not None and stamp == self._stamp:
+            return
+        with self._refresh_lock:
+            stamp = self.current_stamp()
+            if stamp is not None and stamp == self._stamp:
+                return
+            if stamp is not None and self.load(stamp):
+                return
+            self.rebuild(stamp)
+
+    def rebuild(self, stamp=None):
+        """Re-index every searchable collection from Firestore.
+
+        Reads taken from circuit-breaker fallbacks are indexed only if there is
+        nothing better, and never saved or stamped, so the next search retries.
+        """
+        if stamp is None:
+            stamp = self.current_stamp()
+        with self._lock:
+            previous = dict(self._docs)
+        with self.firebase.breaker.watch() as reads:
+            materials = self.firebase.get_all_materials()
+            classes = self.firebase.get_all_classes()
+            announcements = self.firebase.get_announcements(limit=1000)
+        if reads.degraded and previous:
+            print("[WARNING] Search index not rebuilt: Firestore reads fell back")
+            return
+
+        fresh = SearchIndex(self.path, self.upload_folder)
+        for material in materials:
+            # Reuse text already pulled out of an unchanged file
+            known = previous.get(f"materials/{material['id']}")
+            if (known is not None and 'body' in known['fields'] and 'body' not in material
+                    and known['fields'].get('file_url') == material.get('file_url', '')):
+                material = dict(material, body=known['fields']['body'])
+            fresh.add('materials', material['id'], material, save=False)
+        for class_data in classes:
+            fresh.add('classes', class_data['id'], class_data, save=False)
+        for announcement in announcements:
+            fresh.add('announcements', announcement['id'], announcement, save=False)
+
+        trusted = not reads.degraded and stamp is not None
+        with self._lock:
+            self._docs, self._postings = fresh._docs, fresh._postings
+            self._lengths, self._total_length = fresh._lengths, fresh._total_length
+            self._norms = None
+            self._stamp = stamp if trusted else None
+        if trusted:
+            self.save()
+
+    # ---------- writes ----------
+
+    def add(self, collection, doc_id, data, save=True):
+        """Index (or re-index) one document."""
+        weights = FIELD_WEIGHTS.get(collection)
+        if weights is None or not doc_id:
+            return
+        fields = {name: str(data[name]) for name in weights if data.get(name)}
+        if collection == 'materials':
+            if fields.get('grade'):
+                fields['grade'] = f"grade {fields['grade']}"
+            fields['file_url'] = data.get('file_url', '')
+            if 'body' not in fields and data.get('file_name'):
+                body = extract_pdf_text(os.path.join(self.upload_folder, data['file_name']))
+                if body:
+                    fields['body'] = body
+        with self._lock:
+            self._index(collection, doc_id, fields)
+        if save:
+            self.save()
+
+    def remove(self, collection, doc_id, save=True):
+        """Drop one document from the index."""
+        with self._lock:
+            removed = self._unindex(f'{collection}/{doc_id}')
+        if removed and save:
+            self.save()
+
+    def on_write(self, collection, action, doc_id, data=None):
+        """FirebaseManager listener applying an add or delete in place.
+
+        Only when the write is the single change to its collection since the
+        index was stamped (an update carries just the changed fields); in any
+        other case the next search rebuilds.
+        """
+        if collection not in FIELD_WEIGHTS or self.firebase is None or action not in ('add', 'delete'):
+            return
+        with self._refresh_lock:
+            stamp = self._stamp
+            version = self.firebase.cache.get_version(collection)
+            if stamp is None or version is None or stamp['versions'][collection] != version - 1:
+                return
+            if action == 'delete':
+                self.remove(collection, doc_id, save=False)
+            else:
+                self.add(collection, doc_id, data or {}, save=False)
+            with self._lock:
+                self._stamp = dict(stamp, versions=dict(stamp['versions'], **{collection: version}))
+            self.save()
+
+    # ---------- queries ----------
+
+    def search(self, query, page=1, per_page=10, collection=None):
+        """Return (results, total) for a query, ranked by BM25 over weighted fields."""
+        terms = set(tokenize(query))
+        if not terms:
+            return [], 0
+
+        k1 = BM25_K1
+        with self._lock:
+            n_docs = len(self._docs)
+            if n_docs == 0:
+                return [], 0
+            norms = self._get_norms()
+            scores = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                boost = idf * (k1 + 1)
+                get = scores.get
+                for key, tf in postings.items():
+                    scores[key] = get(key, 0.0) + boost * tf / (tf + norms[key])
+
+            if collection:
+                prefix = collection + '/'
+                scores = {key: s for key, s in scores.items() if key.startswith(prefix)}
+
+            total = len(scores)
+            start = max(page - 1, 0) * per_page
+            ranked = heapq.nlargest(start + per_page, scores.items(), key=lambda item: item[1])
+            results = []
+            for key, score in ranked[start:]:
+                doc = self._docs[key]
+                fields = doc['fields']
+                results.append({
+                    'collection': doc['collection'],
+                    'id': doc['id'],
+                    'title': fields.get('title', ''),
+                    'snippet': (fields.get('description') or fields.get('content') or '')[:200],
+                    'file_url': fields.get('file_url', ''),
+                    'score': round(score, 4),
+                })
+        return results, total
+
+    # ---------- internals (caller holds the lock) ----------
+
+    def _get_norms(self):
+        if self._norms is None:
+            avg_length = self._total_length / len(self._docs) or 1.0
+            self._norms = {key: BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                           for key, length in self._lengths.items()}
+        return self._norms
+
+    def _clear(self):
+        self._norms = None
+        self._docs = {}
+        self._postings = {}
+        self._lengths = {}
+        self._total_length = 0.0
+
+    def _index(self, collection, doc_id, fields):
+        key = f'{collection}/{doc_id}'
+        self._unindex(key)
+        weights = FIELD_WEIGHTS[collection]
+        term_freqs = {}
+        for name, weight in weights.items():
+            for term in tokenize(fields.get(name)):
+                term_freqs[term] = term_freqs.get(term, 0.0) + weight
+        for term, tf in term_freqs.items():
+            self._postings.setdefault(term, {})[key] = tf
+        length = sum(term_freqs.values())
+        self._docs[key] = {'collection': collection, 'id': doc_id, 'fields': fields}
+        self._lengths[key] = length
+        self._total_length += length
+        self._norms = None
+
+    def _unindex(self, key):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return False
+        for name in FIELD_WEIGHTS[doc['collection']]:
+            for term in set(tokenize(doc['fields'].get(name))):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(key, None)
+                    if not postings:
+                        del self._postings[term]
+        self._total_length -= self._lengths.pop(key, 0.0)
+        self._norms = None
+        return True
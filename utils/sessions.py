@@ -0,0 +1,34 @@
+from flask.sessions import SecureCookieSession, SecureCookieSessionInterface
+
+
+class AnonymousSession(SecureCookieSession):
+    """Session for a public request without a cookie; never saved back to the client."""
+
+
+class PublicSessionInterface(SecureCookieSessionInterface):
+    """Cookie sessions that stay out of the way of anonymous public traffic.
+
+    A GET/HEAD request outside the admin area that arrives without a session
+    cookie gets a throwaway session: nothing is verified on the way in and no
+    cookie or ``Vary: Cookie`` header is added on the way out, so the response
+    can be cached by shared proxies. Admin paths and requests that already carry
+    a session cookie (a logged-in admin browsing the site) use normal sessions.
+    """
+
+    def __init__(self, private_prefixes=('/admin',)):
+        self.private_prefixes = tuple(private_prefixes)
+
+    def is_anonymous_public(self, app, request):
+        return (request.method in ('GET', 'HEAD')
+                and not request.path.startswith(self.private_prefixes)
+                and self.get_cookie_name(app) not in request.cookies)
+
+    def open_session(self, app, request):
+        if self.is_anonymous_public(app, request):
+            return AnonymousSession()
+        return super().open_session(app, request)
+
+    def save_session(self, app, session, response):
+        if isinstance(session, AnonymousSession):
+            return
+        super().save_session(app, session, response)
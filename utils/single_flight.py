@@ -0,0 +1,93 @@
+import copy
+import inspect
+import threading
+from functools import wraps
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent identical calls into one.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for its result instead of making their own call. A waiter
+    that exceeds the key's timeout stops waiting and runs the call itself, so a
+    stuck leader can't stall every request behind it.
+    """
+
+    def __init__(self, default_timeout=10.0, timeouts=None):
+        self.default_timeout = default_timeout
+        self.timeouts = dict(timeouts or {})
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'calls': 0, 'executed': 0, 'collapsed': 0, 'timeouts': 0}
+
+    def timeout_for(self, key):
+        return self.timeouts.get(key[0], self.default_timeout)
+
+    def do(self, key, fn):
+        """Run fn() for key, or share the result of an identical call already running."""
+        with self._lock:
+            self.stats['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['executed'] += 1
+
+        if leader:
+            try:
+                call.result = fn()
+                return call.result
+            except Exception as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+
+        if not call.done.wait(self.timeout_for(key)):
+            with self._lock:
+                self.stats['timeouts'] += 1
+                self.stats['executed'] += 1
+            return fn()
+        with self._lock:
+            self.stats['collapsed'] += 1
+        if call.error is not None:
+            raise call.error
+        # Waiters get their own copy so nobody mutates the leader's data
+        return copy.deepcopy(call.result)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._calls))
+
+
+def call_key_builder(method):
+    """Return key(self, args, kwargs) -> (method name, sorted bound arguments)."""
+    signature = inspect.signature(method)
+
+    def key_for(instance, args, kwargs):
+        # Bind so get_announcements(5) and get_announcements(limit=5) share a key
+        bound = signature.bind(instance, *args, **kwargs)
+        bound.apply_defaults()
+        return (method.__name__,) + tuple(sorted((name, value) for name, value in bound.arguments.items()
+                                               if name != 'self'))
+    return key_for
+
+
+def coalesced(method):
+    """Route a FirebaseManager read through its SingleFlight, keyed by name and arguments."""
+    key_for = call_key_builder(method)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = key_for(self, args, kwargs)
+        return self.single_flight.do(key, lambda: method(self, *args, **kwargs))
+    return wrapper
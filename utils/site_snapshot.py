@@ -0,0 +1,84 @@
+from datetime import datetime
+
+# Where the snapshot lives in Firestore
+SNAPSHOT_COLLECTION = 'site'
+SNAPSHOT_DOCUMENT = 'snapshot'
+
+# Collections mirrored in the snapshot; settings is one document, the rest are id -> data maps
+SNAPSHOT_COLLECTIONS = ('announcements', 'settings', 'classes', 'camps', 'materials')
+
+# Only the newest announcements are kept; larger reads go to the collection
+RECENT_ANNOUNCEMENTS = 20
+
+# Firestore documents are capped at 1 MiB; stay clear of it
+MAX_SNAPSHOT_BYTES = 900 * 1024
+
+
+def build_snapshot(settings, announcements, classes, camps, materials):
+    """Snapshot from (doc_id, data) pairs per collection."""
+    snapshot = {
+        'settings': dict(settings or {}),
+        'announcements': {doc_id: data for doc_id, data in announcements},
+        'classes': {doc_id: data for doc_id, data in classes},
+        'camps': {doc_id: data for doc_id, data in camps},
+        'materials': {doc_id: data for doc_id, data in materials},
+    }
+    _trim_announcements(snapshot)
+    return snapshot
+
+
+def apply_write(snapshot, collection, action, doc_id, data=None):
+    """Fold one write into a snapshot, in place."""
+    if collection not in SNAPSHOT_COLLECTIONS:
+        return
+    if collection == 'settings':
+        if action == 'delete':
+            snapshot['settings'] = {}
+        elif action == 'update':
+            snapshot.setdefault('settings', {}).update(data or {})
+        else:
+            snapshot['settings'] = dict(data or {})
+        return
+
+    documents = snapshot.setdefault(collection, {})
+    if action == 'delete':
+        documents.pop(doc_id, None)
+    elif action == 'update':
+        documents.setdefault(doc_id, {}).update(data or {})
+    else:
+        documents[doc_id] = dict(data or {})
+    if collection == 'announcements':
+        _trim_announcements(snapshot)
+
+
+def merge_announcements(snapshot, announcements):
+    """Add (doc_id, data) pairs read from the collection, e.g. to refill after a delete."""
+    documents = snapshot.setdefault('announcements', {})
+    for doc_id, data in announcements:
+        documents.setdefault(doc_id, data)
+
+
+def items(snapshot, collection):
+    """A collection's documents as a list of dicts with 'id', in document id order."""
+    documents = snapshot.get(collection) or {}
+    return [dict(data, id=doc_id) for doc_id, data in sorted(documents.items())]
+
+
+def recent_announcements(snapshot, limit):
+    """Newest announcements first, like the timestamp-ordered query."""
+    announcements = [a for a in items(snapshot, 'announcements') if a.get('timestamp') is not None]
+    return sorted(announcements, key=_timestamp_key, reverse=True)[:limit]
+
+
+def _timestamp_key(announcement):
+    timestamp = announcement.get('timestamp')
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    return 0.0
+
+
+def _trim_announcements(snapshot):
+    documents = snapshot.get('announcements') or {}
+    if len(documents) > RECENT_ANNOUNCEMENTS:
+        keep = {a['id'] for a in recent_announcements(snapshot, RECENT_ANNOUNCEMENTS)}
+        snapshot['announcements'] = {doc_id: data for doc_id, data in documents.items() if doc_id in keep}
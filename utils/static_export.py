@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from contextlib import nullcontext
+
+from flask import g
+
+# Endpoint -> (URL, collections the page shows)
+PAGES = {
+    'index': ('/', ('announcements', 'settings')),
+    'calendar': ('/calendar', ('classes', 'settings')),
+    'camps': ('/camps', ('camps', 'settings')),
+    'materials': ('/materials', ('materials',)),
+    'contact': ('/contact', ('settings',)),
+    'about': ('/about', ()),
+}
+
+RELEASE_STAMP = '.release'
+
+
+def release_key(app, asset_files):
+    """Fingerprint of what exported pages are built from besides the data:
+    the asset manifest, the templates and the app module's code."""
+    digest = hashlib.sha256(json.dumps(asset_files, sort_keys=True).encode('utf-8'))
+    for name in sorted(app.jinja_env.list_templates()):
+        source, _, _ = app.jinja_env.loader.get_source(app.jinja_env, name)
+        digest.update(name.encode('utf-8') + b'\0' + source.encode('utf-8'))
+    module_file = getattr(sys.modules.get(app.import_name), '__file__', None)
+    if module_file:
+        with open(module_file, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class StaticExport:
+    """Pre-rendered copies of the public pages, as plain HTML files.
+
+    Pages are written to output_dir as <path>/index.html ('/' -> index.html,
+    '/calendar' -> calendar/index.html), so a CDN or any static file server can
+    serve the directory as is. A write only re-renders the pages that show the
+    changed collection, a moment later so a burst of writes costs one render.
+    A page rendered from fallback data (Firestore circuit breaker not closed)
+    isn't written; it is tried again once the breaker lets calls through.
+
+    A full build records `release` (see release_key) in output_dir, so the
+    first start after a deploy re-renders every page rather than only the
+    missing ones.
+    """
+
+    def __init__(self, app, output_dir, delay=1.0, breaker=None, release=None):
+        self.app = app
+        self.output_dir = output_dir
+        self.delay = delay
+        self.breaker = breaker
+        self.release = release
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._timer = None
+        self.renders = 0
+
+    def path_for(self, endpoint):
+        url = PAGES[endpoint][0].strip('/')
+        return os.path.join(self.output_dir, url, 'index.html')
+
+    def exists(self, endpoint):
+        return endpoint in PAGES and os.path.exists(self.path_for(endpoint))
+
+    def is_current(self):
+        """True if the pages on disk were fully built by this release."""
+        if self.release is None:
+            return True
+        try:
+            with open(os.path.join(self.output_dir, RELEASE_STAMP), 'r', encoding='utf-8') as f:
+                return f.read().strip() == self.release
+        except OSError:
+            return False
+
+    # ---------- rendering ----------
+
+    def render(self, endpoint):
+        """Render one page as an anonymous visitor would see it. Returns False if it failed."""
+        url = PAGES[endpoint][0]
+        with self.app.test_request_context(url):
+            # Tells the app not to answer from the file being rebuilt
+            g.rendering_static_export = True
+            with self.breaker.watch() if self.breaker else nullcontext() as reads:
+                response = self.app.full_dispatch_request()
+            if reads is not None and reads.degraded:
+                print(f"[WARNING] Not exporting {url}: rendered from fallback data", file=sys.stderr)
+                self._schedule({endpoint}, self.delay + self.breaker.retry_in())
+                return False
+            if response.status_code != 200 or g.get('public_notices'):
+                # Keep the last good copy rather than publishing an error page
+                print(f"[WARNING] Not exporting {url}: status {response.status_code}, "
+                      f"notices {g.get('public_notices')}", file=sys.stderr)
+                return False
+            html = response.get_data()
+
+        path = self.path_for(endpoint)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Per-process temp file: several workers may export the same page at once
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+        self.renders += 1
+        return True
+
+    def build(self, endpoints=None, missing_only=False):
+        """Render the given pages (all by default). Returns the endpoints written."""
+        written = []
+        for endpoint in endpoints or PAGES:
+            if missing_only and self.exists(endpoint):
+                continue
+            try:
+                if self.render(endpoint):
+                    written.append(endpoint)
+            except Exception as e:
+                print(f"[ERROR] Failed to export {endpoint}: {e}", file=sys.stderr)
+        if endpoints is None and not missing_only and len(written) == len(PAGES) and self.release:
+            self._write_stamp()
+        return written
+
+    def refresh(self):
+        """At startup: render every page after a deploy, otherwise only the missing ones."""
+        return self.build(missing_only=self.is_current())
+
+    def _write_stamp(self):
+        path = os.path.join(self.output_dir, RELEASE_STAMP)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.release)
+        os.replace(tmp_path, path)
+
+    # ---------- invalidation ----------
+
+    def invalidate(self, collection):
+        """Schedule a re-render of every page showing a collection."""
+        affected = {endpoint for endpoint, (_, collections) in PAGES.items() if collection in collections}
+        if affected:
+            self._schedule(affected, self.delay)
+
+    def _schedule(self, endpoints, delay):
+        with self._lock:
+            self._dirty |= endpoints
+            if self._timer is None:
+                self._timer = threading.Timer(delay, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def on_write(self, collection, action, doc_id, data=None):
+        """FirebaseManager listener re-rendering the pages a write affects."""
+        self.invalidate(collection)
+
+    def _flush(self):
+        with self._lock:
+            endpoints, self._dirty = self._dirty, set()
+            self._timer = None
+        written = self.build(sorted(endpoints))
+        print(f"[EXPORT] Re-rendered {', '.join(written) or 'nothing'}", file=sys.stderr)
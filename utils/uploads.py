@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+META_NAME = 'meta.json'
+PART_NAME = 'data.part'
+
+
+class UploadError(Exception):
+    """A resumable upload request that can't be honoured; status is the HTTP status to return."""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class ResumableUploads:
+    """Uploads sent as a series of byte ranges that survive dropped connections.
+
+    Each upload lives in its own directory under `folder`: meta.json (file name,
+    expected size and SHA-256, material metadata) plus the bytes received so
+    far. A chunk is only appended when its offset is exactly the current size
+    and its SHA-256 matches, so a client that lost a response asks for the
+    status and carries on from there. The directory is on disk, so any worker
+    can take the next chunk. Uploads untouched for `ttl` seconds are deleted.
+    """
+
+    def __init__(self, folder, max_size=16 * 1024 * 1024, chunk_size=1024 * 1024, ttl=24 * 3600):
+        self.folder = folder
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    def _dir(self, upload_id):
+        # Ids are hex uuids; anything else can't name an upload (or escape the folder)
+        if not upload_id or not all(c in '0123456789abcdef' for c in upload_id):
+            raise UploadError('Unknown upload.', 404)
+        return os.path.join(self.folder, upload_id)
+
+    def _read_meta(self, upload_id):
+        try:
+            with open(os.path.join(self._dir(upload_id), META_NAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise UploadError('Unknown upload.', 404)
+
+    def _write_meta(self, upload_id, meta):
+        path = os.path.join(self._dir(upload_id), META_NAME)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    # ---------- protocol ----------
+
+    def create(self, filename, size, sha256=None, metadata=None):
+        """Start an upload and return its status (including the new upload_id)."""
+        self.cleanup()
+        if size <= 0:
+            raise UploadError('Upload size must be positive.')
+        if size > self.max_size:
+            raise UploadError(f'File is larger than {self.max_size // (1024 * 1024)}MB.', 413)
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._dir(upload_id))
+        open(os.path.join(self._dir(upload_id), PART_NAME), 'wb').close()
+        now = time.time()
+        self._write_meta(upload_id, {
+            'filename': filename,
+            'size': size,
+            'sha256': (sha256 or '').lower() or None,
+            'metadata': metadata or {},
+            'created_at': now,
+        })
+        return self.status(upload_id)
+
+    def status(self, upload_id):
+        """How much of an upload has arrived."""
+        meta = self._read_meta(upload_id)
+        offset = os.path.getsize(os.path.join(self._dir(upload_id), PART_NAME))
+        return {'upload_id': upload_id, 'filename': meta['filename'], 'size': meta['size'],
+                'offset': offset, 'chunk_size': self.chunk_size, 'complete': offset == meta['size']}
+
+    def write_chunk(self, upload_id, offset, data, sha256):
+        """Append a chunk at `offset` after checking its SHA-256. Returns the new offset."""
+        meta = self._read_meta(upload_id)
+        if not sha256 or hashlib.sha256(data).hexdigest() != sha256.lower():
+            raise UploadError('Chunk checksum mismatch.', 422)
+
+        path = os.path.join(self._dir(upload_id), PART_NAME)
+        with self._lock, open(path, 'ab') as f:
+            if fcntl is not None:
+                # Another worker may be handling a retry of the same chunk
+                fcntl.flock(f, fcntl.LOCK_EX)
+            current = f.seek(0, os.SEEK_END)
+            if offset != current:
+                raise UploadError('Offset does not match the bytes received.', 409, current)
+            if current + len(data) > meta['size']:
+                raise UploadError('Chunk runs past the declared size.', 413, current)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            return current + len(data)
+
+    def complete(self, upload_id):
+        """Check a finished upload. Returns (path of the assembled file, meta)."""
+        meta = self._read_meta(upload_id)
+        path = os.path.join(self._dir(upload_id), PART_NAME)
+        received = os.path.getsize(path)
+        if received != meta['size']:
+            raise UploadError('Upload is incomplete.', 409, received)
+        if meta['sha256']:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            if digest.hexdigest() != meta['sha256']:
+                raise UploadError('File checksum mismatch.', 422)
+        return path, meta
+
+    def discard(self, upload_id):
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+
+    def cleanup(self):
+        """Delete uploads nobody has touched for `ttl` seconds. Returns how many."""
+        cutoff = time.time() - self.ttl
+        removed = 0
+        try:
+            names = os.listdir(self.folder)
+        except OSError:
+            return 0
+        for name in names:
+            path = os.path.join(self.folder, name)
+            try:
+                # The part file's mtime moves with every chunk
+                last_touched = max([os.path.getmtime(path)] + [
+                    os.path.getmtime(os.path.join(path, entry)) for entry in os.listdir(path)])
+            except OSError:
+                continue
+            if last_touched < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        if removed:
+            print(f"[UPLOADS] Removed {removed} abandoned upload(s)", file=sys.stderr)
+        return removed
@@ -0,0 +1,26 @@
+import uuid
+
+
+class CollectionVersions:
+    """ETags built from the read cache's per-collection version counters.
+
+    The cache bumps a collection's version whenever FirebaseManager writes to
+    it, so clients can revalidate without a Firestore read. The cache token keeps
+    ETags from an unrelated process (or a wiped Redis) from matching; with a
+    shared cache every worker builds the same ETags.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def get(self, collection):
+        return self.cache.get_version(collection)
+
+    def etag(self, collection, variant=''):
+        """ETag value for the current state of a collection (plus any query variant)."""
+        version = self.get(collection)
+        if version is None:
+            # Version unknown: hand out a tag that will never match
+            version = uuid.uuid4().hex
+        tag = f'{collection}-{self.cache.token}-{version}'
+        return f'{tag}-{variant}' if variant else tag
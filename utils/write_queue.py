@@ -0,0 +1,335 @@
+import inspect
+import os
+import pickle
+import random
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from functools import wraps
+
+from utils.circuit_breaker import CircuitOpenError
+
+PENDING = 'pending'
+APPLYING = 'applying'
+FAILED = 'failed'
+DONE = 'done'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS writes (
+    id TEXT PRIMARY KEY,
+    collection TEXT NOT NULL,
+    action TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    data BLOB,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_at REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    applied_at REAL
+);
+CREATE INDEX IF NOT EXISTS writes_status ON writes (status, next_attempt_at);
+"""
+
+
+class WriteQueue:
+    """Durable write-behind queue for admin mutations.
+
+    Writes are stored in SQLite and acknowledged at once; a background thread
+    per process applies them to Firestore in batches (FirebaseManager.apply_writes)
+    with exponential backoff. Every write has an idempotency key: adds get their
+    Firestore document id when queued, so a retried batch overwrites rather than
+    duplicates. Several gunicorn workers can share one queue file; each batch is
+    claimed inside a transaction, and a claim left by a crashed worker is retried
+    after claim_timeout seconds. Writes to one document are applied in the order
+    they were queued: a write waits while an earlier one to the same document is
+    pending, being applied or failed.
+
+    Write listeners hear about a write when it is queued and again when it is
+    applied. A write that is given up on or discarded disappears from reads;
+    drop listeners (callback(collection)) are told so.
+    """
+
+    def __init__(self, path, firebase, batch_size=20, max_attempts=8,
+                 base_delay=2.0, max_delay=300.0, poll_interval=2.0, claim_timeout=60.0,
+                 keep_done=200):
+        self.path = path
+        self.firebase = firebase
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.claim_timeout = claim_timeout
+        self.keep_done = keep_done
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+        self._drop_listeners = []
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    # ---------- submitting ----------
+
+    def submit(self, collection, action, data=None, doc_id=None):
+        """Queue a write and return its idempotency key. Adds get a fresh document id."""
+        op_id = uuid.uuid4().hex
+        if action == 'add':
+            doc_id = doc_id or op_id
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO writes (id, collection, action, doc_id, data, status, next_attempt_at, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (op_id, collection, action, doc_id,
+                 pickle.dumps(data, pickle.HIGHEST_PROTOCOL), PENDING, now, now))
+        # Reads now include this write: cached results and ETags are out of date,
+        # and indexes can apply it in place rather than rebuild
+        self.firebase.notify_queued(collection, action, doc_id, data)
+        self.ensure_running()
+        self._wakeup.set()
+        return op_id
+
+    # ---------- reading ----------
+
+    def pending_ops(self, collection):
+        """Queued writes for a collection that aren't in Firestore yet, oldest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT * FROM writes WHERE collection = ? AND status IN (?, ?) ORDER BY created_at',
+                (collection, PENDING, APPLYING)).fetchall()
+        return [self._op(row) for row in rows]
+
+    def list(self, statuses=(PENDING, APPLYING, FAILED)):
+        """Queued writes with the given statuses, for the dashboard."""
+        placeholders = ','.join('?' * len(statuses))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f'SELECT * FROM writes WHERE status IN ({placeholders}) ORDER BY created_at',
+                tuple(statuses)).fetchall()
+        return [self._op(row) for row in rows]
+
+    def counts(self):
+        with self._connect() as conn:
+            rows = conn.execute('SELECT status, COUNT(*) AS n FROM writes GROUP BY status').fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    @staticmethod
+    def _op(row):
+        op = dict(row)
+        op['data'] = pickle.loads(row['data']) if row['data'] is not None else None
+        op['created'] = datetime.fromtimestamp(row['created_at']).strftime('%Y-%m-%d %H:%M:%S')
+        op['next_attempt'] = datetime.fromtimestamp(row['next_attempt_at']).strftime('%H:%M:%S')
+        return op
+
+    # ---------- admin actions ----------
+
+    def retry(self, op_id):
+        """Put a failed write back in the queue."""
+        with self._connect() as conn:
+            conn.execute('UPDATE writes SET status = ?, attempts = 0, next_attempt_at = ? '
+                         'WHERE id = ? AND status = ?', (PENDING, time.time(), op_id, FAILED))
+        self.ensure_running()
+        self._wakeup.set()
+
+    def discard(self, op_id):
+        """Drop a failed write for good."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT collection FROM writes WHERE id = ? AND status = ?',
+                               (op_id, FAILED)).fetchone()
+            conn.execute('DELETE FROM writes WHERE id = ? AND status = ?', (op_id, FAILED))
+        if row is not None:
+            self._dropped(row['collection'])
+        self._wakeup.set()  # later writes to the same document may go now
+
+    def add_drop_listener(self, callback):
+        """Call callback(collection) when a queued write is given up on or discarded."""
+        self._drop_listeners.append(callback)
+
+    def _dropped(self, collection):
+        # The write is no longer shown optimistically
+        self.firebase.cache.invalidate(collection)
+        for callback in self._drop_listeners:
+            try:
+                callback(collection)
+            except Exception as e:
+                print(f"[ERROR] Write queue drop listener failed: {e}", file=sys.stderr)
+
+    # ---------- applying ----------
+
+    def ensure_running(self):
+        """Start this process's drain thread (again after a fork)."""
+        if self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive():
+            return
+        self._thread_pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='write-queue', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                while self.drain_once():
+                    pass
+            except Exception as e:
+                print(f"[ERROR] Write queue drain failed: {e}", file=sys.stderr)
+
+    def _claim(self):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = []
+            blocked = set()  # documents with an earlier write that can't go in this batch
+            queued = conn.execute('SELECT * FROM writes WHERE status IN (?, ?, ?) ORDER BY created_at, rowid',
+                                  (PENDING, APPLYING, FAILED)).fetchall()
+            for row in queued:
+                doc = (row['collection'], row['doc_id'])
+                due = ((row['status'] == PENDING and row['next_attempt_at'] <= now)
+                       or (row['status'] == APPLYING and row['claimed_at'] < now - self.claim_timeout))
+                if doc in blocked or not due:
+                    blocked.add(doc)
+                    continue
+                rows.append(row)
+                if len(rows) == self.batch_size:
+                    break
+            conn.executemany('UPDATE writes SET status = ?, claimed_at = ? WHERE id = ?',
+                             [(APPLYING, now, row['id']) for row in rows])
+            conn.execute('COMMIT')
+        return [self._op(row) for row in rows]
+
+    def drain_once(self):
+        """Apply one batch. Returns the number of writes applied."""
+        ops = self._claim()
+        if not ops:
+            return 0
+        try:
+            self.firebase.apply_writes(ops)
+            self._mark_done(ops)
+            return len(ops)
+        except CircuitOpenError:
+            # Firestore is known to be down; wait for the breaker without using up attempts
+            self._postpone(ops, max(self.firebase.breaker.retry_in(), self.poll_interval))
+            return 0
+        except Exception as e:
+            if len(ops) == 1:
+                self._mark_failed(ops[0], e)
+                return 0
+            print(f"[WARNING] Batch of {len(ops)} queued writes failed ({e}); retrying one by one",
+                  file=sys.stderr)
+
+        # Isolate the write(s) that broke the batch
+        applied = 0
+        failed_docs = set()
+        for i, op in enumerate(ops):
+            doc = (op['collection'], op['doc_id'])
+            if doc in failed_docs:
+                # Must not overtake the earlier write to this document that just failed
+                self._postpone([op], 0)
+                continue
+            try:
+                self.firebase.apply_writes([op])
+                self._mark_done([op])
+                applied += 1
+            except CircuitOpenError:
+                self._postpone(ops[i:], max(self.firebase.breaker.retry_in(), self.poll_interval))
+                break
+            except Exception as e:
+                self._mark_failed(op, e)
+                failed_docs.add(doc)
+        return applied
+
+    def _mark_done(self, ops):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany('UPDATE writes SET status = ?, applied_at = ?, last_error = NULL WHERE id = ?',
+                             [(DONE, now, op['id']) for op in ops])
+            # Keep a short history of applied writes; the rest is noise
+            conn.execute('DELETE FROM writes WHERE status = ? AND id NOT IN '
+                         '(SELECT id FROM writes WHERE status = ? ORDER BY applied_at DESC LIMIT ?)',
+                         (DONE, DONE, self.keep_done))
+
+    def _postpone(self, ops, delay):
+        with self._connect() as conn:
+            conn.executemany('UPDATE writes SET status = ?, next_attempt_at = ? WHERE id = ?',
+                             [(PENDING, time.time() + delay, op['id']) for op in ops])
+
+    def _mark_failed(self, op, error):
+        attempts = op['attempts'] + 1
+        if attempts >= self.max_attempts:
+            status, next_attempt_at = FAILED, time.time()
+            print(f"[ERROR] Giving up on queued {op['action']} {op['collection']}/{op['doc_id']} "
+                  f"after {attempts} attempts: {error}", file=sys.stderr)
+        else:
+            delay = min(self.base_delay * 2 ** (attempts - 1), self.max_delay)
+            status, next_attempt_at = PENDING, time.time() + delay * random.uniform(0.8, 1.2)
+        with self._connect() as conn:
+            conn.execute('UPDATE writes SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? '
+                         'WHERE id = ?', (status, attempts, next_attempt_at, str(error)[:500], op['id']))
+        if status == FAILED:
+            self._dropped(op['collection'])
+
+
+def overlay_pending(collection, result, ops, limit=None):
+    """Apply not-yet-committed writes on top of a read result."""
+    if collection == 'settings':
+        merged = dict(result)
+        for op in ops:
+            if op['action'] != 'delete':
+                merged.update(op['data'] or {})
+        return merged
+
+    by_id = {item.get('id'): item for item in result}
+    added = []
+    for op in ops:
+        if op['action'] == 'delete':
+            by_id.pop(op['doc_id'], None)
+            added = [item for item in added if item['id'] != op['doc_id']]
+        elif op['doc_id'] not in by_id:
+            added.append(dict(op['data'] or {}, id=op['doc_id'], pending=True))
+
+    remaining = [item for item in result if item.get('id') in by_id]
+    if collection == 'announcements':
+        # Newest first, like the ordered query
+        items = list(reversed(added)) + remaining
+        return items[:limit] if limit else items
+    return remaining + added
+
+
+def with_pending_writes(collection):
+    """Overlay the write queue's pending writes on a FirebaseManager read."""
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            result = method(self, *args, **kwargs)
+            queue = self.pending_writes
+            if queue is None:
+                return result
+            try:
+                ops = queue.pending_ops(collection)
+            except sqlite3.Error as e:
+                print(f"[WARNING] Could not read pending writes: {e}", file=sys.stderr)
+                return result
+            if not ops:
+                return result
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            return overlay_pending(collection, result, ops, bound.arguments.get('limit'))
+        return wrapper
+    return decorator
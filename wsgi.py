@@ -0,0 +1,10 @@
+"""Production WSGI entry point: gunicorn -c gunicorn.conf.py wsgi:app"""
+import os
+
+# Let gRPC (used by Firestore) survive gunicorn forking a preloaded master
+os.environ.setdefault('GRPC_ENABLE_FORK_SUPPORT', 'true')
+os.environ.setdefault('GRPC_POLL_STRATEGY', 'poll')
+
+from app import app, firebase, warm_up  # noqa: E402
+
+__all__ = ['app', 'firebase', 'warm_up']